@@ -1,9 +1,11 @@
+import json
 import os
+import queue
 import secrets
 import uuid
 from datetime import datetime
 
-from flask import Flask, render_template, request, redirect, jsonify, session, url_for
+from flask import Flask, Response, render_template, request, redirect, jsonify, session, url_for
 
 from persistence.equipa import (
     adicionar_jogador_equipa, 
@@ -21,28 +23,43 @@ from persistence.leagues import (
     juntar_liga,
     juntar_liga_automatico,
     obter_liga_por_id,
-    obter_ligas_por_utilizador,
-    obter_participantes_liga,
+    obter_pagina_participantes_liga,
     obter_tipos_liga,
     obter_liga_pelo_pais,
     obter_ligas_publicas_para_utilizador,
     obter_liga_id_por_codigo,
-    obter_ranking_liga,
+    obter_pagina_classificacao_jornada,
+    obter_pagina_ranking_jornada,
+    obter_resumo_ligas_utilizador,
     verificar_participacao_liga,
 )
+from persistence.leaderboard import completar_resumo_ligas, obter_leaderboard
 from persistence.jornadas import obter_jornada_info, obter_jornada_atual, obter_todas_jornadas
-from persistence.players import list_all, list_paginated, read
+from persistence.players import PickPage, get_catalog, list_paginated, read
 from persistence.clubs import list_all_clubs, list_paginated_clubs, read_club
+from persistence.contagens import counts_config
 from persistence.users import create_user, login_user, get_users, get_user_by_id
 from persistence.countries import get_pais
 
 from persistence.pontuacoes import calcular_pontuacao_equipa, calcular_pontuacao_jogador, obter_pontuacoes_jornadas, obter_equipa_com_pontuacoes_jornada
 from persistence import players
 from persistence.match import list_paginated_matches, read_match
+from persistence import live, ranking_stream, roundtrips, unit_of_work
+from persistence.live import aplicar_pendente, live_scoring
+from persistence.roundtrips import roundtrip_budget
+from persistence.metrics import metrics_allowed, render_prometheus
+from persistence.session import pool_stats
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY') or 'chave-temporaria-para-desenvolvimento' 
 
+# Uma conexão à BD por pedido, partilhada por todas as chamadas de persistência
+unit_of_work.init_app(app)
+# Deteção de N+1 e orçamentos de round trips (ativo via [roundtrips] no conf.ini)
+roundtrips.init_app(app)
+# Pontuações ao vivo durante a jornada (ativo via [live] no conf.ini)
+live.init_app(app)
+
 
 @app.route("/", methods=["GET"])
 def login_page():
@@ -241,36 +258,54 @@ def help_page():
 def players_list():
     if 'user_id' not in session:
         return redirect("/")
-    page = int(request.args.get("page", 1))
-    per_page = 10
-
-    jogadores, total = list_paginated(page, per_page)
-    total_pages = (total + per_page - 1) // per_page
+    pagina = list_paginated(10, request.args.get("depois"), request.args.get("antes"))
 
     return render_template(
         "players.html",
-        jogadores=jogadores,
-        page=page,
-        total_pages=total_pages
+        jogadores=pagina.linhas,
+        pagina=pagina
     )
 
 
+@app.route("/players/search")
+def players_search():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not logged in"}), 401
+
+    try:
+        limite = min(max(int(request.args.get("limit", 10)), 1), 50)
+    except ValueError:
+        limite = 10
+
+    resultados = get_catalog().search.search(request.args.get("q", ""), limite)
+    return jsonify([
+        {
+            "id": r.jogador.id,
+            "nome": r.jogador.nome,
+            "posicao": r.jogador.posicao,
+            "preco": r.jogador.preco,
+            "clube": r.clube,
+            "imagem": r.jogador.jogador_imagem,
+            "estado": r.jogador.estado,
+        }
+        for r in resultados
+    ])
+
+
 @app.route("/clubs")
 def clubs_list():
     if 'user_id' not in session:
         return redirect("/")
 
-    page = int(request.args.get("page", 1))
-    per_page = 10
-
-    clubes, total = list_paginated_clubs(page, per_page)
-    total_pages = (total + per_page - 1) // per_page
+    pagina = list_paginated_clubs(10, request.args.get("depois"), request.args.get("antes"))
 
+    # O total em cache não vê clubes inseridos por outros processos (populate_db.py)
+    # durante até `ttl` segundos: a página diz isso junto ao total
     return render_template(
         "clubs.html",
-        clubes=clubes,
-        page=page,
-        total_pages=total_pages
+        clubes=pagina.linhas,
+        pagina=pagina,
+        ttl_contagem=counts_config().ttl,
     )
 
 
@@ -285,6 +320,7 @@ def club_details(c_id):
 
 
 @app.route("/equipa")
+@roundtrip_budget(6)
 def equipa():
     if 'user_id' not in session:
         return redirect("/")
@@ -303,11 +339,31 @@ def equipa():
     medios = [j for j in jogadores_equipa if j['posicao'] == "Midfielder"]
     avancados = [j for j in jogadores_equipa if j['posicao'] == "Forward"]
 
-    todos_jogadores = list_all()
-    todos_avancados = [j for j in todos_jogadores if j.posicao == "Forward"]
-    todos_medios = [j for j in todos_jogadores if j.posicao == "Midfielder"]
-    todos_defesas = [j for j in todos_jogadores if j.posicao == "Defender"]
-    todos_gr = [j for j in todos_jogadores if j.posicao == "Goalkeeper"]
+    # Escolhas por posição a partir do índice do catálogo em cache: só jogadores que
+    # cabem no orçamento e não estão no plantel, uma página de cada vez
+    indice = get_catalog().index
+    no_plantel = [j['id'] for j in jogadores_equipa]
+    ordem = 'name' if request.args.get('ordem') == 'name' else 'price'
+
+    def escolhas(posicao, chave):
+        if posicao not in indice:
+            return PickPage([], 0, 1, 1)
+        return indice[posicao].pick(
+            budget=equipa_user.orcamento,
+            exclude=no_plantel,
+            page=request.args.get(f'pagina_{chave}', 1, type=int),
+            per_page=20,
+            order=ordem,
+            prefix=request.args.get(f'procurar_{chave}', '').strip(),
+        )
+
+    def url_equipa(**alteracoes):
+        return url_for('equipa', **{**request.args.to_dict(), **alteracoes})
+
+    todos_avancados = escolhas("Forward", "avancados")
+    todos_medios = escolhas("Midfielder", "medios")
+    todos_defesas = escolhas("Defender", "defesas")
+    todos_gr = escolhas("Goalkeeper", "gr")
 
     return render_template("equipa.html", 
                          equipa={
@@ -322,7 +378,9 @@ def equipa():
                              'Defender': todos_defesas,
                              'Midfielder': todos_medios,
                              'Forward': todos_avancados
-                         })
+                         },
+                         ordem=ordem,
+                         url_equipa=url_equipa)
 
 
 @app.route("/criar-equipa", methods=['GET', 'POST'])
@@ -395,7 +453,9 @@ def ligas_list():
         return redirect("/")
 
     user_id = session['user_id']
-    minhas_ligas = obter_ligas_por_utilizador(user_id)
+    # Posição, equipas e pontos em todas as ligas do utilizador numa só consulta; as
+    # ligas públicas sem classificação gravada atual vêm do leaderboard em memória
+    minhas_ligas = completar_resumo_ligas(obter_resumo_ligas_utilizador(user_id), user_id)
     user = get_user_by_id(user_id)
     user_country = None
     if user:
@@ -451,6 +511,7 @@ def juntar_liga_route(liga_id):
 
 
 @app.route("/liga/<liga_id>")
+@roundtrip_budget(6)
 def liga_detalhes(liga_id):
     if 'user_id' not in session:
         return redirect("/")
@@ -459,23 +520,106 @@ def liga_detalhes(liga_id):
     if not liga:
         return "Liga não encontrada", 404
     
-    participantes = obter_participantes_liga(liga_id)
+    # Participantes: uma página de cada vez, com pesquisa pelo início do nome
+    procurar = request.args.get('procurar', '').strip()
+    participantes = obter_pagina_participantes_liga(
+        liga_id, 50,
+        depois=request.args.get('part_depois'),
+        antes=request.args.get('part_antes'),
+        prefixo=procurar,
+    )
     
     jornada_selecionada = request.args.get('jornada', None)
     
     jornadas = obter_todas_jornadas()
     
-    # Obter ranking
-    ranking = obter_ranking_liga(liga_id, jornada_selecionada)
+    # Paginação da classificação: cursor (depois/antes) ou "a minha posição"
+    tamanho = min(max(request.args.get('tamanho', 50, type=int), 1), 200)
+    depois = request.args.get('depois')
+    antes = request.args.get('antes')
+    em_volta_de = session['user_id'] if request.args.get('em_volta') else None
+
+    # O ranking geral vem do leaderboard em memória, sem reordenar a liga; as jornadas
+    # fechadas vêm de Classificação_Jornada e as restantes são calculadas na hora
+    if jornada_selecionada:
+        pagina = (
+            obter_pagina_classificacao_jornada(liga_id, jornada_selecionada, tamanho, depois, antes, em_volta_de)
+            or obter_pagina_ranking_jornada(liga_id, jornada_selecionada, tamanho, depois, antes, em_volta_de)
+        )
+    else:
+        board = obter_leaderboard(liga_id)
+        pagina = board.pagina_cursor(tamanho, depois, antes, em_volta_de)
+
+    # "Top X%" e distribuição dos pontos a partir do histograma da liga (sem ordenar)
+    minha_equipa = topo = None
+    distribuicao = []
+    if not jornada_selecionada:
+        minha_equipa = board.equipa_de(session['user_id'])
+        if minha_equipa:
+            topo = board.histograma.percentagem_topo(minha_equipa.pontuacao_acumulada)
+        distribuicao = board.histograma.intervalos(10)
 
     return render_template("liga_details.html", 
                          liga=liga, 
                          participantes=participantes,
-                         ranking=ranking,
+                         procurar=procurar,
+                         ranking=pagina.linhas,
+                         pagina=pagina,
+                         minha_equipa=minha_equipa,
+                         topo=topo,
+                         distribuicao=distribuicao,
+                         tamanho=tamanho,
                          jornadas=jornadas,
                          jornada_selecionada=jornada_selecionada)
 
 
+@app.route("/liga/<liga_id>/stream")
+def liga_stream(liga_id):
+    """Classificação da liga em tempo real (Server-Sent Events)."""
+    if 'user_id' not in session:
+        return "", 401
+
+    # Cada liga subscrita tem uma thread a consultar a BD: só ligas que existem
+    # e só para quem participa nelas
+    try:
+        uuid.UUID(liga_id)
+    except ValueError:
+        return "Liga não encontrada", 404
+    if not obter_liga_por_id(liga_id):
+        return "Liga não encontrada", 404
+    if not verificar_participacao_liga(session['user_id'], liga_id):
+        return "Não participas nesta liga", 403
+
+    # Posições da página que o browser está a mostrar (o resto da liga não é enviado)
+    inicio = request.args.get("inicio", 1, type=int)
+    fim = request.args.get("fim", type=int)
+    if fim is not None:
+        fim = min(fim, inicio + 199)
+
+    keepalive = ranking_stream.ranking_stream_config().keepalive
+    try:
+        fila = ranking_stream.broadcaster.subscrever(liga_id, session['user_id'], inicio, fim)
+    except ranking_stream.ProdutoresEsgotados:
+        # O browser volta a tentar sozinho (EventSource); entretanto a página continua estática
+        return "", 503, {"Retry-After": "30"}
+
+    # O gerador não usa a BD: quem consulta é o produtor da liga, em segundo plano
+    def gerar():
+        try:
+            while True:
+                try:
+                    mensagem = fila.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {mensagem.evento}\ndata: {json.dumps(mensagem.dados, default=str)}\n\n"
+        finally:
+            ranking_stream.broadcaster.cancelar(liga_id, fila)
+
+    return Response(gerar(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 @app.route("/juntar-liga-codigo", methods=['POST'])
 def juntar_liga_codigo():
     codigo = request.form.get("codigo")
@@ -542,7 +686,12 @@ def pontuacao():
     equipa_user = obter_equipa_por_utilizador(user_id)
     if equipa_user:
         try:
-            pontuacoes_jornadas = obter_pontuacoes_jornadas(equipa_user.id)
+            # Pontos ao vivo ainda não gravados (jornada em curso), coerentes com a leitura da BD
+            pontuacoes_jornadas, pendente = live_scoring.ler_com_pendente(
+                equipa_user.id, lambda: obter_pontuacoes_jornadas(equipa_user.id)
+            )
+            if pendente:
+                pontuacoes_jornadas = aplicar_pendente(pontuacoes_jornadas, pendente)
             
             total_pontos = sum(p['pontuacao'] for p in pontuacoes_jornadas if p['pontuacao'])
             media_pontos = total_pontos / len(pontuacoes_jornadas) if pontuacoes_jornadas else 0
@@ -565,6 +714,7 @@ def pontuacao():
 
 
 @app.route("/equipa/<id_equipa>/jornada/<id_jornada>")
+@roundtrip_budget(6)
 def equipa_jornada(id_equipa, id_jornada):
     if 'user_id' not in session:
         return redirect("/")
@@ -704,17 +854,13 @@ def player_details(player_id):
 def jogos_list():
     if 'user_id' not in session:
         return redirect("/")
-    page = int(request.args.get("page", 1))
-    per_page = 10
-
-    matches, total = list_paginated_matches(page, per_page)
-    total_pages = (total + per_page - 1) // per_page
+    pagina = list_paginated_matches(10, request.args.get("depois"), request.args.get("antes"))
 
     return render_template(
         "jogos.html",
-        match=matches,
-        page=page,
-        total_pages=total_pages
+        match=pagina.linhas,
+        pagina=pagina,
+        ttl_contagem=counts_config().ttl,
     )
 
 
@@ -731,6 +877,7 @@ def match_details(match_id):
         return "Jogo não encontrado", 404
 
 @app.route("/liga/<id_liga>/equipa/<id_equipa>")
+@roundtrip_budget(8)
 def ver_equipa_liga(id_liga, id_equipa):
     """
     Rota para ver a equipa de outro participante na liga.
@@ -785,5 +932,42 @@ def ver_equipa_liga(id_liga, id_equipa):
                              details=str(e)), 500
 
 
+@app.route("/live/jogos/<match_id>/eventos", methods=["POST"])
+def live_evento(match_id):
+    """Ingestão de eventos de um jogo em curso (golo, assistência, cartões, substituições)."""
+    config = live.live_config()
+    if not config.enabled:
+        return jsonify({"error": "Live scoring is disabled"}), 404
+
+    if not config.token:
+        return jsonify({"error": "Live scoring requires a token in [live]"}), 503
+    if not secrets.compare_digest(request.headers.get("X-Live-Token", ""), config.token):
+        return jsonify({"error": "Invalid token"}), 403
+
+    dados = request.get_json(silent=True) or {}
+    try:
+        minuto = dados.get("minuto")
+        if minuto is not None and (isinstance(minuto, bool) or not isinstance(minuto, (int, float, str))):
+            raise ValueError(f"Minuto inválido: {minuto!r}")
+        resultado = live_scoring.registar_evento(
+            match_id,
+            dados.get("tipo"),
+            dados.get("jogador"),
+            int(minuto) if minuto is not None else None,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(resultado)
+
+
+@app.route("/metrics")
+def metrics():
+    """Métricas da BD (por instrução SQL e do pool) no formato Prometheus."""
+    if not metrics_allowed(request.remote_addr, request.headers.get("Authorization")):
+        return "Não encontrado", 404
+    return Response(render_prometheus(pool_stats()), mimetype="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0")
\ No newline at end of file
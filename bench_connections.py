@@ -0,0 +1,63 @@
+"""
+Benchmark do custo de conexão por pedido.
+
+Simula um pedido típico (ex: /equipa) que faz várias chamadas à camada de
+persistência, cada uma com a sua própria conexão, e compara:
+- pyodbc.connect direto em cada chamada (comportamento antigo)
+- create_connection() com o pool de conexões
+
+Uso:
+    python bench_connections.py [--requests 50] [--calls 3]
+"""
+
+import argparse
+import time
+
+import pyodbc
+
+from persistence.session import conn_string, create_connection, pool_stats
+
+
+def _pedido_sem_pool(calls: int):
+    for _ in range(calls):
+        conn = pyodbc.connect(conn_string())
+        try:
+            conn.cursor().execute("SELECT 1").fetchone()
+        finally:
+            conn.close()
+
+
+def _pedido_com_pool(calls: int):
+    for _ in range(calls):
+        with create_connection() as conn:
+            conn.cursor().execute("SELECT 1").fetchone()
+
+
+def _medir(nome: str, pedido, requests: int, calls: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(requests):
+        pedido(calls)
+    total = time.perf_counter() - inicio
+
+    por_pedido = total / requests * 1000
+    print(f"{nome:<12} {por_pedido:8.2f} ms/pedido  ({total:.2f}s para {requests} pedidos)")
+    return por_pedido
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Custo de conexão por pedido, com e sem pool")
+    parser.add_argument("--requests", type=int, default=50, help="número de pedidos simulados")
+    parser.add_argument("--calls", type=int, default=3, help="chamadas à BD por pedido")
+    args = parser.parse_args()
+
+    print(f"{args.requests} pedidos x {args.calls} chamadas à BD\n")
+
+    antes = _medir("sem pool", _pedido_sem_pool, args.requests, args.calls)
+    depois = _medir("com pool", _pedido_com_pool, args.requests, args.calls)
+
+    print(f"\nGanho: {antes / depois:.1f}x")
+    print(f"Pool: {pool_stats()}")
+
+
+if __name__ == "__main__":
+    main()
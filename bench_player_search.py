@@ -0,0 +1,85 @@
+"""
+Benchmark da pesquisa de jogadores em memória (persistence/player_search.py).
+
+Constrói o índice sobre um catálogo sintético (nomes com acentos, clubes) e mede
+o tempo de cada pesquisa como numa escrita letra a letra ("m", "mb", "mba", ...),
+com alguns erros de escrita para a correspondência por trigramas. Não usa a BD.
+
+Uso:
+    python bench_player_search.py [--players 20000] [--queries 300] [--limit 10]
+"""
+
+import argparse
+import random
+import statistics
+import time
+from typing import NamedTuple
+
+from persistence.player_search import PlayerSearchIndex
+
+_SILABAS = [
+    "ma", "ro", "li", "sø", "mü", "de", "ga", "an", "to", "ni", "ké", "ba", "pé", "ra", "lo", "vi",
+    "ber", "schi", "ić", "kov", "zal", "ner", "gu", "ele", "sto", "har", "wen", "ja", "dou", "fer", "ño",
+    "bel", "ki", "mou", "rey", "sa", "vo", "bru", "cha", "din", "ez", "fa", "gor", "hu", "ló", "pet",
+]
+
+
+class _Jogador(NamedTuple):
+    id: int
+    nome: str
+
+
+def _palavra(aleatorio: random.Random) -> str:
+    return "".join(aleatorio.choices(_SILABAS, k=aleatorio.randint(2, 4))).capitalize()
+
+
+def _catalogo(jogadores: int, aleatorio: random.Random) -> list[tuple[_Jogador, str]]:
+    clubes = [f"{_palavra(aleatorio)} FC" for _ in range(max(1, jogadores // 40))]
+    return [
+        (_Jogador(i, f"{_palavra(aleatorio)} {_palavra(aleatorio)}"), aleatorio.choice(clubes))
+        for i in range(jogadores)
+    ]
+
+
+def _pesquisas(catalogo, n: int, aleatorio: random.Random) -> list[str]:
+    pesquisas = []
+    for jogador, _ in aleatorio.sample(catalogo, min(n, len(catalogo))):
+        nome = jogador.nome
+        if aleatorio.random() < 0.2:
+            # Erro de escrita: uma letra trocada
+            i = aleatorio.randrange(1, len(nome))
+            nome = nome[:i] + "x" + nome[i + 1:]
+        pesquisas.extend(nome[:k] for k in range(1, len(nome) + 1))
+    return pesquisas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo por pesquisa no índice de jogadores em memória")
+    parser.add_argument("--players", type=int, default=20000, help="jogadores no catálogo sintético")
+    parser.add_argument("--queries", type=int, default=300, help="nomes escritos letra a letra")
+    parser.add_argument("--limit", type=int, default=10, help="resultados por pesquisa")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    aleatorio = random.Random(args.seed)
+    catalogo = _catalogo(args.players, aleatorio)
+
+    inicio = time.perf_counter()
+    indice = PlayerSearchIndex(catalogo)
+    print(f"Índice de {len(indice)} jogadores construído em {time.perf_counter() - inicio:.2f}s")
+
+    pesquisas = _pesquisas(catalogo, args.queries, aleatorio)
+    tempos = []
+    for pesquisa in pesquisas:
+        inicio = time.perf_counter()
+        indice.search(pesquisa, args.limit)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+
+    tempos.sort()
+    percentil = lambda p: tempos[min(len(tempos) - 1, int(len(tempos) * p / 100))]  # noqa: E731
+    print(f"{len(tempos)} pesquisas: média {statistics.mean(tempos):.3f} ms, p50 {percentil(50):.3f} ms, "
+          f"p95 {percentil(95):.3f} ms, p99 {percentil(99):.3f} ms, máx {tempos[-1]:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# persistence/classificacoes.py
+"""
+Reconstrução da classificação geral de todas as ligas (Classificação_Liga).
+
+Em vez de correr sp_ObterRankingLigaComEquipas liga a liga, as ligas são
+divididas em intervalos contíguos de IDs (partições) processados por um
+ProcessPoolExecutor (secção [scoring]). Cada processo lê, na sua própria
+conexão, os participantes e os totais das equipas (Equipa.Pontos) das ligas do
+seu intervalo numa só consulta, ordena cada liga em memória pela mesma ordem do
+ranking geral (pontos e id da equipa) e grava tudo com uma inserção em massa
+numa tabela temporária e um único MERGE. Só os IDs das ligas passam entre
+processos, e as partições nunca tocam nas mesmas linhas.
+
+São reconstruídas também as ligas públicas (país e mundo): entre jornadas os
+totais não mudam, por isso a classificação gravada no fecho da jornada serve
+/ligas e /liga/<id> até ao próximo jogo.
+
+Cada liga reconstruída fica marcada com a versão que tinha antes da leitura
+(Versao_Liga.versao_classificacao). Enquanto a versão da liga não mudar, o
+resumo de /ligas e o leaderboard leem a posição daqui; depois disso voltam a
+calcular a partir dos totais.
+"""
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, NamedTuple, Optional
+
+from persistence.leagues import chave_guid
+from persistence.scoring import particionar, scoring_config
+from persistence.session import create_connection
+
+# Tipo das ligas privadas criadas por CriarLiga
+LIGA_PRIVADA = "LT02"
+
+
+class PosicaoLiga(NamedTuple):
+    id_liga: str
+    posicao: int
+    id_equipa: str
+    pontuacao: int
+
+
+class ResultadoClassificacoes(NamedTuple):
+    ligas: int
+    equipas: int
+    alteradas: int
+    duracao: float
+
+
+# Uma equipa de uma liga: (id_equipa, pontos)
+Participante = tuple[str, int]
+
+
+def carregar_ids_ligas(cursor, tipo_liga: Optional[str] = None) -> list[str]:
+    """IDs das ligas do tipo `tipo_liga` (todas se for None), na ordem do SQL Server."""
+    cursor.execute("""
+        SELECT ID FROM FantasyChamp.Liga
+        WHERE ? IS NULL OR ID_tipoLiga = ?
+        ORDER BY ID
+    """, tipo_liga, tipo_liga)
+    return [str(row.ID) for row in cursor.fetchall()]
+
+
+def carregar_versoes(cursor, tipo_liga: Optional[str], primeira: str, ultima: str) -> dict[str, int]:
+    """Versão atual de cada liga do intervalo [primeira, ultima]."""
+    cursor.execute("""
+        SELECT L.ID, ISNULL(V.versao, 0) AS versao
+        FROM FantasyChamp.Liga L
+        LEFT JOIN FantasyChamp.Versao_Liga V ON V.ID_Liga = L.ID
+        WHERE (? IS NULL OR L.ID_tipoLiga = ?) AND L.ID BETWEEN ? AND ?
+    """, tipo_liga, tipo_liga, primeira, ultima)
+    return {str(row.ID): row.versao for row in cursor.fetchall()}
+
+
+def carregar_participantes(
+    cursor, tipo_liga: Optional[str], primeira: str, ultima: str,
+) -> dict[str, list[Participante]]:
+    """Equipas de cada liga do intervalo [primeira, ultima], numa só consulta."""
+    cursor.execute("""
+        SELECT P.ID_Liga, E.ID AS ID_Equipa, E.Pontos AS pontos
+        FROM FantasyChamp.Participa P
+        JOIN FantasyChamp.Liga L ON L.ID = P.ID_Liga
+        INNER JOIN FantasyChamp.Equipa E ON E.ID_utilizador = P.ID_Utilizador
+        WHERE (? IS NULL OR L.ID_tipoLiga = ?) AND P.ID_Liga BETWEEN ? AND ?
+    """, tipo_liga, tipo_liga, primeira, ultima)
+
+    ligas = defaultdict(list)
+    for row in cursor:
+        ligas[str(row.ID_Liga)].append((str(row.ID_Equipa), row.pontos))
+    return ligas
+
+
+def ordenar_ligas(ligas: dict[str, list[Participante]]) -> list[PosicaoLiga]:
+    """Posições de cada equipa em cada liga (mesma ordem do leaderboard)."""
+    linhas = []
+    for id_liga, equipas in ligas.items():
+        equipas.sort(key=lambda e: (-e[1], chave_guid(e[0])))
+        linhas.extend(
+            PosicaoLiga(id_liga, posicao, id_equipa, pontos)
+            for posicao, (id_equipa, pontos) in enumerate(equipas, start=1)
+        )
+    return linhas
+
+
+def gravar_classificacoes(cursor, linhas: list[PosicaoLiga], versoes: dict[str, int]) -> int:
+    """
+    Substitui a classificação das ligas de `versoes` (id da liga -> versão lida
+    antes dos participantes) por `linhas` e marca-as com essa versão (sem commit).
+    Só as posições que mudaram são escritas. Devolve as linhas alteradas.
+    """
+    cursor.execute("""
+        CREATE TABLE #ClassificacaoNova (
+            ID_Liga UNIQUEIDENTIFIER NOT NULL,
+            posicao INT NOT NULL,
+            ID_Equipa UNIQUEIDENTIFIER NOT NULL,
+            pontuação INT NOT NULL,
+            PRIMARY KEY (ID_Liga, posicao)
+        );
+        CREATE TABLE #LigasReconstruidas (
+            ID_Liga UNIQUEIDENTIFIER NOT NULL PRIMARY KEY,
+            versao BIGINT NOT NULL
+        );
+    """)
+
+    try:
+        cursor.fast_executemany = True
+        if versoes:
+            cursor.executemany(
+                "INSERT INTO #LigasReconstruidas (ID_Liga, versao) VALUES (?, ?)", list(versoes.items())
+            )
+        if linhas:
+            cursor.executemany("""
+                INSERT INTO #ClassificacaoNova (ID_Liga, posicao, ID_Equipa, pontuação)
+                VALUES (?, ?, ?, ?)
+            """, linhas)
+
+        # Ligas que ficaram sem equipas também perdem as posições antigas
+        cursor.execute("""
+            MERGE FantasyChamp.Classificação_Liga AS T
+            USING #ClassificacaoNova AS S
+                ON T.ID_Liga = S.ID_Liga AND T.posicao = S.posicao
+            WHEN MATCHED AND (T.ID_Equipa <> S.ID_Equipa OR T.pontuação <> S.pontuação) THEN
+                UPDATE SET ID_Equipa = S.ID_Equipa, pontuação = S.pontuação
+            WHEN NOT MATCHED BY TARGET THEN
+                INSERT (ID_Liga, posicao, ID_Equipa, pontuação)
+                VALUES (S.ID_Liga, S.posicao, S.ID_Equipa, S.pontuação)
+            WHEN NOT MATCHED BY SOURCE
+                AND T.ID_Liga IN (SELECT ID_Liga FROM #LigasReconstruidas) THEN
+                DELETE;
+        """)
+        alteradas = cursor.rowcount
+
+        # Versão da liga a que esta classificação corresponde
+        cursor.execute("""
+            MERGE FantasyChamp.Versao_Liga AS T
+            USING #LigasReconstruidas AS S
+                ON T.ID_Liga = S.ID_Liga
+            WHEN MATCHED THEN UPDATE SET versao_classificacao = S.versao
+            WHEN NOT MATCHED THEN
+                INSERT (ID_Liga, versao, versao_classificacao) VALUES (S.ID_Liga, S.versao, S.versao);
+        """)
+        return alteradas
+    finally:
+        cursor.fast_executemany = False
+        cursor.execute("DROP TABLE #ClassificacaoNova; DROP TABLE #LigasReconstruidas;")
+
+
+def _reconstruir_particao(tipo_liga: Optional[str], primeira: str, ultima: str) -> tuple[int, int, int]:
+    # Corre num processo filho, com o seu próprio pool e conexão; cada partição
+    # é uma transação. As versões são lidas antes dos participantes: uma alteração
+    # pelo meio deixa a liga com uma versão mais recente e a classificação fica por usar
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        versoes = carregar_versoes(cursor, tipo_liga, primeira, ultima)
+        linhas = ordenar_ligas(carregar_participantes(cursor, tipo_liga, primeira, ultima))
+        alteradas = gravar_classificacoes(cursor, linhas, versoes)
+        conn.commit()
+    return len(versoes), len(linhas), alteradas
+
+
+def reconstruir_classificacoes(
+    tipo_liga: Optional[str] = None,
+    workers: Optional[int] = None,
+    progresso: Callable[[str], None] = print,
+) -> ResultadoClassificacoes:
+    """
+    Reconstrói Classificação_Liga das ligas do tipo `tipo_liga` (por omissão
+    todas), uma transação por partição. Com um só processo as partições correm
+    aqui, sem ProcessPoolExecutor. Se alguma falhar, as outras ficam gravadas e
+    é levantado RuntimeError no fim (a reconstrução pode ser repetida).
+    """
+    config = scoring_config()
+    workers = workers or config.workers or os.cpu_count() or 1
+    inicio = time.perf_counter()
+
+    with create_connection() as conn:
+        ids_ligas = carregar_ids_ligas(conn.cursor(), tipo_liga)
+
+    # Intervalos [primeira, ultima] na ordem do SQL Server (a de ids_ligas)
+    particoes = [
+        (tipo_liga, p[0], p[-1])
+        for p in particionar(ids_ligas, 1 if workers == 1 else workers * config.partitions_per_worker)
+    ]
+    ligas = equipas = alteradas = 0
+    falhadas = []
+
+    def concluida(n: int, resultado: tuple[int, int, int]):
+        nonlocal ligas, equipas, alteradas
+        ligas += resultado[0]
+        equipas += resultado[1]
+        alteradas += resultado[2]
+        progresso(f"[{n}/{len(particoes)}] {ligas}/{len(ids_ligas)} ligas, {equipas} posições "
+                  f"em {time.perf_counter() - inicio:.2f}s")
+
+    if workers == 1 or len(particoes) <= 1:
+        for n, particao in enumerate(particoes, start=1):
+            concluida(n, _reconstruir_particao(*particao))
+    else:
+        # "spawn": os filhos não herdam o pool (nem os sockets) do processo pai
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=contexto) as executor:
+            futuros = {executor.submit(_reconstruir_particao, *p): p for p in particoes}
+            for n, futuro in enumerate(as_completed(futuros), start=1):
+                try:
+                    concluida(n, futuro.result())
+                except Exception as e:
+                    falhadas.append(futuros[futuro])
+                    progresso(f"[{n}/{len(particoes)}] partição falhou: {e}")
+
+    duracao = time.perf_counter() - inicio
+    if falhadas:
+        raise RuntimeError(f"{len(falhadas)} de {len(particoes)} partições de ligas por reconstruir")
+
+    progresso(f"Classificações reconstruídas: {ligas} ligas, {equipas} posições, "
+              f"{alteradas} alteradas em {duracao:.2f}s")
+    return ResultadoClassificacoes(ligas, equipas, alteradas, duracao)
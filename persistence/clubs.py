@@ -1,12 +1,15 @@
 import pyodbc
+from persistence.contagens import CacheContagens, contar_listagem
+from persistence.paginacao import Pagina, pagina_keyset
 from persistence.session import create_connection
 
 DEFAULT_IMAGE = "/static/images/Image-not-found.png"
 
-def list_all_clubs():
-    conn = create_connection()
-    cursor = conn.cursor()
+# Número de clubes da listagem paginada; a tabela só é escrita pelo populate_db.py
+# (outro processo), por isso a contagem é renovada pelo ttl de [counts]
+_club_counts = CacheContagens()
 
+def list_all_clubs():
     query = """
         SELECT ID,
                Nome,
@@ -17,8 +20,10 @@ def list_all_clubs():
         ORDER BY Nome
     """
 
-    cursor.execute(query)
-    rows = cursor.fetchall()
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query)
+        rows = cursor.fetchall()
 
     clubes = []
     for row in rows:
@@ -38,9 +43,6 @@ def list_all_clubs():
 
 
 def read_club(club_id):
-    conn = create_connection()
-    cursor = conn.cursor()
-
     # ---- info do clube (usando VIEW) ----
     query_club = """
         SELECT ID,
@@ -52,15 +54,6 @@ def read_club(club_id):
         WHERE ID = ?
     """
 
-    cursor.execute(query_club, club_id)
-    row = cursor.fetchone()
-
-    if not row:
-        return None
-
-    club_image = row.clube_imagem if row.clube_imagem else DEFAULT_IMAGE
-    pais_image = row.Pais_Imagem if row.Pais_Imagem else DEFAULT_IMAGE
-
     # ---- jogadores deste clube ----
     query_players = """
         SELECT J.ID,
@@ -74,8 +67,20 @@ def read_club(club_id):
         ORDER BY J.Nome
     """
 
-    cursor.execute(query_players, club_id)
-    players_rows = cursor.fetchall()
+    with create_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute(query_club, club_id)
+        row = cursor.fetchone()
+
+        if not row:
+            return None
+
+        cursor.execute(query_players, club_id)
+        players_rows = cursor.fetchall()
+
+    club_image = row.clube_imagem if row.clube_imagem else DEFAULT_IMAGE
+    pais_image = row.Pais_Imagem if row.Pais_Imagem else DEFAULT_IMAGE
 
     jogadores = []
     for p in players_rows:
@@ -98,31 +103,29 @@ def read_club(club_id):
         "jogadores": jogadores
     }
 
-def list_paginated_clubs(page: int, per_page: int):
-    offset = (page - 1) * per_page
-    
+def list_paginated_clubs(per_page: int, depois=None, antes=None) -> Pagina:
+    """Página de clubes por nome, a seguir (ou antes) de um cursor (Nome, ID)."""
     with create_connection() as conn:
         cursor = conn.cursor()
 
-        # Total
-        cursor.execute("SELECT COUNT(*) FROM FantasyChamp.ClubDetails")
-        total = cursor.fetchone()[0]
-
-        # Dados paginados
-        cursor.execute("""
-            SELECT ID, Nome, Pais_Nome, Pais_Imagem, clube_imagem
-            FROM FantasyChamp.ClubDetails
-            ORDER BY Nome
-            OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
-        """, (offset, per_page))
-        
-        # Processamento com list comprehension
-        clubes = [{
-            "id": row.ID,
-            "nome": row.Nome,
-            "pais": row.Pais_Nome,
-            "pais_imagem": row.Pais_Imagem or DEFAULT_IMAGE,
-            "imagem": row.clube_imagem or DEFAULT_IMAGE
-        } for row in cursor.fetchall()]
-
-        return clubes, total
\ No newline at end of file
+        # Total em cache (ver persistence/contagens.py)
+        total, aproximado = contar_listagem(_club_counts, cursor, "FantasyChamp.ClubDetails", "FantasyChamp.Clube")
+
+        return pagina_keyset(
+            cursor,
+            "FantasyChamp.ClubDetails",
+            "ID, Nome, Pais_Nome, Pais_Imagem, clube_imagem",
+            ("Nome", "ID"),
+            per_page,
+            depois,
+            antes,
+            converter=lambda row: {
+                "id": row.ID,
+                "nome": row.Nome,
+                "pais": row.Pais_Nome,
+                "pais_imagem": row.Pais_Imagem or DEFAULT_IMAGE,
+                "imagem": row.clube_imagem or DEFAULT_IMAGE
+            },
+            total=total,
+            aproximado=aproximado,
+        )
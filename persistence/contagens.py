@@ -0,0 +1,123 @@
+# persistence/contagens.py
+"""
+Cache de contagens (número de linhas de uma listagem) por chave.
+
+Um COUNT(*) sobre uma liga ou uma tabela grande custa tanto como ler a lista;
+como o número só muda quando há inserções/remoções, fica em cache até ser
+invalidado por quem altera os dados (p.ex. juntar/abandonar uma liga) ou até
+passar `ttl` segundos, para apanhar alterações feitas por outros processos.
+
+Com `approximate = true` as listagens que o permitem contam a tabela base pelos
+metadados (sys.dm_db_partition_stats) em vez de um COUNT(*) sobre a view; o
+total é então mostrado como aproximado. Requer a permissão VIEW DATABASE STATE;
+sem ela a contagem volta a ser exata.
+
+Configuração (secção opcional [counts] do conf.ini):
+    ttl = 60                ; segundos
+    approximate = false     ; totais aproximados nas listagens
+"""
+import functools
+import logging
+import threading
+import time
+from typing import Callable, Hashable, NamedTuple, Optional, TypeVar
+
+import pyodbc
+
+from persistence.session import config_section
+
+logger = logging.getLogger("fantasychamp.contagens")
+
+T = TypeVar("T")
+
+
+class CountsConfig(NamedTuple):
+    ttl: float = 60.0
+    approximate: bool = False
+
+
+@functools.cache
+def counts_config() -> CountsConfig:
+    section = config_section("counts")
+    defaults = CountsConfig()
+    if section is None:
+        return defaults
+
+    return CountsConfig(
+        ttl=section.getfloat("ttl", defaults.ttl),
+        approximate=section.getboolean("approximate", defaults.approximate),
+    )
+
+
+class CacheContagens:
+    def __init__(self, ttl: Optional[float] = None):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._valores: dict[Hashable, tuple[object, float]] = {}
+        self._geracao = 0     # muda a cada invalidação: contagens feitas antes não são guardadas
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl if self._ttl is not None else counts_config().ttl
+
+    def obter(self, chave: Hashable, contar: Callable[[], T]) -> T:
+        agora = time.monotonic()
+        with self._lock:
+            guardado = self._valores.get(chave)
+            geracao = self._geracao
+        if guardado is not None and agora - guardado[1] < self.ttl:
+            return guardado[0]
+
+        valor = contar()
+        with self._lock:
+            if self._geracao == geracao:
+                self._valores[chave] = (valor, agora)
+        return valor
+
+    def invalidar(self, chave: Optional[Hashable] = None):
+        with self._lock:
+            self._geracao += 1
+            if chave is None:
+                self._valores.clear()
+            else:
+                self._valores.pop(chave, None)
+
+
+def contagem_aproximada(cursor, tabela: str) -> Optional[int]:
+    """Linhas de `tabela` segundo os metadados, sem a ler; None se não houver permissão."""
+    try:
+        cursor.execute("""
+            SELECT SUM(row_count)
+            FROM sys.dm_db_partition_stats
+            WHERE object_id = OBJECT_ID(?) AND index_id IN (0, 1)
+        """, tabela)
+        row = cursor.fetchone()
+    except pyodbc.Error:
+        logger.warning("Sem acesso a sys.dm_db_partition_stats; contagem exata de %s", tabela)
+        return None
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def contar_listagem(
+    cache: CacheContagens,
+    cursor,
+    origem: str,
+    tabela_base: Optional[str] = None,
+    filtros: Hashable = (),
+) -> tuple[int, bool]:
+    """
+    (total, aproximado) de uma listagem de `origem`, em cache por combinação de
+    filtros. Só é aproximado se a configuração o pedir, houver `tabela_base` e
+    os metadados puderem ser lidos; se não, o total é um COUNT(*) exato.
+    """
+    pedir_aproximado = tabela_base is not None and counts_config().approximate
+
+    def contar() -> tuple[int, bool]:
+        if pedir_aproximado:
+            total = contagem_aproximada(cursor, tabela_base)
+            if total is not None:
+                return total, True
+        cursor.execute(f"SELECT COUNT(*) FROM {origem}")
+        return cursor.fetchone()[0], False
+
+    return cache.obter((filtros, pedir_aproximado), contar)
@@ -0,0 +1,162 @@
+# persistence/histograma.py
+"""
+Sketch da distribuição dos pontos das equipas de uma liga.
+
+Os pontos são agrupados em baldes de `largura` pontos (pontos // largura ->
+número de equipas). Enquanto houver no máximo `max_baldes` valores distintos a
+largura é 1 e o histograma é exato; acima disso a largura duplica e os baldes
+vizinhos juntam-se, por isso a memória fica limitada e o erro também: um
+percentil fica no máximo `largura - 1` pontos abaixo do valor exato e
+"equipas acima" só não conta as equipas do mesmo balde.
+
+É atualizado incrementalmente (adicionar/remover a cada mudança de total) e dois
+sketches fundem-se somando as contagens depois de igualar as larguras, por isso
+partições calculadas em separado juntam-se sem reler as equipas. As contagens
+exatas de cada liga são mantidas na BD pelos triggers
+(queries/table_HistogramaLiga.sql) e usadas quando não há leaderboard em memória.
+"""
+import bisect
+from itertools import accumulate
+from typing import Iterable, NamedTuple, Optional
+
+# Valores distintos guardados antes de alargar os baldes
+MAX_BALDES = 1024
+
+
+class Intervalo(NamedTuple):
+    minimo: int
+    maximo: int
+    equipas: int
+
+
+class Histograma:
+    def __init__(self, contagens: Optional[dict[int, int]] = None, max_baldes: int = MAX_BALDES):
+        self.max_baldes = max(2, max_baldes)     # com pontos negativos, os baldes param em -1 e 0
+        self.largura = 1
+        self._contagens: dict[int, int] = {}     # balde -> equipas
+        self._total = 0
+        self._ordenado = None     # (baldes ordenados, somas de prefixo), refeito após alterações
+        for pontos, n in (contagens or {}).items():
+            self.adicionar(pontos, n)
+
+    @classmethod
+    def de_pontos(cls, pontos: Iterable[int], max_baldes: int = MAX_BALDES) -> "Histograma":
+        histograma = cls(max_baldes=max_baldes)
+        for p in pontos:
+            histograma.adicionar(p)
+        return histograma
+
+    def copia(self) -> "Histograma":
+        copia = Histograma(max_baldes=self.max_baldes)
+        copia.largura = self.largura
+        copia._contagens = dict(self._contagens)
+        copia._total = self._total
+        return copia
+
+    # Atualização
+
+    def _somar(self, balde: int, n: int):
+        contagem = self._contagens.get(balde, 0) + n
+        if contagem < 0:
+            raise ValueError(f"Contagem negativa para {balde * self.largura} pontos")
+        if contagem:
+            self._contagens[balde] = contagem
+        else:
+            del self._contagens[balde]
+        self._total += n
+        self._ordenado = None
+
+    def _alargar(self, largura: int):
+        """Junta os baldes até terem `largura` pontos (uma potência de 2 >= a atual)."""
+        while self.largura < largura or len(self._contagens) > self.max_baldes:
+            juntos: dict[int, int] = {}
+            for balde, n in self._contagens.items():
+                juntos[balde // 2] = juntos.get(balde // 2, 0) + n
+            self._contagens = juntos
+            self.largura *= 2
+            self._ordenado = None
+
+    def adicionar(self, pontos: int, n: int = 1):
+        if not n:
+            return
+        # pontos // (2 * largura) == (pontos // largura) // 2, por isso remover depois
+        # de alargar acerta sempre no balde onde os pontos foram somados
+        self._somar(pontos // self.largura, n)
+        if len(self._contagens) > self.max_baldes:
+            self._alargar(self.largura)
+
+    def remover(self, pontos: int, n: int = 1):
+        self.adicionar(pontos, -n)
+
+    def fundir(self, outro: "Histograma") -> "Histograma":
+        if outro.largura > self.largura:
+            self._alargar(outro.largura)
+        fator = self.largura // outro.largura
+        for balde, n in outro._contagens.items():
+            self._somar(balde // fator, n)
+        if len(self._contagens) > self.max_baldes:
+            self._alargar(self.largura)
+        return self
+
+    def __add__(self, outro: "Histograma") -> "Histograma":
+        return self.copia().fundir(outro)
+
+    # Consultas
+
+    def __len__(self) -> int:
+        return self._total
+
+    @property
+    def exato(self) -> bool:
+        return self.largura == 1
+
+    def contagens(self) -> dict[int, int]:
+        """Início de cada balde (em pontos) -> equipas."""
+        return {balde * self.largura: n for balde, n in self._contagens.items()}
+
+    def _indice(self):
+        if self._ordenado is None:
+            baldes = sorted(self._contagens)
+            self._ordenado = (baldes, list(accumulate(self._contagens[b] for b in baldes)))
+        return self._ordenado
+
+    def acima(self, pontos: int) -> int:
+        """Equipas com mais pontos do que `pontos` (sem as do mesmo balde)."""
+        baldes, somas = self._indice()
+        i = bisect.bisect_right(baldes, pontos // self.largura)
+        return self._total - (somas[i - 1] if i else 0)
+
+    def percentagem_topo(self, pontos: int) -> Optional[float]:
+        """Com `pontos`, a equipa está no top X% (melhor posição possível entre empatados)."""
+        if not self._total:
+            return None
+        return 100.0 * (self.acima(pontos) + 1) / self._total
+
+    def percentil(self, p: float) -> Optional[int]:
+        """
+        Menor pontuação com pelo menos p% das equipas abaixo ou igual (0 < p <= 100);
+        com baldes largos, o início do balde onde essa pontuação está.
+        """
+        if not self._total:
+            return None
+        baldes, somas = self._indice()
+        alvo = max(1, -(-self._total * p // 100))
+        return baldes[min(bisect.bisect_left(somas, alvo), len(baldes) - 1)] * self.largura
+
+    def intervalos(self, n: int = 10) -> list[Intervalo]:
+        """`n` intervalos de pontos da mesma largura (múltipla da dos baldes) entre o mínimo e o máximo."""
+        baldes, somas = self._indice()
+        if not baldes:
+            return []
+        minimo, maximo = baldes[0] * self.largura, (baldes[-1] + 1) * self.largura - 1
+        por_intervalo = -(-(maximo - minimo + 1) // n)
+        largura = max(1, -(-por_intervalo // self.largura)) * self.largura
+
+        resultado = []
+        for inicio in range(minimo, maximo + 1, largura):
+            fim = min(inicio + largura - 1, maximo)
+            a = bisect.bisect_left(baldes, inicio // self.largura)
+            b = bisect.bisect_right(baldes, fim // self.largura)
+            equipas = (somas[b - 1] if b else 0) - (somas[a - 1] if a else 0)
+            resultado.append(Intervalo(inicio, fim, equipas))
+        return resultado
@@ -0,0 +1,437 @@
+# persistence/leaderboard.py
+"""
+Classificação de cada liga mantida em memória, sem reordenar a liga a cada pedido.
+
+As equipas ficam numa lista ordenada por (-pontos, id da equipa), a mesma ordem
+de sp_ObterRankingLigaComEquipas (o id é comparado como UNIQUEIDENTIFIER, ver
+leagues.chave_guid). A lista está dividida
+em blocos ordenados e uma Fenwick tree guarda o tamanho de cada bloco, por isso
+"posição da equipa X", "top K" e "página N" são uma pesquisa binária mais uma
+descida na árvore, em vez de agrupar e ordenar todos os participantes.
+
+Quando as pontuações mudam (versão da liga em Versao_Liga, verificada no
+máximo de `refresh_interval` em `refresh_interval` segundos) os
+totais são relidos e só as equipas cujo total mudou são reposicionadas. Se a
+liga não mudou desde a última reconstrução de Classificação_Liga
+(persistence/classificacoes.py), os totais são lidos já ordenados dessa tabela. O
+histograma de pontos da liga (percentis, "top X%") é atualizado ao mesmo tempo.
+
+Só os leaderboards das `max_leagues` ligas usadas mais recentemente ficam em
+memória; as outras são recarregadas da BD quando voltarem a ser pedidas.
+
+Configuração (secção opcional [leaderboard] do conf.ini):
+    refresh_interval = 5    ; segundos entre verificações da BD
+    max_leagues = 200       ; ligas mantidas em memória
+"""
+import bisect
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, NamedTuple, Optional
+
+from persistence.histograma import Histograma
+from persistence.leagues import (
+    EquipaRanking,
+    PaginaRanking,
+    ResumoLiga,
+    chave_guid,
+    ler_cursor_ranking,
+    montar_pagina_ranking,
+    obter_classificacao_liga,
+    obter_histograma_liga,
+    obter_totais_liga,
+    obter_versao_pontuacoes_liga,
+)
+from persistence.session import config_section
+
+
+class LeaderboardConfig(NamedTuple):
+    refresh_interval: float = 5.0
+    max_leagues: int = 200
+
+
+@functools.cache
+def leaderboard_config() -> LeaderboardConfig:
+    section = config_section("leaderboard")
+    defaults = LeaderboardConfig()
+    if section is None:
+        return defaults
+
+    return LeaderboardConfig(
+        refresh_interval=section.getfloat("refresh_interval", defaults.refresh_interval),
+        max_leagues=section.getint("max_leagues", defaults.max_leagues),
+    )
+
+
+# --- LISTA ORDENADA COM ESTATÍSTICAS DE ORDEM ---
+
+class _Fenwick:
+    """Somas de prefixo dos tamanhos dos blocos."""
+
+    def __init__(self, tamanhos: list[int]):
+        self._arvore = [0] + list(tamanhos)
+        n = len(self._arvore)
+        for i in range(1, n):
+            pai = i + (i & -i)
+            if pai < n:
+                self._arvore[pai] += self._arvore[i]
+
+    def adicionar(self, i: int, delta: int):
+        i += 1
+        while i < len(self._arvore):
+            self._arvore[i] += delta
+            i += i & -i
+
+    def prefixo(self, i: int) -> int:
+        """Soma dos tamanhos dos blocos [0, i)."""
+        total = 0
+        while i > 0:
+            total += self._arvore[i]
+            i -= i & -i
+        return total
+
+    def procurar(self, k: int) -> tuple[int, int]:
+        """Bloco que contém o k-ésimo elemento (base 0) e a posição dentro dele."""
+        i = 0
+        passo = 1 << (len(self._arvore).bit_length() - 1)
+        while passo:
+            seguinte = i + passo
+            if seguinte < len(self._arvore) and self._arvore[seguinte] <= k:
+                i = seguinte
+                k -= self._arvore[seguinte]
+            passo >>= 1
+        return i, k
+
+
+class ListaOrdenada:
+    """Lista ordenada em blocos com posição e acesso por índice em tempo logarítmico."""
+
+    CARGA = 512
+
+    def __init__(self, chaves: Iterable = ()):
+        chaves = sorted(chaves)
+        self._blocos = [chaves[i:i + self.CARGA] for i in range(0, len(chaves), self.CARGA)]
+        self._reconstruir()
+
+    def _reconstruir(self):
+        self._maximos = [bloco[-1] for bloco in self._blocos]
+        self._tamanhos = _Fenwick([len(bloco) for bloco in self._blocos])
+        self._len = sum(len(bloco) for bloco in self._blocos)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def adicionar(self, chave):
+        if not self._blocos:
+            self._blocos = [[chave]]
+            self._reconstruir()
+            return
+
+        i = min(bisect.bisect_left(self._maximos, chave), len(self._blocos) - 1)
+        bloco = self._blocos[i]
+        bisect.insort(bloco, chave)
+        self._maximos[i] = bloco[-1]
+        self._tamanhos.adicionar(i, 1)
+        self._len += 1
+
+        if len(bloco) > 2 * self.CARGA:
+            self._blocos[i:i + 1] = [bloco[:self.CARGA], bloco[self.CARGA:]]
+            self._reconstruir()
+
+    def remover(self, chave):
+        i = bisect.bisect_left(self._maximos, chave)
+        if i == len(self._blocos):
+            raise KeyError(chave)
+        bloco = self._blocos[i]
+        j = bisect.bisect_left(bloco, chave)
+        if j == len(bloco) or bloco[j] != chave:
+            raise KeyError(chave)
+
+        del bloco[j]
+        self._len -= 1
+        if not bloco:
+            del self._blocos[i]
+            self._reconstruir()
+        else:
+            self._maximos[i] = bloco[-1]
+            self._tamanhos.adicionar(i, -1)
+
+    def indice(self, chave) -> int:
+        """Número de chaves menores do que `chave`."""
+        i = bisect.bisect_left(self._maximos, chave)
+        if i == len(self._blocos):
+            return self._len
+        return self._tamanhos.prefixo(i) + bisect.bisect_left(self._blocos[i], chave)
+
+    def __getitem__(self, k: int):
+        if not 0 <= k < self._len:
+            raise IndexError(k)
+        i, j = self._tamanhos.procurar(k)
+        return self._blocos[i][j]
+
+    def fatia(self, inicio: int, fim: int) -> list:
+        inicio, fim = max(0, inicio), min(fim, self._len)
+        if inicio >= fim:
+            return []
+        i, j = self._tamanhos.procurar(inicio)
+        resultado = []
+        while len(resultado) < fim - inicio:
+            bloco = self._blocos[i]
+            resultado.extend(bloco[j:j + (fim - inicio - len(resultado))])
+            i, j = i + 1, 0
+        return resultado
+
+
+# --- LEADERBOARD DE UMA LIGA ---
+
+def chave_ranking(equipa: EquipaRanking) -> tuple:
+    # Mesma ordem do SP (pontos DESC, id da equipa); o último elemento é o id tal como está
+    return (-equipa.pontuacao_acumulada, chave_guid(equipa.id_equipa), equipa.id_equipa)
+
+
+def _chave_cursor(cursor: tuple) -> tuple:
+    pontos, id_equipa = cursor
+    return (-pontos, chave_guid(id_equipa), id_equipa)
+
+
+class Leaderboard:
+    def __init__(self, id_liga: str):
+        self.id_liga = id_liga
+        self._lock = threading.Lock()
+        # Uma só leitura da BD de cada vez por liga; as consultas usam só _lock
+        self._carga = threading.Lock()
+        self._equipas: dict[str, EquipaRanking] = {}
+        self._chaves: dict[str, tuple] = {}
+        self._por_utilizador: dict[str, str] = {}
+        self.histograma = Histograma()
+        self._ordem = ListaOrdenada()
+        self._versao = None
+        self._verificado_em = None
+
+    # Atualização
+
+    def carregar(self, equipas: Iterable[EquipaRanking]) -> int:
+        """Aplica os totais atuais; só as equipas que mudaram são reposicionadas."""
+        novas = {e.id_equipa: e for e in equipas}
+        alteradas = 0
+
+        with self._lock:
+            if not self._equipas:
+                # Primeira carga: ordenar tudo de uma vez
+                self._chaves = {i: chave_ranking(e) for i, e in novas.items()}
+                self._ordem = ListaOrdenada(self._chaves.values())
+                self._equipas = novas
+                self._por_utilizador = {e.id_utilizador: i for i, e in novas.items()}
+                self.histograma = Histograma.de_pontos(e.pontuacao_acumulada for e in novas.values())
+                return len(novas)
+
+            for id_equipa in [i for i in self._equipas if i not in novas]:
+                self._ordem.remover(self._chaves.pop(id_equipa))
+                antiga = self._equipas.pop(id_equipa)
+                self.histograma.remover(antiga.pontuacao_acumulada)
+                if self._por_utilizador.get(antiga.id_utilizador) == id_equipa:
+                    del self._por_utilizador[antiga.id_utilizador]
+                alteradas += 1
+
+            for id_equipa, equipa in novas.items():
+                anterior = self._equipas.get(id_equipa)
+                if anterior is not None and anterior.pontuacao_acumulada == equipa.pontuacao_acumulada:
+                    # Mesma posição na ordem: só os dados mostrados podem ter mudado
+                    # (p.ex. `posicao` lida de Classificação_Liga e 0 nos totais)
+                    if anterior != equipa:
+                        self._equipas[id_equipa] = equipa
+                        self._por_utilizador[equipa.id_utilizador] = id_equipa
+                    continue
+                if anterior is not None:
+                    self.histograma.remover(anterior.pontuacao_acumulada)
+                self.histograma.adicionar(equipa.pontuacao_acumulada)
+                chave = chave_ranking(equipa)
+                antiga = self._chaves.get(id_equipa)
+                if antiga != chave:
+                    if antiga is not None:
+                        self._ordem.remover(antiga)
+                    self._ordem.adicionar(chave)
+                    self._chaves[id_equipa] = chave
+                self._equipas[id_equipa] = equipa
+                self._por_utilizador[equipa.id_utilizador] = id_equipa
+                alteradas += 1
+
+        return alteradas
+
+    def refrescar(self, forcar: bool = False) -> bool:
+        """
+        Relê os totais se as pontuações da liga mudaram. Devolve True se mudaram.
+        Com `forcar` verifica já, mesmo dentro de `refresh_interval`.
+        """
+        intervalo = leaderboard_config().refresh_interval
+        if not forcar and self._recente(intervalo):
+            return False
+
+        with self._carga:
+            # Outra thread pode ter acabado de verificar enquanto esta esperava
+            if not forcar and self._recente(intervalo):
+                return False
+            self._verificado_em = time.monotonic()
+
+            versao = obter_versao_pontuacoes_liga(self.id_liga)
+            if versao == self._versao:
+                return False
+
+            # Com a classificação gravada ainda atual, as equipas já vêm ordenadas
+            equipas = obter_classificacao_liga(self.id_liga) or obter_totais_liga(self.id_liga)
+            self.carregar(equipas)
+            self._versao = versao
+            return True
+
+    def _recente(self, intervalo: float) -> bool:
+        verificado_em = self._verificado_em
+        return verificado_em is not None and time.monotonic() - verificado_em < intervalo
+
+    # Consultas
+
+    def _linha(self, indice: int, chave: tuple) -> EquipaRanking:
+        return self._equipas[chave[2]]._replace(posicao=indice + 1)
+
+    def __len__(self) -> int:
+        return len(self._ordem)
+
+    def equipa_de(self, id_utilizador: str) -> Optional[EquipaRanking]:
+        """Linha da equipa de um utilizador, com a posição atual."""
+        with self._lock:
+            id_equipa = self._por_utilizador.get(id_utilizador)
+            if id_equipa is None:
+                return None
+            chave = self._chaves[id_equipa]
+            return self._linha(self._ordem.indice(chave), chave)
+
+    def posicao(self, id_equipa: str) -> Optional[int]:
+        """Posição (base 1) de uma equipa, ou None se não estiver na liga."""
+        with self._lock:
+            chave = self._chaves.get(id_equipa)
+            return None if chave is None else self._ordem.indice(chave) + 1
+
+    def _intervalo(self, inicio: int, fim: int) -> list[EquipaRanking]:
+        inicio = max(0, inicio)
+        return [self._linha(inicio + i, chave) for i, chave in enumerate(self._ordem.fatia(inicio, fim))]
+
+    def intervalo(self, inicio: int, fim: int) -> list[EquipaRanking]:
+        """Linhas nas posições [inicio, fim) em base 0."""
+        with self._lock:
+            return self._intervalo(inicio, fim)
+
+    def top(self, k: int) -> list[EquipaRanking]:
+        return self.intervalo(0, k)
+
+    def pagina(self, numero: int, tamanho: int) -> list[EquipaRanking]:
+        """Página `numero` (base 1) com `tamanho` linhas."""
+        return self.intervalo((numero - 1) * tamanho, numero * tamanho)
+
+    def todas(self) -> list[EquipaRanking]:
+        return self.intervalo(0, len(self._ordem))
+
+    def pagina_cursor(
+        self,
+        tamanho: int,
+        depois: Optional[str] = None,
+        antes: Optional[str] = None,
+        em_volta_de: Optional[str] = None,
+    ) -> PaginaRanking:
+        """
+        Página de `tamanho` linhas a seguir ao cursor `depois`, antes do cursor
+        `antes`, ou centrada na equipa do utilizador `em_volta_de`; sem nenhum,
+        a primeira página.
+        """
+        chave_depois, chave_antes = ler_cursor_ranking(depois), ler_cursor_ranking(antes)
+
+        with self._lock:
+            total = len(self._ordem)
+            id_equipa = self._por_utilizador.get(em_volta_de) if em_volta_de is not None else None
+
+            if id_equipa is not None:
+                i = self._ordem.indice(self._chaves[id_equipa])
+                inicio = max(0, min(i - tamanho // 2, total - tamanho))
+                fim = inicio + tamanho
+            elif chave_depois is not None:
+                chave = _chave_cursor(chave_depois)
+                inicio = self._ordem.indice(chave)
+                if inicio < total and self._ordem[inicio] == chave:
+                    inicio += 1
+                fim = inicio + tamanho
+            elif chave_antes is not None:
+                fim = self._ordem.indice(_chave_cursor(chave_antes))
+                inicio = max(0, fim - tamanho)
+            else:
+                inicio, fim = 0, tamanho
+
+            return montar_pagina_ranking(self._intervalo(inicio, fim), total)
+
+
+# --- CACHE POR LIGA ---
+
+_lock = threading.Lock()
+_leaderboards: "OrderedDict[str, Leaderboard]" = OrderedDict()     # do menos para o mais recente
+
+
+def obter_leaderboard(id_liga: str) -> Leaderboard:
+    """Leaderboard da liga, criado na primeira utilização e atualizado se as pontuações mudaram."""
+    with _lock:
+        board = _leaderboards.get(id_liga)
+        if board is None:
+            board = _leaderboards[id_liga] = Leaderboard(id_liga)
+            # Sai a liga usada há mais tempo
+            while len(_leaderboards) > max(1, leaderboard_config().max_leagues):
+                _leaderboards.popitem(last=False)
+        else:
+            _leaderboards.move_to_end(id_liga)
+    board.refrescar()
+    return board
+
+
+def invalidar(id_liga: Optional[str] = None):
+    """Obriga a próxima leitura a verificar a BD (p.ex. depois de juntar/abandonar uma liga)."""
+    with _lock:
+        boards = list(_leaderboards.values()) if id_liga is None else \
+            [b for b in (_leaderboards.get(id_liga),) if b is not None]
+    for board in boards:
+        board._verificado_em = None
+
+
+def leaderboard_em_memoria(id_liga: str) -> Optional[Leaderboard]:
+    """Leaderboard da liga se já estiver em memória (atualizado), sem o carregar da BD."""
+    with _lock:
+        board = _leaderboards.get(id_liga)
+        if board is None:
+            return None
+        _leaderboards.move_to_end(id_liga)
+    board.refrescar()
+    return board
+
+
+def completar_resumo_ligas(ligas: list[ResumoLiga], id_utilizador: str) -> list[ResumoLiga]:
+    """
+    Preenche a posição e o número de equipas que obter_resumo_ligas_utilizador deixou
+    a None (ligas públicas sem Classificação_Liga atual). Com o leaderboard da liga em
+    memória, a posição é exata; senão é estimada pelo histograma de pontos da liga
+    (uma linha por total distinto), sem carregar nem contar os participantes.
+    """
+    completas = []
+    for liga in ligas:
+        if liga.equipas is None:
+            board = leaderboard_em_memoria(liga.id)
+            if board is not None:
+                linha = board.equipa_de(id_utilizador)
+                liga = liga._replace(
+                    posicao=linha.posicao if linha else None,
+                    equipas=len(board),
+                    pontuacao=linha.pontuacao_acumulada if linha else liga.pontuacao,
+                )
+            else:
+                histograma = Histograma(obter_histograma_liga(liga.id))
+                liga = liga._replace(
+                    posicao=None if liga.pontuacao is None else histograma.acima(liga.pontuacao) + 1,
+                    equipas=len(histograma),
+                    aproximada=True,
+                )
+        completas.append(liga)
+    return completas
@@ -1,5 +1,7 @@
 # persistence/ligas.py
-from typing import NamedTuple, Optional, List
+from typing import Callable, NamedTuple, Optional, List
+from persistence.contagens import CacheContagens
+from persistence.paginacao import codificar_cursor, condicao_keyset, descodificar_cursor, parametros_keyset
 from persistence.session import create_connection
 import uuid
 from datetime import datetime
@@ -17,6 +19,34 @@ class Liga(NamedTuple):
     nome_criador: Optional[str] = None
 
 
+class ResumoLiga(NamedTuple):
+    id: str
+    nome: str
+    data_inicio: str
+    data_fim: str
+    id_tipo_liga: str
+    id_criador: str
+    codigo_convite: Optional[str]
+    posicao: Optional[int]          # None se o utilizador ainda não tem equipa
+    equipas: Optional[int]          # equipas na classificação da liga
+    pontuacao: Optional[int]
+    aproximada: bool = False        # posição estimada pelo histograma de pontos da liga
+
+
+class Participante(NamedTuple):
+    nome: str
+    equipa: Optional[str]
+    id_equipa: Optional[str]
+    id_utilizador: str
+
+
+class PaginaParticipantes(NamedTuple):
+    linhas: List[Participante]
+    total: Optional[int]            # participantes da liga (None quando há filtro por nome)
+    anterior: Optional[str]
+    seguinte: Optional[str]
+
+
 class Participa(NamedTuple):
     id_utilizador: str
     id_liga: str
@@ -27,6 +57,24 @@ class TipoLiga(NamedTuple):
     tipo: str
 
 
+class EquipaRanking(NamedTuple):
+    posicao: int
+    nome_utilizador: str
+    nome_equipa: str
+    pontuacao: int
+    pontuacao_acumulada: int
+    id_equipa: str
+    id_utilizador: str
+
+
+class PaginaRanking(NamedTuple):
+    linhas: List[EquipaRanking]
+    total: int                      # equipas na liga
+    anterior: Optional[str]         # cursor para a página anterior (None na primeira)
+    seguinte: Optional[str]         # cursor para a página seguinte (None na última)
+    variacoes: dict = {}            # id_equipa -> lugares ganhos desde a jornada anterior
+
+
 
 # Criar liga privada
 
@@ -122,6 +170,74 @@ def obter_ligas_por_utilizador(id_utilizador: str) -> List[Liga]:
         ]
 
 
+# Ligas do utilizador com a sua posição, número de equipas e pontos, numa só consulta.
+# A posição vem de Classificação_Liga se a liga não mudou desde a última reconstrução;
+# senão é contada a partir de Equipa.Pontos (mantido por trg_PontuacaoEquipa_AtualizarTotal)
+
+def obter_resumo_ligas_utilizador(id_utilizador: str) -> List[ResumoLiga]:
+    """
+    Posição, equipas e pontos do utilizador em cada uma das suas ligas.
+
+    Nas ligas públicas (LT01) sem Classificação_Liga atual a posição e o número de
+    equipas vêm a None: contá-las seria percorrer o país ou o mundo inteiro, por isso
+    são preenchidas a partir do leaderboard em memória ou do histograma de pontos
+    da liga (leaderboard.completar_resumo_ligas).
+    """
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            ;WITH Minha AS (
+                SELECT TOP 1 E.ID, E.Pontos FROM FantasyChamp.Equipa E WHERE E.ID_utilizador = ?
+            )
+            SELECT
+                L.ID, L.Nome, L.Data_Inicio, L.Data_Fim, L.ID_tipoLiga, L.ID_criador, L.Código_Convite,
+                M.Pontos AS pontuacao,
+                CASE WHEN M.ID IS NULL THEN NULL
+                     WHEN G.atual = 1 THEN G.posicao
+                     WHEN L.ID_tipoLiga = 'LT01' THEN NULL
+                     ELSE 1 + R.acima END AS posicao,
+                CASE WHEN G.atual = 1 THEN ISNULL(G.equipas, 0)
+                     WHEN L.ID_tipoLiga = 'LT01' THEN NULL
+                     ELSE R.equipas END AS equipas
+            FROM FantasyChamp.Participa PL
+            JOIN FantasyChamp.Liga L ON L.ID = PL.ID_Liga
+            LEFT JOIN Minha M ON 1 = 1
+            LEFT JOIN FantasyChamp.Versao_Liga V ON V.ID_Liga = L.ID
+            -- Classificação mantida: duas procuras nos índices de Classificação_Liga
+            OUTER APPLY (
+                SELECT
+                    1 AS atual,
+                    (SELECT C.posicao FROM FantasyChamp.Classificação_Liga C
+                     WHERE C.ID_Liga = L.ID AND C.ID_Equipa = M.ID) AS posicao,
+                    (SELECT MAX(C.posicao) FROM FantasyChamp.Classificação_Liga C
+                     WHERE C.ID_Liga = L.ID) AS equipas
+                WHERE V.versao_classificacao = V.versao
+            ) G
+            -- Senão, nas ligas privadas, posição = 1 + equipas da liga à frente (mais
+            -- pontos ou, com os mesmos pontos, id menor): uma contagem sobre os índices,
+            -- sem ordenar a liga. As públicas ficam para o leaderboard em memória
+            OUTER APPLY (
+                SELECT
+                    COUNT(*) AS equipas,
+                    ISNULL(SUM(CASE WHEN E.Pontos > M.Pontos
+                                      OR (E.Pontos = M.Pontos AND E.ID < M.ID) THEN 1 ELSE 0 END), 0) AS acima
+                FROM FantasyChamp.Participa P
+                JOIN FantasyChamp.Equipa E ON E.ID_utilizador = P.ID_Utilizador
+                WHERE P.ID_Liga = L.ID AND G.atual IS NULL AND L.ID_tipoLiga <> 'LT01'
+            ) R
+            WHERE PL.ID_Utilizador = ?
+            ORDER BY L.Nome
+        """, id_utilizador, id_utilizador)
+
+        return [
+            ResumoLiga(str(row.ID), row.Nome, row.Data_Inicio, row.Data_Fim,
+                       row.ID_tipoLiga, row.ID_criador, row.Código_Convite,
+                       row.posicao, row.equipas, row.pontuacao)
+            for row in cursor
+        ]
+
+
+
 # Obter liga por ID
 
 def obter_liga_por_id(id_liga: str) -> Optional[Liga]:
@@ -166,6 +282,7 @@ def juntar_liga_automatico(id_utilizador: str, liga_id: str):
             EXEC FantasyChamp.JuntarLigaAutomatico ?, ?
         """, id_utilizador, liga_id)
         conn.commit()
+    _contagem_participantes.invalidar(liga_id)
 
 
 # Juntar a liga manual
@@ -186,6 +303,7 @@ def juntar_liga(id_utilizador: str, id_liga: str, codigo: Optional[str]) -> bool
         
         resultado = cursor.fetchone()[0]
         conn.commit()
+        _contagem_participantes.invalidar(id_liga)
         
         return bool(resultado)
 
@@ -219,6 +337,89 @@ def obter_participantes_liga(id_liga):
 
 
 
+# Participantes de uma liga, uma página de cada vez: cursor = (nome, id do utilizador),
+# com filtro opcional pelo início do nome (sem distinguir maiúsculas, pela collation)
+
+_contagem_participantes = CacheContagens()
+
+
+def contar_participantes_liga(id_liga: str) -> int:
+    def contar():
+        with create_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM FantasyChamp.Participa WHERE ID_Liga = ?", id_liga)
+            return cursor.fetchone()[0]
+
+    return _contagem_participantes.obter(id_liga, contar)
+
+
+def _padrao_prefixo(prefixo: str) -> str:
+    # O prefixo é texto literal: escapar os caracteres especiais do LIKE
+    for especial in ("\\", "%", "_", "["):
+        prefixo = prefixo.replace(especial, "\\" + especial)
+    return prefixo + "%"
+
+
+def obter_pagina_participantes_liga(
+    id_liga: str,
+    tamanho: int,
+    depois: Optional[str] = None,
+    antes: Optional[str] = None,
+    prefixo: Optional[str] = None,
+) -> PaginaParticipantes:
+    chave_depois, chave_antes = descodificar_cursor(depois, 2), descodificar_cursor(antes, 2)
+    prefixo = (prefixo or "").strip()
+
+    # Só as condições usadas entram no SQL, para o prefixo e o cursor serem um seek
+    # no índice (ID_Liga, nome, id_utilizador) da vista ParticipantesLigaNome
+    condicoes, parametros = ["N.ID_Liga = ?"], [id_liga]
+    if prefixo:
+        condicoes.append("N.nome LIKE ? ESCAPE '\\'")
+        parametros.append(_padrao_prefixo(prefixo))
+    if chave_depois is not None:
+        condicoes.append(condicao_keyset(("N.nome", "N.id_utilizador"), ">"))
+        parametros += parametros_keyset(chave_depois)
+    elif chave_antes is not None:
+        condicoes.append(condicao_keyset(("N.nome", "N.id_utilizador"), "<"))
+        parametros += parametros_keyset(chave_antes)
+    ordem = "DESC" if chave_antes is not None and chave_depois is None else "ASC"
+
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        # Uma linha a mais para saber se há mais páginas nesse sentido; a equipa
+        # só é procurada para as linhas da página
+        cursor.execute(f"""
+            SELECT TOP (?) N.nome, E.Nome AS equipa, E.ID AS id_equipa, N.id_utilizador
+            FROM FantasyChamp.ParticipantesLigaNome N WITH (NOEXPAND)
+            LEFT JOIN FantasyChamp.Equipa E ON E.ID_utilizador = N.id_utilizador
+            WHERE {" AND ".join(condicoes)}
+            ORDER BY N.nome {ordem}, N.id_utilizador {ordem}
+        """, tamanho + 1, *parametros)
+        rows = cursor.fetchall()
+
+    mais = len(rows) > tamanho
+    rows = rows[:tamanho]
+    if ordem == "DESC":
+        rows.reverse()
+
+    linhas = [
+        Participante(row.nome, row.equipa, str(row.id_equipa) if row.id_equipa else None, str(row.id_utilizador))
+        for row in rows
+    ]
+    if ordem == "DESC":
+        tem_anterior, tem_seguinte = mais, True
+    else:
+        tem_anterior, tem_seguinte = chave_depois is not None, mais
+
+    return PaginaParticipantes(
+        linhas,
+        None if prefixo else contar_participantes_liga(id_liga),
+        codificar_cursor(linhas[0].nome, linhas[0].id_utilizador) if linhas and tem_anterior else None,
+        codificar_cursor(linhas[-1].nome, linhas[-1].id_utilizador) if linhas and tem_seguinte else None,
+    )
+
+
+
 # Ligas públicas visíveis para o utilizador
 # Mundial + Liga do país do user
 
@@ -272,6 +473,7 @@ def abandonar_liga(id_utilizador: str, id_liga: str) -> bool:
         """, id_utilizador, id_liga)
         
         conn.commit()
+        _contagem_participantes.invalidar(id_liga)
         return True
 
 # Obter Ranking
@@ -292,30 +494,316 @@ def obter_ranking_liga(id_liga, id_jornada=None):
                     @Mensagem = @Mensagem OUTPUT;
             """, id_liga, id_jornada)
             
-            # Obter resultados
-            ranking = []
-            if cursor.description:
-                columns = [column[0] for column in cursor.description]
-                rows = cursor.fetchall()
-                
-                for row in rows:
-                    equipa = type('EquipaRanking', (), {
-                        'posicao': row.posicao,
-                        'nome_utilizador': row.nome_utilizador,
-                        'nome_equipa': row.nome_equipa,
-                        'pontuacao': row.pontuacao,
-                        'pontuacao_acumulada': row.pontuacao_acumulada,
-                        'id_equipa': row.id_equipa,
-                        'id_utilizador': row.id_utilizador
-                    })
-                    ranking.append(equipa)
-            
-            return ranking
+            if not cursor.description:
+                return []
+            return [_equipa_ranking(row) for row in cursor.fetchall()]
             
         except pyodbc.Error as e:
             print(f"Erro ao obter ranking da liga: {e}")
 
 
+def _equipa_ranking(row) -> EquipaRanking:
+    return EquipaRanking(
+        posicao=row.posicao,
+        nome_utilizador=row.nome_utilizador,
+        nome_equipa=row.nome_equipa,
+        pontuacao=row.pontuacao,
+        pontuacao_acumulada=row.pontuacao_acumulada,
+        id_equipa=str(row.id_equipa),
+        id_utilizador=str(row.id_utilizador),
+    )
+
+
+# Ordem da classificação em todo o lado (SPs, leaderboard, Classificação_Liga):
+# pontos DESC e, em caso de empate, o id da equipa. Em Python o id é comparado
+# como o SQL Server compara UNIQUEIDENTIFIER: primeiro os últimos 6 bytes, depois
+# os grupos anteriores, da direita para a esquerda.
+
+_ORDEM_GUID = (10, 11, 12, 13, 14, 15, 8, 9, 6, 7, 4, 5, 0, 1, 2, 3)
+
+
+def chave_guid(id_equipa: str) -> bytes:
+    try:
+        guid = uuid.UUID(str(id_equipa)).bytes_le
+    except ValueError:
+        return str(id_equipa).encode()
+    return bytes(guid[i] for i in _ORDEM_GUID)
+
+
+# Paginação da classificação: cursor = (pontos, id da equipa)
+
+def cursor_ranking(equipa: EquipaRanking, pontos: int) -> str:
+    return codificar_cursor(pontos, equipa.id_equipa)
+
+
+def ler_cursor_ranking(token: Optional[str]) -> Optional[tuple]:
+    chave = descodificar_cursor(token, 2)
+    if chave is None or not isinstance(chave[0], int):
+        return None
+    return chave
+
+
+def montar_pagina_ranking(
+    linhas: List[EquipaRanking],
+    total: int,
+    pontos: Callable[[EquipaRanking], int] = lambda e: e.pontuacao_acumulada,
+) -> PaginaRanking:
+    if not linhas:
+        return PaginaRanking([], total, None, None)
+    primeira, ultima = linhas[0], linhas[-1]
+    return PaginaRanking(
+        linhas,
+        total,
+        cursor_ranking(primeira, pontos(primeira)) if primeira.posicao > 1 else None,
+        cursor_ranking(ultima, pontos(ultima)) if ultima.posicao < total else None,
+    )
+
+
+# Uma página da classificação no fim de uma jornada, calculada na hora (jornadas
+# ainda sem Classificação_Jornada; o ranking geral vem do leaderboard em memória)
+
+_RANKING_JORNADA = """
+    ;WITH R AS (
+        SELECT
+            ROW_NUMBER() OVER (ORDER BY ISNULL(PE.pontuação_acumulada, 0) DESC, E.ID) AS posicao,
+            COUNT(*) OVER () AS total,
+            U.PrimeiroNome + ' ' + U.Apelido AS nome_utilizador,
+            E.Nome AS nome_equipa,
+            ISNULL(PE.pontuação_jornada, 0) AS pontuacao,
+            ISNULL(PE.pontuação_acumulada, 0) AS pontuacao_acumulada,
+            E.ID AS id_equipa,
+            E.ID_utilizador AS id_utilizador
+        FROM FantasyChamp.Participa P
+        JOIN FantasyChamp.Utilizador U ON P.ID_Utilizador = U.ID
+        INNER JOIN FantasyChamp.Equipa E ON U.ID = E.ID_utilizador
+        LEFT JOIN FantasyChamp.Pontuação_Equipa PE
+            ON E.ID = PE.ID_equipa AND PE.ID_jornada = ?
+        WHERE P.ID_Liga = ?
+    )
+"""
+
+
+def obter_pagina_ranking_jornada(
+    id_liga: str,
+    id_jornada: str,
+    tamanho: int,
+    depois: Optional[str] = None,
+    antes: Optional[str] = None,
+    em_volta_de: Optional[str] = None,
+) -> PaginaRanking:
+    """
+    Página da classificação de uma jornada, pela mesma ordem do ranking geral
+    (acumulado no fim da jornada). `depois`/`antes` são cursores de
+    montar_pagina_ranking; `em_volta_de` (id de utilizador) devolve as linhas
+    à volta da equipa desse utilizador.
+    """
+    chave_depois, chave_antes = ler_cursor_ranking(depois), ler_cursor_ranking(antes)
+
+    with create_connection() as conn:
+        cursor = conn.cursor()
+
+        if em_volta_de is not None:
+            cursor.execute(_RANKING_JORNADA + """
+                , M AS (SELECT MIN(posicao) AS posicao FROM R WHERE id_utilizador = ?)
+                SELECT TOP (?) R.*
+                FROM R CROSS JOIN M
+                WHERE R.posicao >= ISNULL(M.posicao, 1) - ?
+                ORDER BY R.posicao
+            """, id_jornada, id_liga, em_volta_de, tamanho, tamanho // 2)
+            rows = cursor.fetchall()
+        elif chave_depois is not None:
+            pontos, id_equipa = chave_depois
+            cursor.execute(_RANKING_JORNADA + """
+                SELECT TOP (?) *
+                FROM R
+                WHERE pontuacao_acumulada < ?
+                   OR (pontuacao_acumulada = ? AND id_equipa > CAST(? AS UNIQUEIDENTIFIER))
+                ORDER BY posicao
+            """, id_jornada, id_liga, tamanho, pontos, pontos, id_equipa)
+            rows = cursor.fetchall()
+        elif chave_antes is not None:
+            pontos, id_equipa = chave_antes
+            cursor.execute(_RANKING_JORNADA + """
+                SELECT TOP (?) *
+                FROM R
+                WHERE pontuacao_acumulada > ?
+                   OR (pontuacao_acumulada = ? AND id_equipa < CAST(? AS UNIQUEIDENTIFIER))
+                ORDER BY posicao DESC
+            """, id_jornada, id_liga, tamanho, pontos, pontos, id_equipa)
+            rows = cursor.fetchall()[::-1]
+        else:
+            cursor.execute(_RANKING_JORNADA + """
+                SELECT TOP (?) * FROM R ORDER BY posicao
+            """, id_jornada, id_liga, tamanho)
+            rows = cursor.fetchall()
+
+        total = rows[0].total if rows else 0
+        return montar_pagina_ranking([_equipa_ranking(row) for row in rows], total)
+
+
+# Uma página de Classificação_Jornada (jornadas fechadas): leitura por intervalo de posições
+
+def obter_pagina_classificacao_jornada(
+    id_liga: str,
+    id_jornada: str,
+    tamanho: int,
+    depois: Optional[str] = None,
+    antes: Optional[str] = None,
+    em_volta_de: Optional[str] = None,
+) -> Optional[PaginaRanking]:
+    """
+    Como obter_pagina_ranking_jornada, mas a partir da classificação gravada
+    no fecho da jornada. Devolve None se a jornada ainda não tiver classificação.
+    """
+    chave_depois, chave_antes = ler_cursor_ranking(depois), ler_cursor_ranking(antes)
+    id_ancora = (chave_depois or chave_antes or (None, None))[1]
+
+    with create_connection() as conn:
+        cursor = conn.cursor()
+
+        # Número de equipas e posição da equipa de referência (cursor ou utilizador)
+        cursor.execute("""
+            SELECT
+                (SELECT MAX(posicao) FROM FantasyChamp.Classificação_Jornada
+                 WHERE ID_Liga = ? AND ID_jornada = ?) AS total,
+                (SELECT C.posicao FROM FantasyChamp.Classificação_Jornada C
+                 WHERE C.ID_Liga = ? AND C.ID_jornada = ? AND C.ID_Equipa = TRY_CAST(? AS UNIQUEIDENTIFIER)) AS ancora,
+                (SELECT MIN(C.posicao) FROM FantasyChamp.Classificação_Jornada C
+                 JOIN FantasyChamp.Equipa E ON E.ID = C.ID_Equipa
+                 WHERE C.ID_Liga = ? AND C.ID_jornada = ? AND E.ID_utilizador = ?) AS minha
+        """, id_liga, id_jornada, id_liga, id_jornada, id_ancora, id_liga, id_jornada, em_volta_de)
+        row = cursor.fetchone()
+        if row is None or row.total is None:
+            return None
+
+        total = row.total
+        if em_volta_de is not None and row.minha is not None:
+            inicio = max(1, min(row.minha - tamanho // 2, total - tamanho + 1))
+        elif chave_depois is not None and row.ancora is not None:
+            inicio = row.ancora + 1
+        elif chave_antes is not None and row.ancora is not None:
+            inicio = max(1, row.ancora - tamanho)
+            tamanho = row.ancora - inicio
+        else:
+            inicio = 1
+
+        cursor.execute("""
+            SELECT
+                C.posicao,
+                U.PrimeiroNome + ' ' + U.Apelido AS nome_utilizador,
+                E.Nome AS nome_equipa,
+                C.pontuação_jornada AS pontuacao,
+                C.pontuação_acumulada AS pontuacao_acumulada,
+                C.ID_Equipa AS id_equipa,
+                E.ID_utilizador AS id_utilizador,
+                C.variacao
+            FROM FantasyChamp.Classificação_Jornada C
+            JOIN FantasyChamp.Equipa E ON E.ID = C.ID_Equipa
+            JOIN FantasyChamp.Utilizador U ON U.ID = E.ID_utilizador
+            WHERE C.ID_Liga = ? AND C.ID_jornada = ? AND C.posicao BETWEEN ? AND ?
+            ORDER BY C.posicao
+        """, id_liga, id_jornada, inicio, inicio + tamanho - 1)
+        rows = cursor.fetchall()
+
+        pagina = montar_pagina_ranking([_equipa_ranking(r) for r in rows], total)
+        return pagina._replace(variacoes={str(r.id_equipa): r.variacao for r in rows})
+
+
+# Totais de todas as equipas de uma liga, sem ordenar (para o leaderboard em memória)
+
+def obter_totais_liga(id_liga: str) -> List[EquipaRanking]:
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT
+                E.ID AS id_equipa,
+                E.Nome AS nome_equipa,
+                E.ID_utilizador AS id_utilizador,
+                U.PrimeiroNome + ' ' + U.Apelido AS nome_utilizador,
+                ISNULL(MAX(PE.pontuação_acumulada), 0) AS pontuacao_total
+            FROM FantasyChamp.Participa P
+            JOIN FantasyChamp.Utilizador U ON P.ID_Utilizador = U.ID
+            INNER JOIN FantasyChamp.Equipa E ON U.ID = E.ID_utilizador
+            LEFT JOIN FantasyChamp.Pontuação_Equipa PE ON E.ID = PE.ID_equipa
+            WHERE P.ID_Liga = ?
+            GROUP BY E.ID, E.Nome, E.ID_utilizador, U.PrimeiroNome, U.Apelido
+        """, id_liga)
+
+        return [
+            EquipaRanking(
+                posicao=0,
+                nome_utilizador=row.nome_utilizador,
+                nome_equipa=row.nome_equipa,
+                pontuacao=row.pontuacao_total,
+                pontuacao_acumulada=row.pontuacao_total,
+                id_equipa=str(row.id_equipa),
+                id_utilizador=str(row.id_utilizador),
+            )
+            for row in cursor.fetchall()
+        ]
+
+
+# Classificação_Liga de uma liga, já ordenada, se ainda corresponder à versão atual
+# da liga (senão devolve uma lista vazia e os totais vêm de obter_totais_liga)
+
+def obter_classificacao_liga(id_liga: str) -> List[EquipaRanking]:
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT
+                C.posicao,
+                C.ID_Equipa AS id_equipa,
+                E.Nome AS nome_equipa,
+                E.ID_utilizador AS id_utilizador,
+                U.PrimeiroNome + ' ' + U.Apelido AS nome_utilizador,
+                C.pontuação AS pontuacao_total
+            FROM FantasyChamp.Versao_Liga V
+            JOIN FantasyChamp.Classificação_Liga C ON C.ID_Liga = V.ID_Liga
+            JOIN FantasyChamp.Equipa E ON E.ID = C.ID_Equipa
+            JOIN FantasyChamp.Utilizador U ON U.ID = E.ID_utilizador
+            WHERE V.ID_Liga = ? AND V.versao_classificacao = V.versao
+            ORDER BY C.posicao
+        """, id_liga)
+
+        return [
+            EquipaRanking(
+                posicao=row.posicao,
+                nome_utilizador=row.nome_utilizador,
+                nome_equipa=row.nome_equipa,
+                pontuacao=row.pontuacao_total,
+                pontuacao_acumulada=row.pontuacao_total,
+                id_equipa=str(row.id_equipa),
+                id_utilizador=str(row.id_utilizador),
+            )
+            for row in cursor.fetchall()
+        ]
+
+
+# Versão das pontuações de uma liga (muda quando alguma equipa da liga muda de
+# total ou alguém entra/sai; mantida pelos triggers de queries/triggers.sql)
+
+def obter_histograma_liga(id_liga: str) -> dict[int, int]:
+    """Pontos -> equipas da liga, mantido pelos triggers (queries/table_HistogramaLiga.sql)."""
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT pontos, equipas
+            FROM FantasyChamp.Histograma_Liga
+            WHERE ID_Liga = ?
+        """, id_liga)
+        return {row.pontos: row.equipas for row in cursor.fetchall()}
+
+
+def obter_versao_pontuacoes_liga(id_liga: str) -> int:
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT versao FROM FantasyChamp.Versao_Liga WHERE ID_Liga = ?
+        """, id_liga)
+        row = cursor.fetchone()
+        return row.versao if row else 0
+
+
 # Obter Jornadas Disponiveis
 
 def obter_jornadas_disponiveis():
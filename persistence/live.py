@@ -0,0 +1,465 @@
+# persistence/live.py
+"""
+Pontuações ao vivo durante a jornada.
+
+Os eventos de cada jogo (FantasyChamp.Jogo) chegam pela API de ingestão e
+atualizam em memória as estatísticas e os pontos dos jogadores envolvidos.
+A diferença de pontos de um jogador é propagada às equipas que o têm como
+titular através de um índice inverso jogador -> equipas construído a partir
+de Pertence, por isso /pontuacao mostra os pontos ao vivo sem recalcular nada.
+
+Periodicamente as estatísticas alteradas são gravadas em Pontuação_Jogador
+(o trigger regista-as em Pontuação_Jogador_Alterada) e as equipas afetadas são
+recalculadas com scoring.recalcular_alteracoes().
+
+Eventos (campo "tipo"):
+    entrada, saida      - jogador entra / sai do campo no minuto indicado
+    golo, assistencia   - golo marcado / assistência do jogador
+    amarelo, vermelho   - cartões (o vermelho também tira o jogador do campo)
+    fim                 - fim do jogo; todos os jogadores em campo saem
+
+O estado ao vivo vive na memória do processo: com vários workers (gunicorn
+-w N, ...) cada um veria só os eventos que recebeu. A aplicação tem de correr
+com um único worker (podendo usar threads) enquanto a ingestão estiver ativa.
+
+Configuração (secção opcional [live] do conf.ini):
+    enabled = false
+    token =                 ; obrigatório com enabled: exigido no cabeçalho X-Live-Token
+    flush_interval = 30     ; segundos entre gravações na BD
+    index_ttl = 300         ; segundos até reconstruir o índice jogador -> equipas
+"""
+import functools
+import logging
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+
+from persistence import ranking_stream
+from persistence.scoring import recalcular_alteracoes
+from persistence.scoring_rules import COLUNAS, pontuar_jogador
+from persistence.session import config_section, create_connection
+
+logger = logging.getLogger("fantasychamp.live")
+
+EVENTOS = ("entrada", "saida", "golo", "assistencia", "amarelo", "vermelho", "fim")
+
+DURACAO_JOGO = 90
+
+
+class LiveConfig(NamedTuple):
+    enabled: bool = False
+    token: str = ""
+    flush_interval: float = 30.0
+    index_ttl: float = 300.0
+
+
+@functools.cache
+def live_config() -> LiveConfig:
+    section = config_section("live")
+    defaults = LiveConfig()
+    if section is None:
+        return defaults
+
+    return LiveConfig(
+        enabled=section.getboolean("enabled", defaults.enabled),
+        token=section.get("token", defaults.token),
+        flush_interval=section.getfloat("flush_interval", defaults.flush_interval),
+        index_ttl=section.getfloat("index_ttl", defaults.index_ttl),
+    )
+
+
+class _Jogador:
+    __slots__ = ("id", "clube", "posicao", "stats", "minutos", "em_campo_desde", "pontos", "gravado", "sujo")
+
+    def __init__(self, id_jogador: str, clube: str, posicao: str, stats: dict, gravado: int):
+        self.id = id_jogador
+        self.clube = clube
+        self.posicao = posicao
+        self.stats = stats
+        self.minutos = stats["TempoJogo"]       # minutos já fechados (antes de entrar de novo)
+        self.em_campo_desde: Optional[int] = None
+        self.pontos = gravado
+        self.gravado = gravado                  # pontuação_total que está na BD
+        self.sujo = False
+
+
+class _Jogo:
+    __slots__ = ("id", "id_jornada", "clubes", "minuto", "terminado", "jogadores")
+
+    def __init__(self, id_jogo: str, id_jornada: str, clubes: tuple[str, str]):
+        self.id = id_jogo
+        self.id_jornada = id_jornada
+        self.clubes = clubes
+        self.minuto = 0
+        self.terminado = False
+        self.jogadores: dict[str, _Jogador] = {}
+
+
+# --- CARREGAMENTO ---
+
+def _carregar_jogo(id_jogo: str) -> _Jogo:
+    """Jogo, jogadores dos dois clubes e estatísticas já gravadas nessa jornada."""
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT ID_jornada, ID_Clube1, ID_Clube2
+            FROM FantasyChamp.Jogo
+            WHERE ID = ?
+        """, id_jogo)
+        row = cursor.fetchone()
+        if not row:
+            raise ValueError(f"Jogo {id_jogo} não encontrado")
+
+        jogo = _Jogo(id_jogo, row.ID_jornada, (row.ID_Clube1, row.ID_Clube2))
+
+        cursor.execute(f"""
+            SELECT J.ID, J.ID_clube, P.Posição, PJ.pontuação_total,
+                   {", ".join("PJ." + c for c in COLUNAS)}
+            FROM FantasyChamp.Jogador J
+            LEFT JOIN FantasyChamp.Posição P ON J.ID_Posição = P.ID
+            LEFT JOIN FantasyChamp.Pontuação_Jogador PJ
+                ON PJ.ID_jogador = J.ID AND PJ.ID_jornada = ?
+            WHERE J.ID_clube IN (?, ?)
+        """, jogo.id_jornada, *jogo.clubes)
+
+        for row in cursor.fetchall():
+            stats = {c: getattr(row, c) or 0 for c in COLUNAS}
+            try:
+                gravado = int(row.pontuação_total) if row.pontuação_total is not None else 0
+            except ValueError:
+                gravado = 0
+            jogo.jogadores[row.ID] = _Jogador(row.ID, row.ID_clube, row.Posição, stats, gravado)
+
+    return jogo
+
+
+def _carregar_indice() -> dict[str, set[str]]:
+    """Índice inverso: jogador -> equipas que o têm como titular."""
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT ID_Jogador, ID_Equipa
+            FROM FantasyChamp.Pertence
+            WHERE benched = 0
+        """)
+        indice: dict[str, set[str]] = {}
+        for row in cursor.fetchall():
+            indice.setdefault(row.ID_Jogador, set()).add(str(row.ID_Equipa))
+        return indice
+
+
+# --- MOTOR ---
+
+class LiveScoring:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jogos: dict[str, _Jogo] = {}
+        self._indice: dict[str, set[str]] = {}
+        self._indice_em = None
+        # Pontos ainda não refletidos em Pontuação_Equipa: equipa -> {jornada: delta}
+        self._pendente: dict[str, dict[str, int]] = {}
+        # Ímpar enquanto uma gravação está entre o commit e a remoção dos pendentes
+        self._geracao = 0
+        self._publicado = threading.Condition(self._lock)
+        self._thread = None
+
+    # Índice e propagação
+
+    def _garantir_indice(self, ttl: float):
+        agora = time.monotonic()
+        if self._indice_em is not None and agora - self._indice_em < ttl:
+            return
+
+        indice = _carregar_indice()
+        with self._lock:
+            self._indice = indice
+            self._indice_em = agora
+            # Titulares podem ter mudado: refazer os pendentes com o índice novo
+            self._pendente = {}
+            for jogo in self._jogos.values():
+                for jogador in jogo.jogadores.values():
+                    self._propagar(jogador, jogo.id_jornada, jogador.pontos - jogador.gravado)
+
+    def _propagar(self, jogador: _Jogador, id_jornada: str, delta: int):
+        if not delta:
+            return
+        for id_equipa in self._indice.get(jogador.id, ()):
+            por_jornada = self._pendente.setdefault(id_equipa, {})
+            valor = por_jornada.get(id_jornada, 0) + delta
+            if valor:
+                por_jornada[id_jornada] = valor
+                continue
+            # Tudo gravado: a equipa deixa de ocupar memória
+            por_jornada.pop(id_jornada, None)
+            if not por_jornada:
+                del self._pendente[id_equipa]
+
+    def _atualizar_pontos(self, jogo: _Jogo, jogador: _Jogador):
+        tempo = jogador.minutos
+        if jogador.em_campo_desde is not None:
+            tempo += max(0, jogo.minuto - jogador.em_campo_desde)
+        jogador.stats["TempoJogo"] = min(tempo, 120)
+
+        novos = pontuar_jogador(jogador.stats, jogador.posicao)
+        delta = novos - jogador.pontos
+        jogador.pontos = novos
+        jogador.sujo = True
+        self._propagar(jogador, jogo.id_jornada, delta)
+
+    def _obter_jogo(self, id_jogo: str) -> _Jogo:
+        jogo = self._jogos.get(id_jogo)
+        if jogo is not None:
+            return jogo
+
+        carregado = _carregar_jogo(id_jogo)
+        with self._lock:
+            jogo = self._jogos.setdefault(id_jogo, carregado)
+            if jogo is carregado:
+                # Estatísticas já gravadas cuja pontuação_total está desatualizada
+                for jogador in jogo.jogadores.values():
+                    self._atualizar_pontos(jogo, jogador)
+                    jogador.sujo = jogador.pontos != jogador.gravado
+        return jogo
+
+    # Eventos
+
+    def registar_evento(self, id_jogo: str, tipo: str, id_jogador: Optional[str] = None,
+                        minuto: Optional[int] = None) -> dict:
+        """Aplica um evento de um jogo. Devolve os pontos ao vivo do jogador."""
+        if tipo not in EVENTOS:
+            raise ValueError(f"Evento desconhecido: {tipo}")
+        if tipo != "fim" and not id_jogador:
+            raise ValueError("Falta o jogador do evento")
+
+        self._garantir_indice(live_config().index_ttl)
+        jogo = self._obter_jogo(id_jogo)
+
+        with self._lock:
+            jogador = None
+            if id_jogador is not None:
+                jogador = jogo.jogadores.get(id_jogador)
+                if jogador is None:
+                    raise ValueError(f"O jogador {id_jogador} não joga no jogo {id_jogo}")
+
+            if minuto is None:
+                minuto = DURACAO_JOGO if tipo == "fim" else jogo.minuto
+            self._avancar_relogio(jogo, minuto)
+
+            if tipo == "entrada":
+                if jogador.em_campo_desde is None:
+                    jogador.em_campo_desde = jogo.minuto
+            elif tipo in ("saida", "vermelho"):
+                if tipo == "vermelho":
+                    jogador.stats["CartoesVermelhos"] += 1
+                self._sair(jogo, jogador)
+            elif tipo == "golo":
+                jogador.stats["GolosMarcados"] += 1
+                self._golo_sofrido(jogo, jogador.clube)
+            elif tipo == "assistencia":
+                jogador.stats["Assistencias"] += 1
+            elif tipo == "amarelo":
+                jogador.stats["CartoesAmarelos"] += 1
+            elif tipo == "fim":
+                for j in jogo.jogadores.values():
+                    if j.em_campo_desde is not None:
+                        self._sair(jogo, j)
+                jogo.terminado = True
+
+            if jogador is not None:
+                self._atualizar_pontos(jogo, jogador)
+                return {"jogador": jogador.id, "pontos": jogador.pontos, "minuto": jogo.minuto}
+            return {"jogo": jogo.id, "minuto": jogo.minuto, "terminado": jogo.terminado}
+
+    def _avancar_relogio(self, jogo: _Jogo, minuto: int):
+        if minuto <= jogo.minuto:
+            return
+        jogo.minuto = minuto
+        # Só os jogadores em campo ganham minutos
+        for jogador in jogo.jogadores.values():
+            if jogador.em_campo_desde is not None:
+                self._atualizar_pontos(jogo, jogador)
+
+    def _sair(self, jogo: _Jogo, jogador: _Jogador):
+        if jogador.em_campo_desde is None:
+            return
+        jogador.minutos += max(0, jogo.minuto - jogador.em_campo_desde)
+        jogador.em_campo_desde = None
+        self._atualizar_pontos(jogo, jogador)
+
+    def _golo_sofrido(self, jogo: _Jogo, clube_que_marcou: str):
+        for jogador in jogo.jogadores.values():
+            if jogador.clube != clube_que_marcou and jogador.em_campo_desde is not None:
+                jogador.stats["GolosSofridos"] += 1
+                self._atualizar_pontos(jogo, jogador)
+
+    # Leitura
+
+    def pendente_equipa(self, id_equipa: str) -> dict[str, int]:
+        """Pontos ao vivo de uma equipa ainda não gravados, por jornada."""
+        with self._lock:
+            return dict(self._pendente.get(id_equipa, {}))
+
+    def ler_com_pendente(self, id_equipa: str, ler: Callable, tentativas: int = 3) -> tuple:
+        """
+        Chama `ler()` (leitura de Pontuação_Equipa) e devolve (resultado, pendente)
+        coerentes entre si: se uma gravação for confirmada durante a leitura, lê de
+        novo, para que os mesmos pontos não apareçam na BD e no pendente.
+        """
+        for _ in range(tentativas):
+            with self._lock:
+                self._publicado.wait_for(lambda: self._geracao % 2 == 0, timeout=5)
+                geracao = self._geracao
+            resultado = ler()
+            with self._lock:
+                if self._geracao == geracao:
+                    return resultado, dict(self._pendente.get(id_equipa, {}))
+
+        return resultado, self.pendente_equipa(id_equipa)
+
+    # Gravação
+
+    def gravar(self) -> int:
+        """Grava as estatísticas alteradas e recalcula as equipas afetadas."""
+        with self._lock:
+            sujos = [
+                (jogo.id_jornada, jogador, dict(jogador.stats), jogador.pontos)
+                for jogo in self._jogos.values()
+                for jogador in jogo.jogadores.values()
+                if jogador.sujo
+            ]
+            for _, jogador, _, _ in sujos:
+                jogador.sujo = False
+
+        if not sujos:
+            return 0
+
+        publicado = False
+
+        def confirmar(conn=None):
+            # O commit das pontuações das equipas e a remoção dos pendentes são
+            # vistos pelos leitores (ler_com_pendente) como um só passo
+            nonlocal publicado
+            with self._lock:
+                self._geracao += 1
+            try:
+                if conn is not None:
+                    conn.commit()
+                with self._lock:
+                    for id_jornada, jogador, _, pontos in sujos:
+                        # O que foi gravado deixa de estar pendente; eventos entretanto recebidos continuam
+                        self._propagar(jogador, id_jornada, jogador.gravado - pontos)
+                        jogador.gravado = pontos
+                publicado = True
+            finally:
+                with self._lock:
+                    self._geracao += 1
+                    self._publicado.notify_all()
+
+        try:
+            _gravar_estatisticas([(id_jornada, jogador.id, stats, pontos)
+                                  for id_jornada, jogador, stats, pontos in sujos])
+            recalcular_alteracoes(confirmar)
+            if not publicado:
+                # Nenhuma equipa foi recalculada: não há commit para acompanhar
+                confirmar()
+        except Exception:
+            with self._lock:
+                for _, jogador, _, _ in sujos:
+                    jogador.sujo = True
+            raise
+
+        ranking_stream.notificar()
+
+        with self._lock:
+            # Jogos terminados e já gravados deixam de ocupar memória
+            for id_jogo in [j.id for j in self._jogos.values()
+                            if j.terminado and not any(x.sujo for x in j.jogadores.values())]:
+                del self._jogos[id_jogo]
+
+        return len(sujos)
+
+    def _ciclo_gravacao(self, intervalo: float):
+        while True:
+            time.sleep(intervalo)
+            try:
+                gravados = self.gravar()
+                if gravados:
+                    logger.info("Pontuações ao vivo: %d jogadores gravados", gravados)
+            except Exception:
+                logger.exception("Erro ao gravar pontuações ao vivo")
+
+    def iniciar(self, intervalo: float):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._ciclo_gravacao, args=(intervalo,), name="live-flush", daemon=True
+            )
+            self._thread.start()
+
+
+def _gravar_estatisticas(linhas: list[tuple]):
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            CREATE TABLE #PontuacaoJogadorLive (
+                ID_jogador VARCHAR(16) NOT NULL,
+                ID_jornada VARCHAR(16) NOT NULL,
+                {", ".join(c + " INT NOT NULL" for c in COLUNAS)},
+                pontuação_total VARCHAR(10) NOT NULL,
+                PRIMARY KEY (ID_jogador, ID_jornada)
+            )
+        """)
+        try:
+            cursor.fast_executemany = True
+            cursor.executemany(f"""
+                INSERT INTO #PontuacaoJogadorLive
+                    (ID_jogador, ID_jornada, {", ".join(COLUNAS)}, pontuação_total)
+                VALUES (?, ?, {", ".join("?" for _ in COLUNAS)}, ?)
+            """, [
+                (id_jogador, id_jornada, *(stats[c] for c in COLUNAS), str(pontos))
+                for id_jornada, id_jogador, stats, pontos in linhas
+            ])
+
+            cursor.execute(f"""
+                MERGE FantasyChamp.Pontuação_Jogador AS T
+                USING #PontuacaoJogadorLive AS S
+                    ON T.ID_jogador = S.ID_jogador AND T.ID_jornada = S.ID_jornada
+                WHEN MATCHED THEN
+                    UPDATE SET {", ".join(f"{c} = S.{c}" for c in COLUNAS)},
+                               pontuação_total = S.pontuação_total
+                WHEN NOT MATCHED BY TARGET THEN
+                    INSERT (ID_jogador, ID_jornada, {", ".join(COLUNAS)}, pontuação_total)
+                    VALUES (S.ID_jogador, S.ID_jornada, {", ".join("S." + c for c in COLUNAS)}, S.pontuação_total);
+            """)
+        finally:
+            cursor.execute("DROP TABLE #PontuacaoJogadorLive")
+        conn.commit()
+
+
+def aplicar_pendente(pontuacoes_jornadas: list[dict], pendente: dict[str, int]) -> list[dict]:
+    """Soma os pontos ao vivo às linhas de obter_pontuacoes_jornadas (e aos acumulados seguintes)."""
+    extra = 0
+    resultado = []
+    for p in sorted(pontuacoes_jornadas, key=lambda x: x['jornada_numero'] or 0):
+        delta = pendente.get(p['jornada_id'], 0)
+        extra += delta
+        p = dict(p)
+        if delta:
+            p['pontuacao'] = (p['pontuacao'] or 0) + delta
+            p['ao_vivo'] = True
+        if extra:
+            p['pontuacao_acumulada'] = (p['pontuacao_acumulada'] or 0) + extra
+        resultado.append(p)
+    return resultado
+
+
+live_scoring = LiveScoring()
+
+
+def init_app(app):
+    config = live_config()
+    if config.enabled and not config.token:
+        # Sem token qualquer cliente poderia alterar as pontuações: a ingestão fica recusada (503)
+        logger.error("[live] enabled sem token: a ingestão de eventos ao vivo fica desativada")
+        return
+    if config.enabled:
+        live_scoring.iniciar(config.flush_interval)
@@ -1,8 +1,14 @@
 import pyodbc
+from persistence.contagens import CacheContagens, contar_listagem
+from persistence.paginacao import Pagina, pagina_keyset
 from persistence.session import create_connection
 
 DEFAULT_IMAGE = "/static/images/Image-not-found.png"
 
+# Número de jogos da listagem paginada; a tabela só é escrita pelo populate_db.py
+# (outro processo), por isso a contagem é renovada pelo ttl de [counts]
+_match_counts = CacheContagens()
+
 def list_all_matches():
     with create_connection() as conn:
         cursor = conn.cursor()
@@ -115,43 +121,44 @@ def read_match(match_id):
         }
 
 
-def list_paginated_matches(page: int, per_page: int):
-
-    offset = (page - 1) * per_page
-
+def _match_dict(row) -> dict:
+    imagem_clube1 = row.Clube1_Imagem if row.Clube1_Imagem else DEFAULT_IMAGE
+    imagem_clube2 = row.Clube2_Imagem if row.Clube2_Imagem else DEFAULT_IMAGE
+
+    return {
+        "id": row.ID,
+        "date": row.Data.strftime('%Y-%m-%d') if row.Data else "N/A",
+        "round": f"Round {row.Jornada}",
+        "club1": row.Clube1,
+        "club1_image": imagem_clube1,
+        "club2": row.Clube2,
+        "club2_image": imagem_clube2,
+        "goals_home": row.golos_clube1 if row.golos_clube1 is not None else "-",
+        "goals_away": row.golos_clube2 if row.golos_clube2 is not None else "-"
+    }
+
+
+def list_paginated_matches(per_page: int, depois=None, antes=None) -> Pagina:
+    """
+    Página de jogos, mais recentes primeiro, com cursor (Data, ID): a chave do
+    índice IX_Jogo_Data_ID, por isso cada página é um seek nesse índice.
+    """
     with create_connection() as conn:
         cursor = conn.cursor()
 
-        # Total de jogos (pode usar view também)
-        cursor.execute("SELECT COUNT(*) FROM FantasyChamp.JogosCompletos")
-        total = cursor.fetchone()[0]
-
-        # Query paginada usando view
-        query = f"""
-            SELECT *
-            FROM FantasyChamp.JogosCompletos
-            ORDER BY Data DESC, Jornada DESC
-            OFFSET {offset} ROWS FETCH NEXT {per_page} ROWS ONLY
-        """
-
-        cursor.execute(query)
-        rows = cursor.fetchall()
-
-        matches = []
-        for row in rows:
-            imagem_clube1 = row.Clube1_Imagem if row.Clube1_Imagem else DEFAULT_IMAGE
-            imagem_clube2 = row.Clube2_Imagem if row.Clube2_Imagem else DEFAULT_IMAGE
-
-            matches.append({
-                "id": row.ID,
-                "date": row.Data.strftime('%Y-%m-%d') if row.Data else "N/A",
-                "round": f"Round {row.Jornada}",
-                "club1": row.Clube1,
-                "club1_image": imagem_clube1,
-                "club2": row.Clube2,
-                "club2_image": imagem_clube2,
-                "goals_home": row.golos_clube1 if row.golos_clube1 is not None else "-",
-                "goals_away": row.golos_clube2 if row.golos_clube2 is not None else "-"
-            })
-
-        return matches, total
\ No newline at end of file
+        # Total em cache (ver persistence/contagens.py)
+        total, aproximado = contar_listagem(_match_counts, cursor, "FantasyChamp.JogosCompletos", "FantasyChamp.Jogo")
+
+        return pagina_keyset(
+            cursor,
+            "FantasyChamp.JogosCompletos",
+            "*",
+            ("Data", "ID"),
+            per_page,
+            depois,
+            antes,
+            descendente=True,
+            converter=_match_dict,
+            total=total,
+            aproximado=aproximado,
+        )
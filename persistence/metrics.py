@@ -0,0 +1,198 @@
+# persistence/metrics.py
+"""
+Métricas por instrução SQL (tempo, linhas devolvidas, erros).
+
+As instruções são agrupadas por uma forma normalizada, p.ex.
+`EXEC sp_ObterRankingLigaComEquipas` ou `SELECT ... FantasyChamp.JogadoresEquipa`,
+e exportadas no formato de texto do Prometheus.
+"""
+import bisect
+import functools
+import re
+import secrets
+import threading
+from typing import NamedTuple
+
+# Limites dos buckets do histograma de duração, em segundos
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# --- NORMALIZAÇÃO ---
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_EXEC = re.compile(r"\bEXEC(?:UTE)?\s+(?:@\w+\s*=\s*)?([\w.\[\]]+)", re.I)
+_VERB = re.compile(r"\b(SELECT|INSERT|UPDATE|DELETE|MERGE)\b", re.I)
+_FROM = re.compile(r"\b(?:FROM|INTO|UPDATE|MERGE(?:\s+INTO)?)\s+([\w.\[\]]+)", re.I)
+_FUNCTION = re.compile(r"\bSELECT\s+([\w.]+)\s*\(", re.I)
+
+
+@functools.lru_cache(maxsize=2048)
+def normalize_statement(sql: str) -> str:
+    """Reduz uma instrução SQL a uma etiqueta curta e estável."""
+    text = _COMMENTS.sub(" ", sql)
+
+    match = _EXEC.search(text)
+    if match:
+        return f"EXEC {match.group(1)}"
+
+    verb = _VERB.search(text)
+    if not verb:
+        return " ".join(text.split())[:60] or "?"
+
+    keyword = verb.group(1).upper()
+    target = _FROM.search(text, verb.start())
+    if target:
+        if keyword == "SELECT":
+            return f"SELECT ... {target.group(1)}"
+        return f"{keyword} {target.group(1)}"
+
+    # SELECT sem FROM, p.ex. uma UDF escalar
+    function = _FUNCTION.search(text, verb.start())
+    if function and keyword == "SELECT":
+        return f"SELECT {function.group(1)}"
+    return keyword
+
+
+# --- REGISTO ---
+
+class _StatementStats:
+    __slots__ = ("buckets", "count", "total", "rows", "errors")
+
+    def __init__(self):
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.rows = 0
+        self.errors = 0
+
+
+class QueryMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[str, _StatementStats] = {}
+
+    def _get(self, statement: str) -> _StatementStats:
+        stats = self._stats.get(statement)
+        if stats is None:
+            stats = self._stats.setdefault(statement, _StatementStats())
+        return stats
+
+    def record(self, statement: str, elapsed: float, error: bool = False):
+        index = bisect.bisect_left(DURATION_BUCKETS, elapsed)
+        with self._lock:
+            stats = self._get(statement)
+            stats.buckets[index] += 1
+            stats.count += 1
+            stats.total += elapsed
+            if error:
+                stats.errors += 1
+
+    def record_rows(self, statement: str, rows: int):
+        with self._lock:
+            self._get(statement).rows += rows
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                statement: {
+                    "buckets": list(stats.buckets),
+                    "count": stats.count,
+                    "total": stats.total,
+                    "rows": stats.rows,
+                    "errors": stats.errors,
+                }
+                for statement, stats in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+query_metrics = QueryMetrics()
+
+
+# --- EXPORTAÇÃO PROMETHEUS ---
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def render_prometheus(pool_stats=None) -> str:
+    snapshot = query_metrics.snapshot()
+    lines = []
+
+    lines.append("# HELP fantasychamp_db_statement_duration_seconds Duração de cada instrução SQL.")
+    lines.append("# TYPE fantasychamp_db_statement_duration_seconds histogram")
+    for statement, stats in sorted(snapshot.items()):
+        label = _label(statement)
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS, stats["buckets"]):
+            cumulative += count
+            lines.append(
+                f'fantasychamp_db_statement_duration_seconds_bucket{{statement="{label}",le="{bound}"}} {cumulative}'
+            )
+        lines.append(
+            f'fantasychamp_db_statement_duration_seconds_bucket{{statement="{label}",le="+Inf"}} {stats["count"]}'
+        )
+        lines.append(f'fantasychamp_db_statement_duration_seconds_sum{{statement="{label}"}} {stats["total"]}')
+        lines.append(f'fantasychamp_db_statement_duration_seconds_count{{statement="{label}"}} {stats["count"]}')
+
+    lines.append("# HELP fantasychamp_db_statement_rows_total Linhas devolvidas por instrução SQL.")
+    lines.append("# TYPE fantasychamp_db_statement_rows_total counter")
+    for statement, stats in sorted(snapshot.items()):
+        lines.append(f'fantasychamp_db_statement_rows_total{{statement="{_label(statement)}"}} {stats["rows"]}')
+
+    lines.append("# HELP fantasychamp_db_statement_errors_total Erros por instrução SQL.")
+    lines.append("# TYPE fantasychamp_db_statement_errors_total counter")
+    for statement, stats in sorted(snapshot.items()):
+        lines.append(f'fantasychamp_db_statement_errors_total{{statement="{_label(statement)}"}} {stats["errors"]}')
+
+    if pool_stats is not None:
+        lines.append("# HELP fantasychamp_db_pool_connections Conexões do pool por estado.")
+        lines.append("# TYPE fantasychamp_db_pool_connections gauge")
+        lines.append(f'fantasychamp_db_pool_connections{{state="idle"}} {pool_stats.idle}')
+        lines.append(f'fantasychamp_db_pool_connections{{state="in_use"}} {pool_stats.in_use}')
+        for name in ("created", "closed", "borrowed", "waits", "timeouts", "ping_failures"):
+            lines.append(f"# TYPE fantasychamp_db_pool_{name}_total counter")
+            lines.append(f"fantasychamp_db_pool_{name}_total {getattr(pool_stats, name)}")
+
+    return "\n".join(lines) + "\n"
+
+
+# --- ACESSO ---
+
+class MetricsConfig(NamedTuple):
+    token: str = ""                                 # se definido, exigir "Authorization: Bearer <token>"
+    allowed_addresses: tuple = ("127.0.0.1", "::1")  # endereços que acedem sem token
+
+
+@functools.cache
+def metrics_config() -> MetricsConfig:
+    from persistence.session import config_section
+
+    section = config_section("metrics")
+    defaults = MetricsConfig()
+    if section is None:
+        return defaults
+
+    addresses = section.get("allowed_addresses")
+    return MetricsConfig(
+        token=section.get("token", defaults.token),
+        allowed_addresses=(
+            tuple(a.strip() for a in addresses.split(",") if a.strip())
+            if addresses is not None else defaults.allowed_addresses
+        ),
+    )
+
+
+def metrics_allowed(remote_addr, authorization=None, config: MetricsConfig = None) -> bool:
+    """/metrics só responde a endereços internos ou a pedidos com o token configurado."""
+    config = config or metrics_config()
+    if remote_addr in config.allowed_addresses:
+        return True
+
+    if not config.token or not authorization:
+        return False
+    scheme, _, token = authorization.partition(" ")
+    return scheme.lower() == "bearer" and secrets.compare_digest(token.strip(), config.token)
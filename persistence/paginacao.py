@@ -0,0 +1,135 @@
+# persistence/paginacao.py
+"""
+Cursores de paginação por chave (keyset).
+
+Uma página é pedida a partir da chave de ordenação da última (ou primeira)
+linha da página anterior, em vez de um OFFSET: o custo não cresce com o número
+da página e as linhas não saltam quando a tabela muda entre pedidos.
+
+Para o browser o cursor é um token opaco (JSON da chave em base64 url-safe).
+"""
+import base64
+import binascii
+import datetime
+import json
+from typing import Callable, NamedTuple, Optional, Sequence
+
+
+class Pagina(NamedTuple):
+    linhas: list
+    total: Optional[int]
+    anterior: Optional[str]     # cursor para a página anterior (None na primeira)
+    seguinte: Optional[str]     # cursor para a página seguinte (None na última)
+    aproximado: bool = False    # total estimado pelos metadados da tabela
+
+
+def _valor_json(valor):
+    # Datas em ISO 8601 com 'T': o SQL Server converte-as sem depender da língua da sessão
+    if isinstance(valor, datetime.datetime):
+        return valor.isoformat(timespec="milliseconds")
+    if isinstance(valor, datetime.date):
+        return valor.isoformat()
+    return str(valor)
+
+
+def codificar_cursor(*valores) -> str:
+    dados = json.dumps(list(valores), separators=(",", ":"), ensure_ascii=False, default=_valor_json)
+    return base64.urlsafe_b64encode(dados.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def descodificar_cursor(token: Optional[str], campos: int) -> Optional[tuple]:
+    """Chave do cursor com `campos` valores, ou None se o token faltar ou for inválido."""
+    if not token:
+        return None
+    try:
+        dados = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        valores = json.loads(dados.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(valores, list) or len(valores) != campos:
+        return None
+    return tuple(valores)
+
+
+def condicao_keyset(colunas: Sequence[str], operador: str) -> str:
+    """
+    (a, b, c) > (?, ?, ?) escrito só com comparações simples, que usam o índice.
+    Com mais de uma coluna leva à frente o limite redundante a >= ?: sem ele o
+    SQL Server tende a ler o índice todo com o OR como predicado residual, em vez
+    de um seek a partir do cursor.
+    """
+    partes = []
+    for i, coluna in enumerate(colunas):
+        iguais = [f"{c} = ?" for c in colunas[:i]]
+        partes.append("(" + " AND ".join(iguais + [f"{coluna} {operador} ?"]) + ")")
+    condicao = "(" + " OR ".join(partes) + ")"
+    if len(colunas) > 1:
+        condicao = f"({colunas[0]} {operador}= ? AND {condicao})"
+    return condicao
+
+
+def parametros_keyset(chave: Sequence) -> list:
+    """Parâmetros de condicao_keyset pela ordem em que aparecem."""
+    limite = [chave[0]] if len(chave) > 1 else []
+    return limite + [valor for i in range(len(chave)) for valor in chave[:i + 1]]
+
+
+def pagina_keyset(
+    cursor,
+    origem: str,
+    campos: str,
+    chave: Sequence[str],
+    tamanho: int,
+    depois: Optional[str] = None,
+    antes: Optional[str] = None,
+    descendente: bool = False,
+    converter: Callable = lambda row: row,
+    total: Optional[int] = None,
+    aproximado: bool = False,
+) -> Pagina:
+    """
+    Uma página de `origem` ordenada pelas colunas `chave` (todas ASC ou todas
+    DESC), a seguir ao cursor `depois` ou antes do cursor `antes`. As colunas
+    da chave têm de estar em `campos`; os cursores devolvidos são os valores
+    da chave da primeira e da última linha.
+    """
+    chave_depois = descodificar_cursor(depois, len(chave))
+    chave_antes = descodificar_cursor(antes, len(chave)) if chave_depois is None else None
+    para_tras = chave_antes is not None
+    referencia = chave_antes if para_tras else chave_depois
+
+    # Para trás lê-se pela ordem inversa e invertem-se as linhas no fim
+    ascendente = descendente == para_tras
+    condicao, parametros = "", []
+    if referencia is not None:
+        condicao = "WHERE " + condicao_keyset(chave, ">" if ascendente else "<")
+        parametros = parametros_keyset(referencia)
+    ordem = ", ".join(f"{c} {'ASC' if ascendente else 'DESC'}" for c in chave)
+
+    # Uma linha a mais para saber se há mais páginas nesse sentido
+    cursor.execute(f"""
+        SELECT TOP (?) {campos}
+        FROM {origem}
+        {condicao}
+        ORDER BY {ordem}
+    """, tamanho + 1, *parametros)
+    rows = cursor.fetchall()
+
+    mais = len(rows) > tamanho
+    rows = rows[:tamanho]
+    if para_tras:
+        rows.reverse()
+        tem_anterior, tem_seguinte = mais, True
+    else:
+        tem_anterior, tem_seguinte = referencia is not None, mais
+
+    def token(row):
+        return codificar_cursor(*(getattr(row, c) for c in chave))
+
+    return Pagina(
+        [converter(row) for row in rows],
+        total,
+        token(rows[0]) if rows and tem_anterior else None,
+        token(rows[-1]) if rows and tem_seguinte else None,
+        aproximado,
+    )
@@ -0,0 +1,220 @@
+# persistence/player_search.py
+"""
+Pesquisa de jogadores em memória (por nome do jogador ou do clube).
+
+O índice é construído com o catálogo de jogadores (persistence/players.py) e
+substituído com ele quando a tabela Jogador muda, por isso uma pesquisa não
+faz nenhuma consulta à BD.
+
+Os nomes são normalizados sem acentos e sem maiúsculas ("Müller" -> "muller",
+"Sørloth" -> "sorloth"). Cada palavra da pesquisa tem de corresponder a uma
+palavra do jogador ou do clube:
+    - por prefixo, numa lista ordenada de palavras (bisect);
+    - se o prefixo não chegar para encher a resposta, por semelhança de
+      trigramas ("mbape" encontra "mbappe").
+
+Termos com menos de `TERMO_MINIMO` letras ("a", "ro") correspondem a milhares
+de jogadores, por isso nunca são percorridos sozinhos: numa pesquisa com um
+termo mais longo só filtram os candidatos desse termo; numa pesquisa só com
+termos curtos os candidatos são no máximo `MAX_CANDIDATOS_CURTOS`, primeiro os
+nomes completos que começam pela pesquisa (os que ficam à frente no ranking).
+
+`python bench_player_search.py` mede o tempo por pesquisa num catálogo sintético.
+"""
+import bisect
+import heapq
+import unicodedata
+from collections import defaultdict
+from typing import Iterable, NamedTuple, Optional
+
+# Letras que não se decompõem num carácter base + acento
+_LETRAS = str.maketrans({
+    "ø": "o", "æ": "ae", "œ": "oe", "ß": "ss", "ð": "d", "đ": "d",
+    "ł": "l", "þ": "th", "ı": "i", "ħ": "h",
+})
+
+# Semelhança mínima (Jaccard dos trigramas) para aceitar uma palavra aproximada
+SEMELHANCA_MINIMA = 0.35
+
+# Termos mais curtos só filtram candidatos (e não têm trigramas úteis)
+TERMO_MINIMO = 3
+MAX_CANDIDATOS_CURTOS = 200
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sem acentos e só com letras/dígitos separados por um espaço."""
+    texto = unicodedata.normalize("NFKD", texto.casefold().translate(_LETRAS))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join("".join(c if c.isalnum() else " " for c in texto).split())
+
+
+def trigramas(palavra: str) -> set[str]:
+    palavra = f"  {palavra} "
+    return {palavra[i:i + 3] for i in range(len(palavra) - 2)}
+
+
+class Resultado(NamedTuple):
+    jogador: object     # PlayerDescriptor
+    clube: Optional[str]
+    pontuacao: float
+
+
+class PlayerSearchIndex:
+    def __init__(self, entradas: Iterable[tuple[object, Optional[str]]]):
+        """`entradas`: pares (PlayerDescriptor, nome do clube)."""
+        self._entradas = tuple(entradas)
+        self._nomes = [normalizar(jogador.nome) for jogador, _ in self._entradas]
+        # Desempate dos resultados: nome normalizado e id
+        self._ordem = [
+            (nome, str(jogador.id)) for nome, (jogador, _) in zip(self._nomes, self._entradas)
+        ]
+
+        # Jogadores pela ordem do nome completo, para os prefixos curtos
+        self._por_nome = sorted(range(len(self._entradas)), key=self._ordem.__getitem__)
+        self._nomes_ordenados = [self._nomes[i] for i in self._por_nome]
+
+        # palavra -> jogadores com essa palavra no nome / no clube
+        no_nome, no_clube = defaultdict(set), defaultdict(set)
+        self._palavras_de = []
+        for i, (jogador, clube) in enumerate(self._entradas):
+            do_nome, do_clube = self._nomes[i].split(), normalizar(clube or "").split()
+            self._palavras_de.append((tuple(do_nome), tuple(do_clube)))
+            for palavra in do_nome:
+                no_nome[palavra].add(i)
+            for palavra in do_clube:
+                no_clube[palavra].add(i)
+
+        self._palavras = sorted(no_nome.keys() | no_clube.keys())
+        self._no_nome = [tuple(no_nome.get(p, ())) for p in self._palavras]
+        self._no_clube = [tuple(no_clube.get(p, ())) for p in self._palavras]
+
+        self._trigramas = [len(trigramas(p)) for p in self._palavras]
+        indice = defaultdict(list)
+        for t, palavra in enumerate(self._palavras):
+            for trigrama in trigramas(palavra):
+                indice[trigrama].append(t)
+        self._por_trigrama = {trigrama: tuple(ts) for trigrama, ts in indice.items()}
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def _prefixo(self, termo: str) -> dict[int, float]:
+        i = bisect.bisect_left(self._palavras, termo)
+        j = bisect.bisect_left(self._palavras, termo + "\uffff", i)
+        pontos = {}
+        for t in range(i, j):
+            exata = self._palavras[t] == termo
+            self._marcar(pontos, t, 4.0 if exata else 3.0, 1.5 if exata else 1.0)
+        return pontos
+
+    def _aproximado(self, termo: str) -> dict[int, float]:
+        do_termo = trigramas(termo)
+        comuns = defaultdict(int)
+        for trigrama in do_termo:
+            for t in self._por_trigrama.get(trigrama, ()):
+                comuns[t] += 1
+
+        pontos = {}
+        for t, n in comuns.items():
+            semelhanca = n / (len(do_termo) + self._trigramas[t] - n)
+            if semelhanca >= SEMELHANCA_MINIMA:
+                self._marcar(pontos, t, 2.0 * semelhanca, semelhanca)
+        return pontos
+
+    def _curto(self, termo: str, candidatos: Iterable[int]) -> dict[int, float]:
+        """Pontos de um termo curto só nos `candidatos` (os mesmos de _prefixo)."""
+        pontos = {}
+        for i in candidatos:
+            do_nome, do_clube = self._palavras_de[i]
+            p = max((4.0 if w == termo else 3.0 for w in do_nome if w.startswith(termo)), default=0.0) or \
+                max((1.5 if w == termo else 1.0 for w in do_clube if w.startswith(termo)), default=0.0)
+            if p:
+                pontos[i] = p
+        return pontos
+
+    def _candidatos_curtos(self, consulta: str, termo: str) -> list[int]:
+        """
+        Até MAX_CANDIDATOS_CURTOS jogadores para uma pesquisa só com termos curtos:
+        primeiro os de nome completo a começar pela pesquisa, depois os que têm uma
+        palavra (no nome ou no clube) a começar pelo primeiro termo.
+        """
+        candidatos = {}
+        k = bisect.bisect_left(self._nomes_ordenados, consulta)
+        while (k < len(self._nomes_ordenados) and len(candidatos) < MAX_CANDIDATOS_CURTOS
+               and self._nomes_ordenados[k].startswith(consulta)):
+            candidatos[self._por_nome[k]] = None
+            k += 1
+
+        t = bisect.bisect_left(self._palavras, termo)
+        while (t < len(self._palavras) and len(candidatos) < MAX_CANDIDATOS_CURTOS
+               and self._palavras[t].startswith(termo)):
+            for i in self._no_nome[t] + self._no_clube[t]:
+                candidatos[i] = None
+            t += 1
+        return list(candidatos)[:MAX_CANDIDATOS_CURTOS]
+
+    def _marcar(self, pontos: dict[int, float], t: int, no_nome: float, no_clube: float):
+        obter = pontos.get
+        for i in self._no_nome[t]:
+            if obter(i, 0.0) < no_nome:
+                pontos[i] = no_nome
+        for i in self._no_clube[t]:
+            if obter(i, 0.0) < no_clube:
+                pontos[i] = no_clube
+
+    def _combinar(self, por_termo: list[dict[int, float]]) -> dict[int, float]:
+        # Todos os termos têm de corresponder: parte-se do conjunto mais pequeno
+        por_termo = sorted(por_termo, key=len)
+        total = dict(por_termo[0])
+        for pontos in por_termo[1:]:
+            total = {i: p + pontos[i] for i, p in total.items() if i in pontos}
+            if not total:
+                break
+        return total
+
+    def _filtrar_curtos(self, pontos: dict[int, float], curtos: list[str]) -> dict[int, float]:
+        for termo in curtos:
+            if not pontos:
+                break
+            pontos = self._combinar([pontos, self._curto(termo, pontos)])
+        return pontos
+
+    def search(self, query: str, limit: int = 10) -> list[Resultado]:
+        consulta = normalizar(query)
+        if not consulta or limit <= 0:
+            return []
+        termos = consulta.split()
+        longos = [termo for termo in termos if len(termo) >= TERMO_MINIMO]
+        curtos = [termo for termo in termos if len(termo) < TERMO_MINIMO]
+
+        if not longos:
+            candidatos = self._candidatos_curtos(consulta, termos[0])
+            pontos = self._combinar([self._curto(termo, candidatos) for termo in termos])
+        else:
+            prefixos = [self._prefixo(termo) for termo in longos]
+            pontos = self._filtrar_curtos(self._combinar(prefixos), curtos)
+
+            if len(pontos) < limit:
+                # Prefixo mais trigramas, guardando o melhor dos dois
+                alargados = []
+                for termo, exatos in zip(longos, prefixos):
+                    aproximados = self._aproximado(termo)
+                    for i, p in exatos.items():
+                        if aproximados.get(i, 0.0) < p:
+                            aproximados[i] = p
+                    alargados.append(aproximados)
+                pontos = self._filtrar_curtos(self._combinar(alargados), curtos)
+
+        # Nome completo a começar pela pesquisa (p.ex. "cristiano ro") fica à frente
+        for i in pontos:
+            if self._nomes[i].startswith(consulta):
+                pontos[i] += 1.0
+
+        ordem = self._ordem
+        melhores = heapq.nsmallest(
+            limit, pontos.items(), key=lambda item: (-item[1], ordem[item[0]])
+        )
+        return [
+            Resultado(self._entradas[i][0], self._entradas[i][1], round(p, 3))
+            for i, p in melhores
+        ]
@@ -1,7 +1,16 @@
-from typing import NamedTuple
+import bisect
+import functools
+import heapq
+import threading
+import time
+from types import MappingProxyType
+from typing import Collection, Mapping, NamedTuple, Optional
 
 from pyodbc import IntegrityError
-from persistence.session import create_connection
+from persistence.contagens import CacheContagens, contar_listagem
+from persistence.player_search import PlayerSearchIndex
+from persistence.paginacao import Pagina, pagina_keyset
+from persistence.session import config_section, create_connection
 
 
 # --- DATA MODELS ---
@@ -37,29 +46,357 @@ class PlayerStats(NamedTuple):
     tempo_jogo: int
 
 
+class PickPage(NamedTuple):
+    players: list[PlayerDescriptor]
+    total: int          # jogadores que cumprem os filtros
+    page: int
+    pages: int
+
+
+class PositionIndex:
+    """
+    Jogadores de uma posição ordenados por preço e por nome (imutável, criado
+    com o catálogo). "Preço <= orçamento" e "nome começa por" são intervalos
+    encontrados por pesquisa binária; os jogadores a excluir (o plantel, no
+    máximo 15) são saltados sem percorrer o resto da lista.
+
+    Na ordem por nome o orçamento não é um intervalo: a lista está dividida em
+    blocos de BLOCO jogadores com os preços de cada bloco ordenados, por isso
+    quantos jogadores de um bloco cabem no orçamento é uma pesquisa binária e
+    os blocos antes da página são saltados sem ver os jogadores um a um.
+
+    Com prefixo e ordem por preço, uma merge sort tree sobre by_name guarda, em
+    cada nó, as posições em by_price dos seus jogadores por ordem: o intervalo
+    do prefixo são O(log n) nós, o início da página encontra-se por pesquisa
+    binária nas contagens desses nós e a página é uma junção das suas listas.
+    """
+
+    BLOCO = 64
+
+    def __init__(self, players: Collection[PlayerDescriptor]):
+        self.by_price = tuple(sorted(players, key=lambda p: (p.preco, p.nome.casefold(), str(p.id))))
+        self.by_name = tuple(sorted(players, key=lambda p: (p.nome.casefold(), str(p.id))))
+        self._prices = [p.preco for p in self.by_price]
+        self._names = [p.nome.casefold() for p in self.by_name]
+        self._price_pos = {str(p.id): i for i, p in enumerate(self.by_price)}
+        self._name_pos = {str(p.id): i for i, p in enumerate(self.by_name)}
+        # Posição de cada jogador de by_name em by_price (ordem por preço dentro de um prefixo)
+        self._name_to_price = [self._price_pos[str(p.id)] for p in self.by_name]
+        # Merge sort tree: nó k cobre os nós 2k e 2k+1; as folhas (n + i) são by_name[i]
+        n = len(self.by_name)
+        self._price_tree: list[list[int]] = [[] for _ in range(n)] + [[pos] for pos in self._name_to_price]
+        for k in range(n - 1, 0, -1):
+            self._price_tree[k] = list(heapq.merge(self._price_tree[2 * k], self._price_tree[2 * k + 1]))
+        self._name_blocks = [
+            sorted(p.preco for p in self.by_name[i:i + self.BLOCO])
+            for i in range(0, len(self.by_name), self.BLOCO)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.by_price)
+
+    def _price_range(self, budget: Optional[float]) -> tuple[int, int]:
+        return 0, len(self._prices) if budget is None else bisect.bisect_right(self._prices, budget)
+
+    def _name_range(self, prefix: str) -> tuple[int, int]:
+        prefix = prefix.casefold()
+        if not prefix:
+            return 0, len(self._names)
+        return bisect.bisect_left(self._names, prefix), bisect.bisect_left(self._names, prefix + "\U0010ffff")
+
+    def _affordable(self, inicio: int, fim: int, budget: Optional[float]) -> int:
+        """Jogadores de by_name[inicio:fim] com preço <= `budget`."""
+        if budget is None:
+            return max(0, fim - inicio)
+        total, i = 0, inicio
+        while i < fim:
+            b = i // self.BLOCO
+            fim_bloco = min(fim, (b + 1) * self.BLOCO)
+            if i == b * self.BLOCO and fim_bloco == (b + 1) * self.BLOCO:
+                total += bisect.bisect_right(self._name_blocks[b], budget)
+            else:
+                total += sum(1 for k in range(i, fim_bloco) if self.by_name[k].preco <= budget)
+            i = fim_bloco
+        return total
+
+    @staticmethod
+    def _page(ordered, fim: int, excluded: set[int], start: int, count: int, descending: bool):
+        """
+        `count` jogadores a partir da posição `start` (já sem os excluídos) de
+        ordered[:fim], do fim para o início se `descending`. `excluded` são índices
+        de `ordered`; como são poucos, passa-se da posição filtrada para o índice
+        real somando os excluídos que ficam antes, sem percorrer a lista.
+        """
+        def real(d):
+            return fim - 1 - d if descending else d
+
+        antes = sorted(fim - 1 - i if descending else i for i in excluded)
+        d = start
+        for e in antes:
+            if e <= d:
+                d += 1
+
+        result = []
+        while d < fim and len(result) < count:
+            if real(d) not in excluded:
+                result.append(ordered[real(d)])
+            d += 1
+        return result
+
+    def _name_page(
+        self, inicio: int, fim: int, budget: Optional[float], excluded: set[int], start: int, count: int
+    ) -> list[PlayerDescriptor]:
+        """
+        Como _page, para by_name[inicio:fim] com preço <= `budget`: os blocos
+        inteiros que ficam antes da página são saltados pela contagem do bloco.
+        """
+        excluidos_bloco: dict[int, int] = {}
+        for e in excluded:
+            excluidos_bloco[e // self.BLOCO] = excluidos_bloco.get(e // self.BLOCO, 0) + 1
+
+        result, i = [], inicio
+        while i < fim and len(result) < count:
+            b = i // self.BLOCO
+            if i == b * self.BLOCO and (b + 1) * self.BLOCO <= fim:
+                n = self._affordable(i, i + self.BLOCO, budget) - excluidos_bloco.get(b, 0)
+                if start >= n:
+                    start -= n
+                    i += self.BLOCO
+                    continue
+            p = self.by_name[i]
+            if i not in excluded and (budget is None or p.preco <= budget):
+                if start:
+                    start -= 1
+                else:
+                    result.append(p)
+            i += 1
+        return result
+
+    def _name_nodes(self, inicio: int, fim: int) -> list[list[int]]:
+        """Nós da merge sort tree que cobrem by_name[inicio:fim] (no máximo 2 por nível)."""
+        n = len(self.by_name)
+        nodes, l, r = [], inicio + n, fim + n
+        while l < r:
+            if l & 1:
+                nodes.append(self._price_tree[l])
+                l += 1
+            if r & 1:
+                r -= 1
+                nodes.append(self._price_tree[r])
+            l, r = l >> 1, r >> 1
+        return nodes
+
+    def _prefix_price_page(
+        self, inicio: int, fim: int, limite: int, excluded: set[int], start: int, count: int
+    ) -> list[PlayerDescriptor]:
+        """
+        `count` jogadores de by_name[inicio:fim] com posição em by_price < `limite`
+        (o orçamento), do mais caro para o mais barato, a partir da posição `start`.
+        """
+        nodes = self._name_nodes(inicio, fim)
+        excl = sorted(self._name_to_price[i] for i in excluded)
+
+        def acima(v: int) -> int:
+            # Jogadores não excluídos com v <= posição < limite
+            total = sum(bisect.bisect_left(node, limite) - bisect.bisect_left(node, v) for node in nodes)
+            return total - (len(excl) - bisect.bisect_left(excl, v))
+
+        # Menor posição `corte` com no máximo `start` jogadores acima: a página começa logo abaixo
+        lo, hi = 0, limite
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if acima(mid) <= start:
+                hi = mid
+            else:
+                lo = mid + 1
+
+        def descendo(node):
+            for k in range(bisect.bisect_left(node, lo) - 1, -1, -1):
+                yield node[k]
+
+        excl = set(excl)
+        result = []
+        for pos in heapq.merge(*map(descendo, nodes), reverse=True):
+            if pos in excl:
+                continue
+            result.append(self.by_price[pos])
+            if len(result) == count:
+                break
+        return result
+
+    def pick(
+        self,
+        budget: Optional[float] = None,
+        exclude: Collection[str] = (),
+        page: int = 1,
+        per_page: int = 20,
+        order: str = "price",
+        prefix: str = "",
+    ) -> PickPage:
+        """
+        Página de jogadores com preço <= `budget`, sem os de `exclude` (ids).
+        order="price" lista do mais caro para o mais barato; order="name" por
+        ordem alfabética; com `prefix`, só os nomes começados por ele, na ordem pedida.
+        """
+        exclude = {str(i) for i in exclude}
+
+        if order == "name" or prefix:
+            inicio, fim = self._name_range(prefix)
+            # Só contam os excluídos que estão no intervalo e cabem no orçamento
+            excluded = {
+                i for i in map(self._name_pos.get, exclude)
+                if i is not None and inicio <= i < fim and (budget is None or self.by_name[i].preco <= budget)
+            }
+            total = self._affordable(inicio, fim, budget) - len(excluded)
+        else:
+            _, fim = self._price_range(budget)
+            excluded = {i for i in map(self._price_pos.get, exclude) if i is not None and i < fim}
+            total = fim - len(excluded)
+
+        pages = max(1, -(-total // per_page))
+        page = min(max(page, 1), pages)
+        start = (page - 1) * per_page
+
+        if order == "name":
+            players = self._name_page(inicio, fim, budget, excluded, start, per_page)
+        elif prefix:
+            _, limite = self._price_range(budget)
+            players = self._prefix_price_page(inicio, fim, limite, excluded, start, per_page)
+        else:
+            players = self._page(self.by_price, fim, excluded, start, per_page, True)
+        return PickPage(players, total, page, pages)
+
+
+class PlayerCatalog(NamedTuple):
+    version: tuple
+    players: tuple[PlayerDescriptor, ...]
+    by_position: Mapping[str, tuple[PlayerDescriptor, ...]]
+    by_id: Mapping[str, PlayerDescriptor]
+    index: Mapping[str, PositionIndex]
+    search: PlayerSearchIndex
+
+
+# --- CATÁLOGO EM CACHE ---
+#
+# O catálogo (JogadorCompleto) só muda quando mudam preços, estados ou plantéis.
+# Fica em memória, partilhado por todo o processo, e só é relido quando a versão
+# de Jogador (COUNT + MAX(Versao), ver indexes.sql) muda. A versão é verificada
+# no máximo de `check_interval` em `check_interval` segundos; entre verificações
+# não há nenhuma consulta. Quem altera jogadores neste processo pode chamar
+# invalidate_catalog() para a alteração aparecer logo.
+#
+# Configuração (secção opcional [catalog] do conf.ini):
+#     check_interval = 5    ; segundos
+
+class CatalogConfig(NamedTuple):
+    check_interval: float = 5.0
+
+
+@functools.cache
+def catalog_config() -> CatalogConfig:
+    section = config_section("catalog")
+    defaults = CatalogConfig()
+    if section is None:
+        return defaults
+
+    return CatalogConfig(
+        check_interval=section.getfloat("check_interval", defaults.check_interval),
+    )
+
+
+_catalog_lock = threading.Lock()
+_catalog: Optional[PlayerCatalog] = None
+_checked_at: Optional[float] = None
+
+# Número de jogadores da listagem paginada: descartado quando a versão de
+# Jogador muda (ou pelo ttl de [counts], se ninguém pedir o catálogo)
+_player_counts = CacheContagens()
+
+
+def _catalog_version(cursor) -> tuple:
+    cursor.execute("SELECT COUNT_BIG(*), MAX(Versao) FROM FantasyChamp.Jogador")
+    count, version = cursor.fetchone()
+    return count, bytes(version) if version is not None else None
+
+
+def _load_catalog(cursor, version: tuple) -> PlayerCatalog:
+    cursor.execute("""
+        SELECT JC.ID, JC.Nome, JC.Posicao, JC.Preço, JC.jogador_imagem, JC.Estado,
+               C.Nome AS Clube_Nome
+        FROM FantasyChamp.JogadorCompleto JC
+        LEFT JOIN FantasyChamp.Clube C ON C.ID = JC.ID_clube
+    """)
+
+    entries = [
+        (
+            PlayerDescriptor(
+                row.ID,
+                row.Nome,
+                row.Posicao,
+                row.Preço,
+                row.jogador_imagem if row.jogador_imagem
+                else '/static/images/Image-not-found.png',
+                row.Estado
+            ),
+            row.Clube_Nome,
+        )
+        for row in cursor
+    ]
+    players = tuple(player for player, _ in entries)
+
+    by_position = {}
+    for player in players:
+        by_position.setdefault(player.posicao, []).append(player)
+
+    return PlayerCatalog(
+        version,
+        players,
+        MappingProxyType({pos: tuple(lista) for pos, lista in by_position.items()}),
+        MappingProxyType({str(player.id): player for player in players}),
+        MappingProxyType({pos: PositionIndex(lista) for pos, lista in by_position.items()}),
+        PlayerSearchIndex(entries),
+    )
+
+
+def get_catalog() -> PlayerCatalog:
+    global _catalog, _checked_at
+
+    catalog, checked_at = _catalog, _checked_at
+    if catalog is not None and checked_at is not None \
+            and time.monotonic() - checked_at < catalog_config().check_interval:
+        return catalog
+
+    # Um só pedido verifica/relê; os outros esperam e usam o resultado
+    with _catalog_lock:
+        if _catalog is not None and _checked_at is not None \
+                and time.monotonic() - _checked_at < catalog_config().check_interval:
+            return _catalog
+
+        with create_connection() as conn:
+            cursor = conn.cursor()
+            version = _catalog_version(cursor)
+            if _catalog is None or version != _catalog.version:
+                if _catalog is not None:
+                    _player_counts.invalidar()
+                _catalog = _load_catalog(cursor, version)
+
+        _checked_at = time.monotonic()
+        return _catalog
+
+
+def invalidate_catalog():
+    """Descarta o catálogo: a próxima leitura volta a carregar JogadorCompleto."""
+    global _catalog, _checked_at
+    with _catalog_lock:
+        _catalog = None
+        _checked_at = None
+    _player_counts.invalidar()
+
+
 # --- CRUD FUNCTIONS ---
 
 def list_all() -> list[PlayerDescriptor]:
-    with create_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT ID, Nome, Posicao, Preço, jogador_imagem, Estado
-            FROM FantasyChamp.JogadorCompleto
-        """)
-
-        return list(map(
-            lambda row:
-                PlayerDescriptor(
-                    row.ID,
-                    row.Nome,
-                    row.Posicao,
-                    row.Preço,
-                    row.jogador_imagem if row.jogador_imagem
-                    else '/static/images/Image-not-found.png',
-                    row.Estado
-                ),
-            cursor
-        ))
+    return list(get_catalog().players)
 
 
 def read(j_id: str):
@@ -145,36 +482,37 @@ def get_player_stats(j_id: str) -> tuple[list[PlayerStats], int]:
         return stats, total_pontos
 
 
-def list_paginated(page: int, per_page: int) -> tuple[list[PlayerDescriptor], int]:
-    offset = (page - 1) * per_page
+def _player_descriptor(row) -> PlayerDescriptor:
+    return PlayerDescriptor(
+        row.ID,
+        row.Nome,
+        row.Posicao,
+        row.Preço,
+        row.jogador_imagem if row.jogador_imagem
+        else '/static/images/Image-not-found.png',
+        row.Estado
+    )
+
 
+def list_paginated(
+    per_page: int, depois: Optional[str] = None, antes: Optional[str] = None
+) -> Pagina:
+    """Página de jogadores por nome, a seguir (ou antes) de um cursor (Nome, ID)."""
     with create_connection() as conn:
         cursor = conn.cursor()
 
-        # total de jogadores (usando VIEW)
-        cursor.execute("SELECT COUNT(*) FROM FantasyChamp.PlayerCompleto;")
-        total = cursor.fetchone()[0]
+        # Total em cache (ver persistence/contagens.py)
+        total, aproximado = contar_listagem(_player_counts, cursor, "FantasyChamp.PlayerCompleto", "FantasyChamp.Jogador")
 
-        # query paginada usando parâmetros seguros
-        cursor.execute("""
-            SELECT ID, Nome, Posicao, Preço, jogador_imagem, Estado
-            FROM FantasyChamp.PlayerCompleto
-            ORDER BY Nome
-            OFFSET ? ROWS FETCH NEXT ? ROWS ONLY;
-        """, (offset, per_page))
-
-        # Processar resultados
-        jogadores = list(map(
-            lambda row: PlayerDescriptor(
-                row.ID,
-                row.Nome,
-                row.Posicao,
-                row.Preço,
-                row.jogador_imagem if row.jogador_imagem
-                else '/static/images/Image-not-found.png',
-                row.Estado
-            ),
-            cursor
-        ))
-
-    return jogadores, total
\ No newline at end of file
+        return pagina_keyset(
+            cursor,
+            "FantasyChamp.PlayerCompleto",
+            "ID, Nome, Posicao, Preço, jogador_imagem, Estado",
+            ("Nome", "ID"),
+            per_page,
+            depois,
+            antes,
+            converter=_player_descriptor,
+            total=total,
+            aproximado=aproximado,
+        )
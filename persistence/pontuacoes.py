@@ -1,4 +1,14 @@
+import time
+
+from persistence import ranking_stream
 from persistence.session import create_connection
+from persistence.roundtrips import track
+from persistence.scoring import (
+    atualizar_pontuacoes_em_massa,
+    atualizar_pontuacoes_particionado,
+    gerar_classificacoes,
+    recalcular_alteracoes,
+)
 import pyodbc
 
 # Função para calcular a pontuação de um jogador usando stored procedure
@@ -126,53 +136,60 @@ def atualizar_pontuacao_equipa_tabela(id_equipa: str, id_jornada: str):
             conn.rollback()
             raise e
 
-# Função para atualizar a pontuação de todos os jogadores e equipas
+# Função para atualizar a pontuação de todas as equipas em todas as jornadas
+# (motor em massa: uma leitura, cálculo em memória e um único MERGE)
 def atualizar_pontuacoes():
 
-    with create_connection() as conn:
-        cursor = conn.cursor()
-        
+    with track("atualizar_pontuacoes"):
         try:
-            # Obter todas as jornadas
-            cursor.execute("SELECT ID FROM FantasyChamp.Jornada ORDER BY Numero")
-            jornadas = cursor.fetchall()
-            
-            if not jornadas:
-                print("Nenhuma jornada encontrada")
-                return
-            
-            # Obter todas as equipas
-            cursor.execute("SELECT ID FROM FantasyChamp.Equipa")
-            equipas = cursor.fetchall()
-            
-            if not equipas:
-                print("Nenhuma equipa encontrada")
-                return
-            
-            print(f"Atualizando pontuações para {len(equipas)} equipas em {len(jornadas)} jornadas...")
-            
-            for i, equipa in enumerate(equipas, 1):
-                equipa_id = equipa.ID
-                print(f"Processando equipa {i}/{len(equipas)}: {equipa_id}")
-                
-                for jornada in jornadas:
-                    id_jornada = jornada.ID
-                    try:
-                        # Atualizar pontuação da equipa para esta jornada
-                        mensagem = atualizar_pontuacao_equipa_tabela(equipa_id, id_jornada)
-                        print(f"  Jornada {id_jornada}: {mensagem}")
-                        
-                    except Exception as e:
-                        print(f"  Erro na jornada {id_jornada}: {str(e)}")
-                        continue
-            
-            print("Atualização de pontuações concluída!")
+            inicio = time.perf_counter()
+            alteradas = atualizar_pontuacoes_em_massa()
+            duracao = time.perf_counter() - inicio
+
+            print(f"Atualização de pontuações concluída! {alteradas} registos alterados em {duracao:.2f}s")
+            ranking_stream.notificar()
             
         except pyodbc.Error as e:
             print(f"Erro de banco de dados: {str(e)}")
         except Exception as e:
             print(f"Erro: {str(e)}")
 
+# Função para atualizar todas as pontuações em paralelo (várias partições de equipas,
+# cada uma num processo com a sua conexão); workers=None usa a secção [scoring]
+def atualizar_pontuacoes_paralelo(workers=None):
+
+    try:
+        resultado = atualizar_pontuacoes_particionado(workers)
+
+        print(f"Atualização paralela concluída! {resultado.equipas} equipas, "
+              f"{resultado.alteradas} registos alterados em {resultado.duracao:.2f}s")
+        if resultado.falhadas:
+            print(f"{len(resultado.falhadas)} partições falharam e foram revertidas")
+        ranking_stream.notificar()
+
+    except pyodbc.Error as e:
+        print(f"Erro de banco de dados: {str(e)}")
+    except Exception as e:
+        print(f"Erro: {str(e)}")
+
+# Função para recalcular só as equipas afetadas por estatísticas novas ou corrigidas
+# (lidas da tabela Pontuação_Jogador_Alterada, preenchida por trigger)
+def atualizar_pontuacoes_alteradas():
+
+    with track("atualizar_pontuacoes_alteradas"):
+        try:
+            inicio = time.perf_counter()
+            equipas, alteradas = recalcular_alteracoes()
+            duracao = time.perf_counter() - inicio
+
+            print(f"{equipas} equipas recalculadas, {alteradas} registos alterados em {duracao:.2f}s")
+            ranking_stream.notificar()
+
+        except pyodbc.Error as e:
+            print(f"Erro de banco de dados: {str(e)}")
+        except Exception as e:
+            print(f"Erro: {str(e)}")
+
 # Função para calcular a pontuação de um jogador específico para todas as suas jornadas
 def calcular_pontuacao_jogador_especifico(id_jogador: str):
 
@@ -257,7 +274,8 @@ def obter_pontuacoes_jornadas(id_equipa: str):
             return []
 
 # Função para calcular e atualizar pontuações de forma otimizada
-def atualizar_pontuacoes_otimizado():
+# (numero_desde: recalcular só essa jornada e as seguintes)
+def atualizar_pontuacoes_otimizado(numero_desde=None):
  
     with create_connection() as conn:
         cursor = conn.cursor()
@@ -269,10 +287,11 @@ def atualizar_pontuacoes_otimizado():
                 
                 EXEC sp_AtualizarPontuacoesBatch 
                     @Resultado = @Resultado OUTPUT,
-                    @Mensagem = @Mensagem OUTPUT;
+                    @Mensagem = @Mensagem OUTPUT,
+                    @NumeroDesde = ?;
                 
                 SELECT @Resultado, @Mensagem;
-            """)
+            """, numero_desde)
             
             row = cursor.fetchone()
             
@@ -283,6 +302,7 @@ def atualizar_pontuacoes_otimizado():
                 if resultado == 0:
                     print(f"Erro: {mensagem}")
                 else:
+                    gerar_classificacoes(cursor, numero_desde, apenas_existentes=True)
                     print(f"Sucesso: {mensagem}")
             
             conn.commit()
@@ -0,0 +1,261 @@
+# persistence/ranking_stream.py
+"""
+Classificação das ligas em tempo real (Server-Sent Events).
+
+Para cada liga com subscritores há um único produtor em segundo plano que
+atualiza o leaderboard da liga (persistence/leaderboard.py) quando as
+pontuações mudam. Os browsers deixam de fazer polling a /liga/<id>: o custo
+passa a ser uma consulta por alteração.
+
+Cada subscritor só recebe as linhas que consegue mostrar: o top `top` da liga,
+as posições da página que está a ver e a linha da sua equipa. O produtor guarda
+as linhas enviadas a cada subscritor e manda só as diferenças, por isso numa
+liga grande (Mundial) cada alteração custa poucas linhas por subscritor.
+
+O produtor acorda quando alguém chama notificar() no mesmo processo (p.ex.
+depois de gravar pontuações ao vivo ou de um recálculo) e, para apanhar
+alterações feitas por outros processos (pontuacao_job.py), lê de
+`poll_interval` em `poll_interval` segundos a versão da liga em Versao_Liga
+(queries/table_VersaoLiga.sql), uma procura pela chave primária.
+
+Um produtor termina assim que fica sem subscritores, e nunca há mais do que
+`max_producers` ligas com produtor ao mesmo tempo.
+
+Configuração (secção opcional [ranking_stream] do conf.ini):
+    poll_interval = 5       ; segundos entre verificações da BD
+    keepalive = 15          ; segundos entre comentários keep-alive do SSE
+    queue_size = 100        ; mensagens em espera por subscritor
+    top = 10                ; linhas do topo enviadas a todos os subscritores
+    max_producers = 50      ; ligas acompanhadas em simultâneo (uma thread cada)
+"""
+import functools
+import logging
+import queue
+import threading
+from typing import NamedTuple, Optional
+
+from persistence.leaderboard import obter_leaderboard
+from persistence.session import config_section
+
+logger = logging.getLogger("fantasychamp.ranking_stream")
+
+
+class RankingStreamConfig(NamedTuple):
+    poll_interval: float = 5.0
+    keepalive: float = 15.0
+    queue_size: int = 100
+    top: int = 10
+    max_producers: int = 50
+
+
+@functools.cache
+def ranking_stream_config() -> RankingStreamConfig:
+    section = config_section("ranking_stream")
+    defaults = RankingStreamConfig()
+    if section is None:
+        return defaults
+
+    return RankingStreamConfig(
+        poll_interval=section.getfloat("poll_interval", defaults.poll_interval),
+        keepalive=section.getfloat("keepalive", defaults.keepalive),
+        queue_size=section.getint("queue_size", defaults.queue_size),
+        top=section.getint("top", defaults.top),
+        max_producers=section.getint("max_producers", defaults.max_producers),
+    )
+
+
+class ProdutoresEsgotados(Exception):
+    """Já há `max_producers` ligas com produtor; a subscrição deve ser recusada (503)."""
+
+
+class Mensagem(NamedTuple):
+    evento: str     # "ranking" (linhas visíveis completas) ou "delta"
+    dados: dict
+
+
+class Vista(NamedTuple):
+    """O que um subscritor está a ver: a sua equipa e as posições [inicio, fim] (base 1)."""
+    id_utilizador: Optional[str]
+    inicio: int
+    fim: int
+
+
+def _linha(equipa, minha: bool) -> dict:
+    return {
+        "id_equipa": equipa.id_equipa,
+        "posicao": equipa.posicao,
+        "nome_utilizador": equipa.nome_utilizador,
+        "nome_equipa": equipa.nome_equipa,
+        "pontuacao_acumulada": equipa.pontuacao_acumulada,
+        "minha": minha,
+    }
+
+
+def _linhas_visiveis(board, vista: Vista, top: int) -> dict[str, dict]:
+    equipas = board.top(top) + board.intervalo(vista.inicio - 1, vista.fim)
+    minha = board.equipa_de(vista.id_utilizador) if vista.id_utilizador is not None else None
+    if minha is not None:
+        equipas.append(minha)
+    id_minha = minha.id_equipa if minha is not None else None
+    return {e.id_equipa: _linha(e, e.id_equipa == id_minha) for e in equipas}
+
+
+def _diferencas(antes: dict[str, dict], depois: dict[str, dict]) -> Optional[dict]:
+    alteradas = [linha for id_equipa, linha in depois.items() if antes.get(id_equipa) != linha]
+    removidas = [id_equipa for id_equipa in antes if id_equipa not in depois]
+    if not alteradas and not removidas:
+        return None
+    return {"alteradas": alteradas, "removidas": removidas}
+
+
+class _Subscritor:
+    def __init__(self, vista: Vista, queue_size: int):
+        self.vista = vista
+        self.fila = queue.Queue(maxsize=queue_size)
+        self.enviadas: Optional[dict[str, dict]] = None    # None: ainda sem classificação
+
+
+class _ProdutorLiga:
+    def __init__(self, id_liga: str, config: RankingStreamConfig, parar_se_vazio):
+        self.id_liga = id_liga
+        self.config = config
+        self.parar_se_vazio = parar_se_vazio
+        self.subscritores: dict[queue.Queue, _Subscritor] = {}
+        self.lock = threading.Lock()    # subscritores + linhas enviadas a cada um
+        self.acordar = threading.Event()
+        self.parar = threading.Event()
+        self.thread = threading.Thread(
+            target=self._ciclo, name=f"ranking-stream-{id_liga}", daemon=True
+        )
+
+    def _enviar(self, subscritor: _Subscritor, mensagem: Mensagem, visiveis: dict[str, dict]):
+        fila = subscritor.fila
+        try:
+            fila.put_nowait(mensagem)
+        except queue.Full:
+            # Cliente demasiado lento: as mensagens em espera são trocadas
+            # pelas linhas visíveis atuais
+            logger.warning("Subscritor lento na liga %s; a ressincronizar", self.id_liga)
+            while True:
+                try:
+                    fila.get_nowait()
+                except queue.Empty:
+                    break
+            fila.put_nowait(Mensagem("ranking", {"ranking": list(visiveis.values())}))
+
+    def _atualizar_subscritor(self, board, subscritor: _Subscritor):
+        visiveis = _linhas_visiveis(board, subscritor.vista, self.config.top)
+        if subscritor.enviadas is None:
+            self._enviar(subscritor, Mensagem("ranking", {"ranking": list(visiveis.values())}), visiveis)
+        else:
+            delta = _diferencas(subscritor.enviadas, visiveis)
+            if delta:
+                self._enviar(subscritor, Mensagem("delta", delta), visiveis)
+        subscritor.enviadas = visiveis
+
+    def _atualizar(self):
+        board = obter_leaderboard(self.id_liga)
+        mudou = board.refrescar(forcar=True)
+
+        with self.lock:
+            for subscritor in list(self.subscritores.values()):
+                # Sem alterações só falta quem acabou de chegar
+                if mudou or subscritor.enviadas is None:
+                    self._atualizar_subscritor(board, subscritor)
+
+    def _ciclo(self):
+        while not self.parar.is_set():
+            try:
+                self._atualizar()
+            except Exception:
+                logger.exception("Erro ao atualizar a classificação da liga %s", self.id_liga)
+
+            self.acordar.wait(self.config.poll_interval)
+            self.acordar.clear()
+
+            # Rede de segurança: subscritores que desapareceram sem cancelar
+            if self.parar_se_vazio(self):
+                break
+
+
+class RankingBroadcaster:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._produtores: dict[str, _ProdutorLiga] = {}
+
+    def subscrever(
+        self,
+        id_liga: str,
+        id_utilizador: Optional[str] = None,
+        inicio: int = 1,
+        fim: Optional[int] = None,
+    ) -> queue.Queue:
+        """
+        Fila de mensagens para um subscritor que vê as posições [inicio, fim]
+        (base 1) da liga; por omissão, a primeira página de 50.
+        """
+        config = ranking_stream_config()
+        inicio = max(1, inicio)
+        vista = Vista(id_utilizador, inicio, fim if fim is not None and fim >= inicio else inicio + 49)
+        subscritor = _Subscritor(vista, config.queue_size)
+
+        with self._lock:
+            produtor = self._produtores.get(id_liga)
+            novo = produtor is None
+            if novo:
+                if len(self._produtores) >= config.max_producers:
+                    raise ProdutoresEsgotados(
+                        f"Já há {config.max_producers} ligas com classificação em tempo real"
+                    )
+                produtor = self._produtores[id_liga] = _ProdutorLiga(id_liga, config, self._parar_se_vazio)
+
+            with produtor.lock:
+                produtor.subscritores[subscritor.fila] = subscritor
+
+            if novo:
+                produtor.thread.start()
+            else:
+                # Quem chega a meio recebe já as suas linhas
+                produtor.acordar.set()
+        return subscritor.fila
+
+    def cancelar(self, id_liga: str, fila: queue.Queue):
+        with self._lock:
+            produtor = self._produtores.get(id_liga)
+            if produtor is None:
+                return
+            with produtor.lock:
+                produtor.subscritores.pop(fila, None)
+        self._parar_se_vazio(produtor)
+
+    def _parar_se_vazio(self, produtor: _ProdutorLiga) -> bool:
+        """Termina o produtor se já não tiver subscritores. Devolve True se o terminou."""
+        with self._lock:
+            with produtor.lock:
+                if produtor.subscritores:
+                    return False
+            produtor.parar.set()
+            produtor.acordar.set()
+            if self._produtores.get(produtor.id_liga) is produtor:
+                del self._produtores[produtor.id_liga]
+            return True
+
+    def produtores(self) -> int:
+        """Número de ligas com produtor ativo."""
+        with self._lock:
+            return len(self._produtores)
+
+    def notificar(self, id_liga: Optional[str] = None):
+        """As pontuações mudaram (numa liga ou em todas): os produtores verificam já."""
+        with self._lock:
+            produtores = list(self._produtores.values()) if id_liga is None \
+                else [p for p in (self._produtores.get(id_liga),) if p is not None]
+        for produtor in produtores:
+            produtor.acordar.set()
+
+
+broadcaster = RankingBroadcaster()
+
+
+def notificar(id_liga: Optional[str] = None):
+    broadcaster.notificar(id_liga)
@@ -0,0 +1,166 @@
+# persistence/roundtrips.py
+"""
+Contagem de round trips à BD por pedido ou por job (modo desenvolvimento/staging).
+
+Quando a mesma instrução normalizada se repete mais do que `repeat_threshold`
+vezes no mesmo pedido/job, é registado um aviso com a stack trace (padrão N+1).
+Uma rota pode declarar um orçamento de round trips com @roundtrip_budget(n);
+em modo estrito (ou com app.testing) ultrapassá-lo levanta RoundTripBudgetExceeded.
+
+Configuração (secção opcional [roundtrips] do conf.ini):
+    enabled = false
+    repeat_threshold = 5
+    strict = false
+"""
+import contextlib
+import contextvars
+import functools
+import logging
+import traceback
+from collections import Counter
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger("fantasychamp.roundtrips")
+
+
+class RoundTripConfig(NamedTuple):
+    enabled: bool = False
+    repeat_threshold: int = 5
+    strict: bool = False
+
+
+class RoundTripBudgetExceeded(Exception):
+    """O pedido/job fez mais round trips à BD do que o orçamento declarado."""
+
+
+@functools.cache
+def roundtrip_config() -> RoundTripConfig:
+    from persistence.session import config_section
+
+    section = config_section("roundtrips")
+    defaults = RoundTripConfig()
+    if section is None:
+        return defaults
+
+    return RoundTripConfig(
+        enabled=section.getboolean("enabled", defaults.enabled),
+        repeat_threshold=section.getint("repeat_threshold", defaults.repeat_threshold),
+        strict=section.getboolean("strict", defaults.strict),
+    )
+
+
+class RoundTripTracker:
+    def __init__(self, name: str, budget: Optional[int] = None, repeat_threshold: int = 5):
+        self.name = name
+        self.budget = budget
+        self.repeat_threshold = repeat_threshold
+        self.total = 0
+        self.counts = Counter()
+        self.flagged: dict[str, str] = {}
+
+    def record(self, statement: str):
+        self.total += 1
+        self.counts[statement] += 1
+
+        if self.counts[statement] == self.repeat_threshold + 1:
+            stack = "".join(traceback.format_stack()[:-3])
+            self.flagged[statement] = stack
+            logger.warning(
+                "Possível N+1 em %s: '%s' repetida mais de %d vezes\n%s",
+                self.name, statement, self.repeat_threshold, stack,
+            )
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.total > self.budget
+
+    def summary(self) -> str:
+        top = ", ".join(f"{s} x{n}" for s, n in self.counts.most_common(5))
+        return f"{self.name}: {self.total} round trips ({top})"
+
+
+_current: contextvars.ContextVar[Optional[RoundTripTracker]] = contextvars.ContextVar(
+    "roundtrip_tracker", default=None
+)
+
+
+def record(statement: str):
+    """Chamado pelo cursor instrumentado em cada execute."""
+    tracker = _current.get()
+    if tracker is not None:
+        tracker.record(statement)
+
+
+def current() -> Optional[RoundTripTracker]:
+    return _current.get()
+
+
+def check_budget(tracker: RoundTripTracker, strict: bool):
+    if not tracker.over_budget:
+        return
+
+    message = f"Orçamento de {tracker.budget} round trips ultrapassado - {tracker.summary()}"
+    if strict:
+        raise RoundTripBudgetExceeded(message)
+    logger.warning(message)
+
+
+@contextlib.contextmanager
+def track(name: str, budget: Optional[int] = None, strict: Optional[bool] = None):
+    """Conta os round trips de um bloco (p.ex. um job de pontuações)."""
+    config = roundtrip_config()
+    if not config.enabled and budget is None:
+        yield None
+        return
+
+    tracker = RoundTripTracker(name, budget, config.repeat_threshold)
+    token = _current.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current.reset(token)
+
+    logger.info(tracker.summary())
+    check_budget(tracker, config.strict if strict is None else strict)
+
+
+def roundtrip_budget(limit: int):
+    """Declara o número máximo de round trips à BD de uma rota."""
+    def decorator(view):
+        view._roundtrip_budget = limit
+        return view
+    return decorator
+
+
+# --- INTEGRAÇÃO FLASK ---
+
+def init_app(app):
+    from flask import g, request
+
+    config = roundtrip_config()
+
+    @app.before_request
+    def _start_tracking():
+        view = app.view_functions.get(request.endpoint)
+        budget = getattr(view, "_roundtrip_budget", None)
+        if not config.enabled and not (app.testing and budget is not None):
+            return
+
+        tracker = RoundTripTracker(request.endpoint or request.path, budget, config.repeat_threshold)
+        g.roundtrip_token = _current.set(tracker)
+
+    @app.after_request
+    def _check_tracking(response):
+        tracker = _current.get()
+        if tracker is None:
+            return response
+
+        response.headers["X-DB-Roundtrips"] = str(tracker.total)
+        check_budget(tracker, config.strict or app.testing)
+        return response
+
+    @app.teardown_request
+    def _stop_tracking(exc):
+        token = g.pop("roundtrip_token", None)
+        if token is not None:
+            _current.reset(token)
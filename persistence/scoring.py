@@ -0,0 +1,663 @@
+# persistence/scoring.py
+"""
+Motor de pontuações das equipas, orientado a conjuntos.
+
+Em vez de chamar AtualizarPontuacaoEquipa para cada (equipa, jornada), carrega
+Pontuação_Jogador e Pertence uma única vez, calcula em memória a pontuação de
+cada equipa em cada jornada e a pontuação acumulada, e grava tudo em
+Pontuação_Equipa com um único MERGE.
+
+As regras são as mesmas de sp_AtualizarPontuacoesBatch:
+- pontuação da jornada = soma de TRY_CAST(pontuação_total AS INT) dos jogadores
+  titulares (benched = 0) da equipa nessa jornada;
+- pontuação acumulada = soma das pontuações das jornadas com Numero menor ou
+  igual ao da jornada.
+(CalcularPontuacaoEquipa usa ISNUMERIC + CAST, que falha em valores como
+'1.5'; o SP em lote e este motor ignoram-nos.)
+
+Os vetores por jogador são listas de Python e não arrays NumPy: o NumPy não é
+dependência do projeto (nem da imagem Docker) e cada vetor tem uma posição por
+jornada (poucas dezenas), pelo que o tempo é dominado pela leitura das linhas
+da BD e não pelas somas.
+
+O acumulado é uma soma de prefixos numa só passagem por equipa; quando só
+mudam as jornadas a partir de uma dada jornada, recalcular_sufixo() parte do
+acumulado já guardado na jornada anterior.
+
+As classificações por jornada já gravadas (Classificação_Jornada) são
+reescritas na mesma transação sempre que um recálculo muda essas jornadas.
+"""
+import contextlib
+import functools
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import accumulate
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from persistence.scoring_rules import COLUNAS, pontuar
+from persistence.session import config_section, create_connection
+
+
+class Jornada(NamedTuple):
+    id: str
+    numero: int
+
+
+class PontuacaoEquipa(NamedTuple):
+    id_equipa: str
+    id_jornada: str
+    pontuacao_jornada: int
+    pontuacao_acumulada: int
+
+
+class ScoringConfig(NamedTuple):
+    workers: int = 0                  # 0 = um processo por CPU
+    partitions_per_worker: int = 4
+
+
+@functools.cache
+def scoring_config() -> ScoringConfig:
+    section = config_section("scoring")
+    defaults = ScoringConfig()
+    if section is None:
+        return defaults
+
+    return ScoringConfig(
+        workers=section.getint("workers", defaults.workers),
+        partitions_per_worker=section.getint("partitions_per_worker", defaults.partitions_per_worker),
+    )
+
+
+# --- CARREGAMENTO ---
+
+@contextlib.contextmanager
+def _tabela_ids(cursor, nome: str, tipo: str, ids: Iterable):
+    """Tabela temporária com uma coluna ID, para filtrar por muitos IDs numa só query."""
+    cursor.execute(f"CREATE TABLE {nome} (ID {tipo} NOT NULL PRIMARY KEY)")
+    try:
+        valores = [(i,) for i in ids]
+        if valores:
+            cursor.fast_executemany = True
+            cursor.executemany(f"INSERT INTO {nome} (ID) VALUES (?)", valores)
+        yield nome
+    finally:
+        cursor.execute(f"DROP TABLE {nome}")
+
+
+def carregar_jornadas(cursor) -> list[Jornada]:
+    cursor.execute("SELECT ID, Numero FROM FantasyChamp.Jornada ORDER BY Numero")
+    return [Jornada(row.ID, int(row.Numero)) for row in cursor.fetchall()]
+
+
+def carregar_titulares(cursor, ids_equipas: Optional[Iterable[str]] = None) -> dict[str, list[str]]:
+    """
+    Jogadores titulares de cada equipa (todas, ou só `ids_equipas`);
+    equipas sem titulares ficam com lista vazia.
+    """
+    if ids_equipas is None:
+        cursor.execute("SELECT ID FROM FantasyChamp.Equipa")
+        titulares = {str(row.ID): [] for row in cursor.fetchall()}
+
+        cursor.execute("""
+            SELECT ID_Equipa, ID_Jogador
+            FROM FantasyChamp.Pertence
+            WHERE benched = 0
+        """)
+        rows = cursor.fetchall()
+    else:
+        titulares = {str(i): [] for i in ids_equipas}
+
+        with _tabela_ids(cursor, "#Equipas", "UNIQUEIDENTIFIER", titulares):
+            cursor.execute("""
+                SELECT P.ID_Equipa, P.ID_Jogador
+                FROM FantasyChamp.Pertence P
+                JOIN #Equipas E ON P.ID_Equipa = E.ID
+                WHERE P.benched = 0
+            """)
+            rows = cursor.fetchall()
+
+    for row in rows:
+        titulares.setdefault(str(row.ID_Equipa), []).append(row.ID_Jogador)
+
+    return titulares
+
+
+# Texto que o SQL Server converte para INT: espaços, sinal opcional e dígitos ASCII
+# ('' e '-' valem 0; '1.5', '1e3' ou '$5' não são convertidos)
+_INTEIRO_SQL = re.compile(r" *([+-]?)([0-9]*) *")
+_INT_MIN, _INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def _pontos(valor) -> Optional[int]:
+    """TRY_CAST(pontuação_total AS INT): None quando o SQL Server não converte o valor."""
+    if valor is None:
+        return None
+    if isinstance(valor, int):
+        return valor
+
+    match = _INTEIRO_SQL.fullmatch(str(valor))
+    if match is None:
+        return None
+    numero = int(match.group(1) + (match.group(2) or "0"))
+    return numero if _INT_MIN <= numero <= _INT_MAX else None
+
+
+def carregar_pontos_jogadores(
+    cursor,
+    jornadas: list[Jornada],
+    ids_jogadores: Optional[Iterable[str]] = None,
+) -> dict[str, list[int]]:
+    """
+    Vetor de pontos de cada jogador (todos, ou só `ids_jogadores`), com uma
+    posição por jornada pela ordem de `jornadas`.
+    """
+    indice = {j.id: i for i, j in enumerate(jornadas)}
+    vazio = [0] * len(jornadas)
+
+    if ids_jogadores is None:
+        cursor.execute("""
+            SELECT ID_jogador, ID_jornada, pontuação_total
+            FROM FantasyChamp.Pontuação_Jogador
+        """)
+        rows = cursor.fetchall()
+    else:
+        with _tabela_ids(cursor, "#Jogadores", "VARCHAR(16)", set(ids_jogadores)):
+            cursor.execute("""
+                SELECT PJ.ID_jogador, PJ.ID_jornada, PJ.pontuação_total
+                FROM FantasyChamp.Pontuação_Jogador PJ
+                JOIN #Jogadores J ON PJ.ID_jogador = J.ID
+            """)
+            rows = cursor.fetchall()
+
+    pontos: dict[str, list[int]] = {}
+    for row in rows:
+        i = indice.get(row.ID_jornada)
+        valor = _pontos(row.pontuação_total)
+        if i is None or valor is None:
+            continue
+        vetor = pontos.get(row.ID_jogador)
+        if vetor is None:
+            vetor = pontos[row.ID_jogador] = list(vazio)
+        vetor[i] += valor
+
+    return pontos
+
+
+# --- CÁLCULO ---
+
+def calcular_vetor_equipa(jogadores: list[str], pontos: dict[str, list[int]], n_jornadas: int) -> list[int]:
+    """Pontos de uma equipa em cada jornada: soma dos vetores dos seus titulares."""
+    total = [0] * n_jornadas
+    for jogador in jogadores:
+        vetor = pontos.get(jogador)
+        if vetor is not None:
+            total = [a + b for a, b in zip(total, vetor)]
+    return total
+
+
+def calcular_pontuacoes(
+    titulares: dict[str, list[str]],
+    pontos: dict[str, list[int]],
+    jornadas: list[Jornada],
+    bases: Optional[dict[str, int]] = None,
+) -> list[PontuacaoEquipa]:
+    """
+    Linhas de Pontuação_Equipa para as jornadas indicadas. `bases` dá, por
+    equipa, o acumulado anterior à primeira dessas jornadas (0 por omissão).
+    """
+    n_jornadas = len(jornadas)
+    bases = bases or {}
+    linhas = []
+
+    for id_equipa, jogadores in titulares.items():
+        por_jornada = calcular_vetor_equipa(jogadores, pontos, n_jornadas)
+        acumulados = accumulate(por_jornada, initial=bases.get(id_equipa, 0))
+        next(acumulados)
+        for jornada, valor, acumulado in zip(jornadas, por_jornada, acumulados):
+            linhas.append(PontuacaoEquipa(id_equipa, jornada.id, valor, acumulado))
+
+    return linhas
+
+
+# --- GRAVAÇÃO ---
+
+def gravar_pontuacoes(cursor, linhas: list[PontuacaoEquipa]) -> int:
+    """Upsert em massa de Pontuação_Equipa através de uma tabela temporária e um MERGE."""
+    if not linhas:
+        return 0
+
+    cursor.execute("""
+        CREATE TABLE #PontuacaoEquipaNova (
+            ID_Equipa UNIQUEIDENTIFIER NOT NULL,
+            ID_jornada VARCHAR(16) NOT NULL,
+            pontuação_jornada INT NOT NULL,
+            pontuação_acumulada INT NOT NULL,
+            PRIMARY KEY (ID_Equipa, ID_jornada)
+        )
+    """)
+
+    try:
+        cursor.fast_executemany = True
+        cursor.executemany("""
+            INSERT INTO #PontuacaoEquipaNova
+                (ID_Equipa, ID_jornada, pontuação_jornada, pontuação_acumulada)
+            VALUES (?, ?, ?, ?)
+        """, linhas)
+
+        cursor.execute("""
+            MERGE FantasyChamp.Pontuação_Equipa AS T
+            USING #PontuacaoEquipaNova AS S
+                ON T.ID_Equipa = S.ID_Equipa AND T.ID_jornada = S.ID_jornada
+            WHEN MATCHED AND (
+                    ISNULL(T.pontuação_jornada, -1) <> S.pontuação_jornada
+                 OR ISNULL(T.pontuação_acumulada, -1) <> S.pontuação_acumulada) THEN
+                UPDATE SET pontuação_jornada = S.pontuação_jornada,
+                           pontuação_acumulada = S.pontuação_acumulada
+            WHEN NOT MATCHED BY TARGET THEN
+                INSERT (ID_Equipa, ID_jornada, pontuação_jornada, pontuação_acumulada)
+                VALUES (S.ID_Equipa, S.ID_jornada, S.pontuação_jornada, S.pontuação_acumulada);
+        """)
+        return cursor.rowcount
+    finally:
+        cursor.execute("DROP TABLE #PontuacaoEquipaNova")
+
+
+def atualizar_pontuacoes_em_massa() -> int:
+    """
+    Recalcula Pontuação_Equipa para todas as equipas e jornadas numa só passagem.
+    Devolve o número de linhas inseridas ou alteradas.
+    """
+    with create_connection() as conn:
+        cursor = conn.cursor()
+
+        jornadas = carregar_jornadas(cursor)
+        titulares = carregar_titulares(cursor)
+        pontos = carregar_pontos_jogadores(cursor, jornadas)
+
+        linhas = calcular_pontuacoes(titulares, pontos, jornadas)
+        alteradas = gravar_pontuacoes(cursor, linhas)
+        if alteradas:
+            gerar_classificacoes(cursor, apenas_existentes=True)
+        conn.commit()
+
+        return alteradas
+
+
+# --- CLASSIFICAÇÕES POR JORNADA ---
+
+def gerar_classificacoes(cursor, numero_desde: Optional[int] = None, apenas_existentes: bool = False) -> int:
+    """
+    (Re)escreve Classificação_Jornada das jornadas fechadas com Numero >=
+    `numero_desde` (sem commit). Com `apenas_existentes` só reescreve as que já
+    foram geradas no fecho da jornada. Devolve o número de jornadas escritas.
+    """
+    cursor.execute("""
+        DECLARE @Jornadas INT;
+        EXEC FantasyChamp.sp_GerarClassificacaoJornada
+            @NumeroDesde = ?,
+            @ApenasExistentes = ?,
+            @Jornadas = @Jornadas OUTPUT;
+        SELECT @Jornadas;
+    """, numero_desde, int(apenas_existentes))
+    return cursor.fetchone()[0]
+
+
+# --- RECÁLCULO DE UM CONJUNTO DE EQUIPAS ---
+
+def calcular_equipas(cursor, ids_equipas: Iterable[str]) -> list[PontuacaoEquipa]:
+    """Linhas de Pontuação_Equipa calculadas para as equipas indicadas (sem gravar)."""
+    jornadas = carregar_jornadas(cursor)
+    titulares = carregar_titulares(cursor, ids_equipas)
+    jogadores = {j for lista in titulares.values() for j in lista}
+    pontos = carregar_pontos_jogadores(cursor, jornadas, jogadores)
+
+    return calcular_pontuacoes(titulares, pontos, jornadas)
+
+
+def recalcular_equipas(cursor, ids_equipas: Iterable[str]) -> int:
+    """Recalcula e grava Pontuação_Equipa só para as equipas indicadas (sem commit)."""
+    return gravar_pontuacoes(cursor, calcular_equipas(cursor, ids_equipas))
+
+
+def carregar_pontuacoes_guardadas(cursor, ids_equipas: Iterable[str]) -> dict[tuple[str, str], tuple]:
+    """(pontuação_jornada, pontuação_acumulada) guardadas, por (equipa, jornada)."""
+    with _tabela_ids(cursor, "#Equipas", "UNIQUEIDENTIFIER", set(ids_equipas)):
+        cursor.execute("""
+            SELECT PE.ID_Equipa, PE.ID_jornada, PE.pontuação_jornada, PE.pontuação_acumulada
+            FROM FantasyChamp.Pontuação_Equipa PE
+            JOIN #Equipas E ON PE.ID_Equipa = E.ID
+        """)
+        return {
+            (str(row.ID_Equipa), row.ID_jornada): (row.pontuação_jornada, row.pontuação_acumulada)
+            for row in cursor.fetchall()
+        }
+
+
+def comparar_pontuacoes(linhas: list[PontuacaoEquipa], guardadas: dict[tuple[str, str], tuple]) -> list[tuple]:
+    """Linhas calculadas que diferem das guardadas, como (linha, guardada ou None)."""
+    diferencas = []
+    for linha in linhas:
+        guardada = guardadas.get((linha.id_equipa, linha.id_jornada))
+        if guardada != (linha.pontuacao_jornada, linha.pontuacao_acumulada):
+            diferencas.append((linha, guardada))
+    return diferencas
+
+
+def carregar_acumulados(cursor, ids_equipas: Iterable[str], id_jornada: str) -> dict[str, int]:
+    """Pontuação acumulada já guardada de cada equipa numa jornada."""
+    with _tabela_ids(cursor, "#Equipas", "UNIQUEIDENTIFIER", set(ids_equipas)):
+        cursor.execute("""
+            SELECT PE.ID_Equipa, PE.pontuação_acumulada
+            FROM FantasyChamp.Pontuação_Equipa PE
+            JOIN #Equipas E ON PE.ID_Equipa = E.ID
+            WHERE PE.ID_jornada = ? AND PE.pontuação_acumulada IS NOT NULL
+        """, id_jornada)
+        return {str(row.ID_Equipa): int(row.pontuação_acumulada) for row in cursor.fetchall()}
+
+
+def recalcular_sufixo(cursor, ids_equipas: Iterable[str], desde_numero: int) -> int:
+    """
+    Recalcula só as jornadas com Numero >= `desde_numero` (sem commit), partindo
+    do acumulado guardado na jornada anterior. Equipas sem esse acumulado são
+    recalculadas desde a primeira jornada.
+    """
+    ids_equipas = list(ids_equipas)
+    jornadas = carregar_jornadas(cursor)
+    anteriores = [j for j in jornadas if j.numero < desde_numero]
+    sufixo = [j for j in jornadas if j.numero >= desde_numero]
+
+    if not anteriores:
+        return recalcular_equipas(cursor, ids_equipas)
+
+    bases = carregar_acumulados(cursor, ids_equipas, anteriores[-1].id)
+    sem_base = [i for i in ids_equipas if i not in bases]
+    com_base = [i for i in ids_equipas if i in bases]
+
+    alteradas = recalcular_equipas(cursor, sem_base) if sem_base else 0
+    if com_base and sufixo:
+        titulares = carregar_titulares(cursor, com_base)
+        jogadores = {j for lista in titulares.values() for j in lista}
+        pontos = carregar_pontos_jogadores(cursor, sufixo, jogadores)
+
+        linhas = calcular_pontuacoes(titulares, pontos, sufixo, bases)
+        alteradas += gravar_pontuacoes(cursor, linhas)
+
+    return alteradas
+
+
+# --- RECÁLCULO INCREMENTAL ---
+
+def equipas_com_titulares(cursor, ids_jogadores: Iterable[str]) -> list[str]:
+    """Equipas que têm algum dos jogadores indicados como titular."""
+    with _tabela_ids(cursor, "#JogadoresAlterados", "VARCHAR(16)", set(ids_jogadores)):
+        cursor.execute("""
+            SELECT DISTINCT P.ID_Equipa
+            FROM FantasyChamp.Pertence P
+            JOIN #JogadoresAlterados J ON P.ID_Jogador = J.ID
+            WHERE P.benched = 0
+        """)
+        return [str(row.ID_Equipa) for row in cursor.fetchall()]
+
+
+def recalcular_alteracoes(confirmar: Optional[Callable] = None) -> tuple[int, int]:
+    """
+    Recalcula apenas as equipas afetadas pelas estatísticas registadas em
+    Pontuação_Jogador_Alterada (ver trg_PontuacaoJogador_RegistarAlteracao).
+
+    As alterações são consumidas na mesma transação em que as pontuações são
+    gravadas: se algo falhar, ficam na tabela para a próxima execução.
+    `confirmar(conn)` faz o commit (por omissão conn.commit()); as pontuações ao
+    vivo usam-no para publicar o estado gravado no mesmo instante.
+    Devolve (equipas recalculadas, linhas de Pontuação_Equipa alteradas).
+    """
+    confirmar = confirmar or (lambda conn: conn.commit())
+    with create_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            DELETE FROM FantasyChamp.Pontuação_Jogador_Alterada
+            OUTPUT deleted.ID_jogador, deleted.ID_jornada
+        """)
+        alteracoes = cursor.fetchall()
+
+        if not alteracoes:
+            return 0, 0
+
+        ids_equipas = equipas_com_titulares(cursor, {row.ID_jogador for row in alteracoes})
+        if not ids_equipas:
+            confirmar(conn)
+            return 0, 0
+
+        # As jornadas anteriores à primeira alterada não mudam
+        numeros = {j.id: j.numero for j in carregar_jornadas(cursor)}
+        desde = min((numeros[row.ID_jornada] for row in alteracoes if row.ID_jornada in numeros), default=None)
+
+        if desde is None:
+            alteradas = recalcular_equipas(cursor, ids_equipas)
+        else:
+            alteradas = recalcular_sufixo(cursor, ids_equipas, desde)
+
+        # Correções numa jornada já fechada: reescrever a sua classificação e as seguintes
+        if alteradas:
+            gerar_classificacoes(cursor, desde, apenas_existentes=True)
+        confirmar(conn)
+
+        return len(ids_equipas), alteradas
+
+
+# --- EXECUÇÃO PARALELA ---
+
+class ResultadoParalelo(NamedTuple):
+    equipas: int
+    alteradas: int
+    duracao: float
+    falhadas: list[list[str]]   # partições que fizeram rollback, para repetir
+
+
+def carregar_ids_equipas(cursor) -> list[str]:
+    cursor.execute("SELECT ID FROM FantasyChamp.Equipa ORDER BY ID")
+    return [str(row.ID) for row in cursor.fetchall()]
+
+
+def particionar(ids: list[str], n: int) -> list[list[str]]:
+    """Divide os IDs (já ordenados) em até `n` intervalos contíguos de tamanho semelhante."""
+    n = max(1, min(n, len(ids)))
+    tamanho, resto = divmod(len(ids), n)
+    particoes, inicio = [], 0
+    for i in range(n):
+        fim = inicio + tamanho + (1 if i < resto else 0)
+        particoes.append(ids[inicio:fim])
+        inicio = fim
+    return [p for p in particoes if p]
+
+
+def _processar_particao(ids_equipas: list[str]) -> tuple[int, int]:
+    # Corre num processo filho, com o seu próprio pool e conexão;
+    # cada partição é uma transação: ou fica toda gravada ou nada
+    with create_connection() as conn:
+        alteradas = recalcular_equipas(conn.cursor(), ids_equipas)
+        conn.commit()
+    return len(ids_equipas), alteradas
+
+
+def atualizar_pontuacoes_particionado(
+    workers: Optional[int] = None,
+    ids_equipas: Optional[list[str]] = None,
+    progresso: Callable[[str], None] = print,
+) -> ResultadoParalelo:
+    """
+    Recalcula Pontuação_Equipa dividindo as equipas em partições processadas
+    por um ProcessPoolExecutor. As partições são intervalos disjuntos de IDs,
+    por isso os MERGE dos vários processos nunca tocam nas mesmas linhas.
+
+    Uma partição que falhe faz rollback apenas de si própria e é devolvida em
+    `falhadas`, para poder ser repetida com `ids_equipas`. As classificações
+    por jornada só são reescritas quando todas as partições foram gravadas.
+    """
+    config = scoring_config()
+    workers = workers or config.workers or os.cpu_count() or 1
+
+    if ids_equipas is None:
+        with create_connection() as conn:
+            ids_equipas = carregar_ids_equipas(conn.cursor())
+
+    # Mais partições do que processos para equilibrar a carga entre eles
+    particoes = particionar(ids_equipas, workers * config.partitions_per_worker)
+    inicio = time.perf_counter()
+    equipas = alteradas = 0
+    falhadas = []
+
+    # "spawn": os filhos não herdam o pool (nem os sockets) do processo pai
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contexto) as executor:
+        futuros = {executor.submit(_processar_particao, p): p for p in particoes}
+
+        for concluidas, futuro in enumerate(as_completed(futuros), start=1):
+            try:
+                n, a = futuro.result()
+            except Exception as e:
+                falhadas.append(futuros[futuro])
+                progresso(f"[{concluidas}/{len(particoes)}] partição falhou: {e}")
+                continue
+
+            equipas += n
+            alteradas += a
+            decorrido = time.perf_counter() - inicio
+            progresso(
+                f"[{concluidas}/{len(particoes)}] {equipas}/{len(ids_equipas)} equipas "
+                f"({equipas / decorrido:.0f} equipas/s)"
+            )
+
+    if alteradas and not falhadas:
+        with create_connection() as conn:
+            gerar_classificacoes(conn.cursor(), apenas_existentes=True)
+            conn.commit()
+
+    return ResultadoParalelo(equipas, alteradas, time.perf_counter() - inicio, falhadas)
+
+
+# --- PONTUAÇÃO DOS JOGADORES ---
+
+def carregar_estatisticas_jornada(cursor, id_jornada: str) -> tuple[list[str], list[str], dict[str, list]]:
+    """IDs, posições e estatísticas (por coluna) de todos os jogadores numa jornada."""
+    cursor.execute(f"""
+        SELECT PJ.ID_jogador, P.Posição, {", ".join("PJ." + c for c in COLUNAS)}
+        FROM FantasyChamp.Pontuação_Jogador PJ
+        LEFT JOIN FantasyChamp.Jogador J ON PJ.ID_jogador = J.ID
+        LEFT JOIN FantasyChamp.Posição P ON J.ID_Posição = P.ID
+        WHERE PJ.ID_jornada = ?
+    """, id_jornada)
+    rows = cursor.fetchall()
+
+    ids = [row.ID_jogador for row in rows]
+    posicoes = [row.Posição for row in rows]
+    colunas = {c: [getattr(row, c) for row in rows] for c in COLUNAS}
+    return ids, posicoes, colunas
+
+
+def atualizar_pontuacoes_jogadores(id_jornada: str, limitar_a_zero: bool = False) -> int:
+    """
+    Calcula pontuação_total de todos os jogadores de uma jornada com uma única
+    avaliação das regras (scoring_rules) e grava só as que mudaram.
+    Devolve o número de linhas alteradas.
+    """
+    with create_connection() as conn:
+        cursor = conn.cursor()
+
+        ids, posicoes, colunas = carregar_estatisticas_jornada(cursor, id_jornada)
+        if not ids:
+            return 0
+        totais = pontuar(colunas, posicoes, limitar_a_zero=limitar_a_zero)
+
+        cursor.execute("""
+            CREATE TABLE #PontuacaoJogadorNova (
+                ID_jogador VARCHAR(16) NOT NULL PRIMARY KEY,
+                pontuação_total VARCHAR(10) NOT NULL
+            )
+        """)
+        try:
+            cursor.fast_executemany = True
+            cursor.executemany(
+                "INSERT INTO #PontuacaoJogadorNova (ID_jogador, pontuação_total) VALUES (?, ?)",
+                [(i, str(t)) for i, t in zip(ids, totais)],
+            )
+            cursor.execute("""
+                UPDATE PJ
+                SET pontuação_total = N.pontuação_total
+                FROM FantasyChamp.Pontuação_Jogador PJ
+                JOIN #PontuacaoJogadorNova N ON PJ.ID_jogador = N.ID_jogador
+                WHERE PJ.ID_jornada = ?
+                  AND ISNULL(PJ.pontuação_total, '') <> N.pontuação_total
+            """, id_jornada)
+            alteradas = cursor.rowcount
+        finally:
+            cursor.execute("DROP TABLE #PontuacaoJogadorNova")
+
+        conn.commit()
+        return alteradas
+
+
+def verificar_paridade_regras(id_jornada: str) -> list[tuple]:
+    """
+    Compara as regras de scoring_rules com dbo.fn_CalcularPontuacaoJogador para
+    todos os jogadores de uma jornada. Devolve (jogador, regras, udf) quando diferem.
+    """
+    with create_connection() as conn:
+        cursor = conn.cursor()
+
+        ids, posicoes, colunas = carregar_estatisticas_jornada(cursor, id_jornada)
+        totais = pontuar(colunas, posicoes)
+
+        cursor.execute("""
+            SELECT ID_jogador, dbo.fn_CalcularPontuacaoJogador(ID_jogador, ID_jornada) AS Pontuacao
+            FROM FantasyChamp.Pontuação_Jogador
+            WHERE ID_jornada = ?
+        """, id_jornada)
+        esperado = {row.ID_jogador: row.Pontuacao for row in cursor.fetchall()}
+
+        return [
+            (id_jogador, total, esperado.get(id_jogador))
+            for id_jogador, total in zip(ids, totais)
+            if esperado.get(id_jogador) != total
+        ]
+
+
+# --- PARIDADE COM OS STORED PROCEDURES ---
+
+def verificar_paridade(amostra: int = 20) -> list[tuple]:
+    """
+    Compara, para uma amostra de equipas, a pontuação por jornada calculada
+    pelo motor com a agregação de sp_AtualizarPontuacoesBatch, feita numa só
+    query para todas as equipas da amostra.
+    Devolve as diferenças encontradas como (equipa, jornada, motor, sp).
+    """
+    with create_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute(f"SELECT TOP ({int(amostra)}) ID FROM FantasyChamp.Equipa ORDER BY ID")
+        ids_equipas = [str(row.ID) for row in cursor.fetchall()]
+        if not ids_equipas:
+            return []
+
+        linhas = calcular_equipas(cursor, ids_equipas)
+
+        with _tabela_ids(cursor, "#Equipas", "UNIQUEIDENTIFIER", ids_equipas):
+            cursor.execute("""
+                SELECT PE.ID_Equipa, PJ.ID_jornada, SUM(TRY_CAST(PJ.pontuação_total AS INT)) AS Pontos
+                FROM FantasyChamp.Pertence PE
+                JOIN #Equipas E ON PE.ID_Equipa = E.ID
+                JOIN FantasyChamp.Pontuação_Jogador PJ ON PJ.ID_jogador = PE.ID_Jogador
+                WHERE PE.benched = 0
+                GROUP BY PE.ID_Equipa, PJ.ID_jornada
+            """)
+            esperado = {(str(row.ID_Equipa), row.ID_jornada): row.Pontos or 0 for row in cursor.fetchall()}
+
+        diferencas = []
+        for linha in linhas:
+            sp = esperado.get((linha.id_equipa, linha.id_jornada), 0)
+            if sp != linha.pontuacao_jornada:
+                diferencas.append((linha.id_equipa, linha.id_jornada, linha.pontuacao_jornada, sp))
+        return diferencas
@@ -0,0 +1,103 @@
+# persistence/scoring_rules.py
+"""
+Regras de pontuação dos jogadores, numa única tabela declarativa.
+
+São as regras de dbo.fn_CalcularPontuacaoJogador:
+- +1 ponto por cada 30 minutos jogados (só a partir de 30 minutos)
+- +5 por golo marcado, +3 por assistência
+- -1 por cartão amarelo, -3 por cartão vermelho
+- Guarda-redes e defesas: +4 por clean sheet (0 golos sofridos e 60+ minutos)
+  e -1 por golo sofrido
+
+O stored procedure CalcularPontuacaoJogador aplica as mesmas regras mas não
+deixa a pontuação ficar negativa (`limitar_a_zero=True`).
+
+A avaliação é feita por colunas: cada regra é aplicada de uma vez a todas as
+linhas de estatísticas (p.ex. uma jornada inteira) em vez de linha a linha.
+"""
+from typing import Iterable, Mapping, NamedTuple, Optional, Sequence
+
+DEFESAS = frozenset({"Goalkeeper", "Defender"})
+
+# Colunas de Pontuação_Jogador usadas pelas regras
+COLUNAS = ("TempoJogo", "GolosMarcados", "Assistencias", "CartoesAmarelos", "CartoesVermelhos", "GolosSofridos")
+
+
+class Regra(NamedTuple):
+    nome: str
+    coluna: str                             # coluna de Pontuação_Jogador a que se aplica
+    pontos: int                             # pontos por unidade (ou fixos, com apenas_zero)
+    divisor: int = 1                        # unidades = valor // divisor
+    minimo_tempo: int = 0                   # só conta com TempoJogo >= minimo_tempo
+    posicoes: Optional[frozenset] = None    # None = todas as posições
+    apenas_zero: bool = False               # pontos fixos quando o valor é 0 (clean sheet)
+
+
+REGRAS = (
+    Regra("minutos", "TempoJogo", 1, divisor=30, minimo_tempo=30),
+    Regra("golos", "GolosMarcados", 5),
+    Regra("assistencias", "Assistencias", 3),
+    Regra("amarelos", "CartoesAmarelos", -1),
+    Regra("vermelhos", "CartoesVermelhos", -3),
+    Regra("clean_sheet", "GolosSofridos", 4, minimo_tempo=60, posicoes=DEFESAS, apenas_zero=True),
+    Regra("golos_sofridos", "GolosSofridos", -1, posicoes=DEFESAS),
+)
+
+
+def _coluna(colunas: Mapping[str, Sequence], nome: str, n: int) -> list[int]:
+    valores = colunas.get(nome)
+    if valores is None:
+        return [0] * n
+    return [v or 0 for v in valores]    # NULL conta como 0, como o ISNULL da UDF
+
+
+def pontuar(
+    colunas: Mapping[str, Sequence],
+    posicoes: Sequence[str],
+    regras: Sequence[Regra] = REGRAS,
+    limitar_a_zero: bool = False,
+) -> list[int]:
+    """
+    Pontua várias linhas de uma vez. `colunas` tem uma lista por coluna de
+    estatísticas (todas do tamanho de `posicoes`); devolve uma pontuação por linha.
+    """
+    n = len(posicoes)
+    tempo = _coluna(colunas, "TempoJogo", n)
+    total = [0] * n
+
+    for regra in regras:
+        valores = _coluna(colunas, regra.coluna, n)
+
+        if regra.apenas_zero:
+            parcial = [regra.pontos if v == 0 else 0 for v in valores]
+        elif regra.divisor != 1:
+            parcial = [regra.pontos * (v // regra.divisor) for v in valores]
+        else:
+            parcial = [regra.pontos * v for v in valores]
+
+        if regra.minimo_tempo:
+            parcial = [p if t >= regra.minimo_tempo else 0 for p, t in zip(parcial, tempo)]
+        if regra.posicoes is not None:
+            parcial = [p if pos in regra.posicoes else 0 for p, pos in zip(parcial, posicoes)]
+
+        total = [a + b for a, b in zip(total, parcial)]
+
+    if limitar_a_zero:
+        total = [max(0, t) for t in total]
+    return total
+
+
+def pontuar_linhas(
+    linhas: Iterable[Mapping],
+    posicoes: Sequence[str],
+    regras: Sequence[Regra] = REGRAS,
+    limitar_a_zero: bool = False,
+) -> list[int]:
+    """Como pontuar(), mas recebe linhas (dicts com as colunas de COLUNAS)."""
+    linhas = list(linhas)
+    colunas = {nome: [linha.get(nome, 0) for linha in linhas] for nome in COLUNAS}
+    return pontuar(colunas, posicoes, regras, limitar_a_zero)
+
+
+def pontuar_jogador(estatisticas: Mapping, posicao: str, limitar_a_zero: bool = False) -> int:
+    return pontuar_linhas([estatisticas], [posicao], limitar_a_zero=limitar_a_zero)[0]
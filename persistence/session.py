@@ -1,16 +1,36 @@
 import configparser
 import functools
+import os
+import threading
+import time
 from pathlib import Path
+from typing import NamedTuple
 import pyodbc
 
+from persistence import roundtrips
+from persistence.metrics import normalize_statement, query_metrics
+from persistence.slow_query import log_slow_query, threshold_seconds
+
 
 @functools.cache
-def conn_string() -> str:
+def _config() -> configparser.ConfigParser:
     config_file = Path("conf.ini")
     assert config_file.exists(), "conf.ini file not found"
 
     config = configparser.ConfigParser()
     config.read(config_file)
+    return config
+
+
+def config_section(name: str):
+    """Secção opcional do conf.ini, ou None se não existir."""
+    config = _config()
+    return config[name] if config.has_section(name) else None
+
+
+@functools.cache
+def conn_string() -> str:
+    config = _config()
 
     server = config["database"]["server"]
     db_name = config["database"]["name"]
@@ -20,7 +40,461 @@ def conn_string() -> str:
     return f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={server};DATABASE={db_name};UID={username};PWD={password};TrustServerCertificate=yes;"
 
 
+# --- POOL DE CONEXÕES ---
+
+class PoolConfig(NamedTuple):
+    max_size: int = 10              # número máximo de conexões abertas
+    timeout: float = 10.0           # segundos à espera de uma conexão livre
+    ping_after: float = 30.0        # verificar a conexão se esteve parada mais do que isto
+    idle_timeout: float = 300.0     # fechar conexões paradas há mais do que isto
+    max_lifetime: float = 1800.0    # reciclar conexões mais antigas do que isto
+
+
+class PoolStats(NamedTuple):
+    size: int
+    idle: int
+    in_use: int
+    created: int
+    closed: int
+    borrowed: int
+    waits: int
+    timeouts: int
+    ping_failures: int
+
+
+class PoolTimeout(Exception):
+    """Não foi possível obter uma conexão do pool dentro do tempo limite."""
+
+
+@functools.cache
+def pool_config() -> PoolConfig:
+    """Lê a secção opcional [pool] do conf.ini; valores em falta usam os defaults."""
+    config = _config()
+    if not config.has_section("pool"):
+        return PoolConfig()
+
+    section = config["pool"]
+    defaults = PoolConfig()
+    return PoolConfig(
+        max_size=section.getint("max_size", defaults.max_size),
+        timeout=section.getfloat("timeout", defaults.timeout),
+        ping_after=section.getfloat("ping_after", defaults.ping_after),
+        idle_timeout=section.getfloat("idle_timeout", defaults.idle_timeout),
+        max_lifetime=section.getfloat("max_lifetime", defaults.max_lifetime),
+    )
+
+
+class _Slot:
+    """Conexão física guardada no pool, com os tempos usados para a reciclar."""
+
+    __slots__ = ("raw", "created_at", "last_used", "owner")
+
+    def __init__(self, raw):
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used = now
+        self.owner = None
+
+
+class ConnectionPool:
+    """
+    Pool de conexões pyodbc, limitado e seguro entre threads.
+
+    Cada empréstimo é exclusivo da thread que o pediu até ser devolvido.
+    Depois de close_all() as conexões devolvidas são fechadas em vez de voltarem ao pool.
+    """
+
+    def __init__(self, connect, config: PoolConfig = PoolConfig()):
+        self._connect = connect
+        self.config = config
+        self._cond = threading.Condition(threading.Lock())
+        self._idle: list[_Slot] = []
+        self._size = 0
+        self._created = 0
+        self._closed = 0
+        self._borrowed = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._ping_failures = 0
+        self._closing = False
+
+    def acquire(self) -> _Slot:
+        # Um só prazo para todo o pedido, mesmo que sejam descartadas conexões mortas
+        deadline = time.monotonic() + self.config.timeout
+        waited = False
+        while True:
+            with self._cond:
+                while True:
+                    self._evict_expired()
+
+                    if self._idle:
+                        slot = self._idle.pop()
+                        break
+
+                    if self._size < self.config.max_size:
+                        # Reservar o lugar antes de abrir fora do lock
+                        self._size += 1
+                        slot = None
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"Nenhuma conexão livre após {self.config.timeout}s "
+                            f"(max_size={self.config.max_size})"
+                        )
+                    if not waited:
+                        self._waits += 1
+                        waited = True
+                    self._cond.wait(remaining)
+
+            if slot is None:
+                slot = self._open()
+                break
+            if self._is_alive(slot):
+                break
+            self._discard(slot)
+
+        slot.owner = threading.get_ident()
+        with self._cond:
+            self._borrowed += 1
+        return slot
+
+    def release(self, slot: _Slot):
+        slot.owner = None
+        now = time.monotonic()
+
+        try:
+            # Nunca devolver uma transação pendente ao pool
+            slot.raw.rollback()
+        except pyodbc.Error:
+            self._discard(slot)
+            return
+
+        if now - slot.created_at > self.config.max_lifetime:
+            self._discard(slot)
+            return
+
+        slot.last_used = now
+        with self._cond:
+            if not self._closing:
+                self._idle.append(slot)
+                self._cond.notify()
+                return
+        self._discard(slot)
+
+    def stats(self) -> PoolStats:
+        with self._cond:
+            return PoolStats(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=self._size - len(self._idle),
+                created=self._created,
+                closed=self._closed,
+                borrowed=self._borrowed,
+                waits=self._waits,
+                timeouts=self._timeouts,
+                ping_failures=self._ping_failures,
+            )
+
+    def close_all(self):
+        with self._cond:
+            self._closing = True
+            idle, self._idle = self._idle, []
+        for slot in idle:
+            self._discard(slot)
+
+    # --- internos ---
+
+    def _open(self) -> _Slot:
+        try:
+            raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._created += 1
+        return _Slot(raw)
+
+    def _discard(self, slot: _Slot):
+        try:
+            slot.raw.close()
+        except pyodbc.Error:
+            pass
+
+        with self._cond:
+            self._size -= 1
+            self._closed += 1
+            self._cond.notify()
+
+    def _is_alive(self, slot: _Slot) -> bool:
+        if time.monotonic() - slot.last_used < self.config.ping_after:
+            return True
+        try:
+            slot.raw.cursor().execute("SELECT 1").fetchone()
+            return True
+        except pyodbc.Error:
+            with self._cond:
+                self._ping_failures += 1
+            return False
+
+    def _evict_expired(self):
+        # Chamado com o lock adquirido
+        now = time.monotonic()
+        keep = []
+        for slot in self._idle:
+            if (now - slot.last_used > self.config.idle_timeout
+                    or now - slot.created_at > self.config.max_lifetime):
+                try:
+                    slot.raw.close()
+                except pyodbc.Error:
+                    pass
+                self._size -= 1
+                self._closed += 1
+            else:
+                keep.append(slot)
+        self._idle = keep
+
+
+# --- CURSOR INSTRUMENTADO ---
+
+class InstrumentedCursor:
+    """
+    Cursor pyodbc que regista, por instrução normalizada, o tempo de execução,
+    o número de linhas devolvidas e os erros (ver persistence/metrics.py).
+    """
+
+    __slots__ = ("_cursor", "_statement", "_rows")
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._statement = None
+        self._rows = 0
+
+    def execute(self, sql, *params):
+        self._flush_rows()
+        statement = normalize_statement(sql)
+        self._statement = statement
+        roundtrips.record(statement)
+
+        start = time.perf_counter()
+        try:
+            self._cursor.execute(sql, *params)
+        except Exception:
+            query_metrics.record(statement, time.perf_counter() - start, error=True)
+            raise
+        elapsed = time.perf_counter() - start
+        query_metrics.record(statement, elapsed)
+
+        if elapsed >= threshold_seconds():
+            log_slow_query(statement, sql, params, elapsed)
+        return self
+
+    def executemany(self, sql, params):
+        self._flush_rows()
+        statement = normalize_statement(sql)
+        self._statement = statement
+        roundtrips.record(statement)
+        if not isinstance(params, (list, tuple)):
+            params = list(params)
+
+        start = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, params)
+        except Exception:
+            query_metrics.record(statement, time.perf_counter() - start, error=True)
+            raise
+        elapsed = time.perf_counter() - start
+        query_metrics.record(statement, elapsed)
+
+        if elapsed >= threshold_seconds():
+            # O plano estimado é o de uma linha: usam-se os parâmetros da primeira
+            log_slow_query(statement, sql, (params[0],) if params else (), elapsed, batch=len(params))
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._rows += 1
+        return row
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._rows += len(rows)
+        return rows
+
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        self._rows += len(rows)
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._rows += 1
+            yield row
+
+    def close(self):
+        self._flush_rows()
+        self._cursor.close()
+
+    def _flush_rows(self):
+        if self._rows and self._statement is not None:
+            query_metrics.record_rows(self._statement, self._rows)
+        self._rows = 0
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        # Atributos do pyodbc (p.ex. fast_executemany) vão para o cursor real
+        if name in InstrumentedCursor.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._cursor, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __del__(self):
+        try:
+            self._flush_rows()
+        except Exception:
+            pass
+
+
+class PooledConnection:
+    """
+    Conexão emprestada pelo pool.
+
+    Comporta-se como uma conexão pyodbc: `with` faz commit no fim do bloco
+    (ou rollback em caso de exceção) e depois devolve a conexão ao pool;
+    `close()` devolve-a sem commit.
+    """
+
+    def __init__(self, pool: ConnectionPool, slot: _Slot):
+        self._pool = pool
+        self._slot = slot
+
+    @property
+    def raw(self):
+        if self._slot is None:
+            raise pyodbc.ProgrammingError("Attempt to use a closed connection.")
+        return self._slot.raw
+
+    def cursor(self):
+        return InstrumentedCursor(self.raw.cursor())
+
+    def execute(self, sql, *params):
+        return self.cursor().execute(sql, *params)
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        self._give_back()
+
+    def _give_back(self):
+        slot, self._slot = self._slot, None
+        if slot is not None:
+            self._pool.release(slot)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self._slot is not None and not self.raw.autocommit:
+                if exc_type is None:
+                    self.raw.commit()
+                else:
+                    self.raw.rollback()
+        finally:
+            self._give_back()
+        return False
+
+    def __del__(self):
+        # Rede de segurança para quem não fecha a conexão
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _raw_connect():
+    return pyodbc.connect(conn_string())
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(_raw_connect, pool_config())
+    return _pool
+
+
+def pool_stats() -> PoolStats:
+    return get_pool().stats()
+
+
+# Pools herdados através de fork(): as conexões partilham sockets com o processo
+# pai, por isso o filho não as usa nem as fecha e cria o seu próprio pool
+_inherited_pools = []
+
+
+def _reset_after_fork():
+    global _pool, _pool_lock
+    if _pool is not None:
+        _inherited_pools.append(_pool)
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# Fornecedor opcional de um âmbito (ex: o pedido Flask atual) que empresta
+# sempre a mesma conexão; ver persistence/unit_of_work.py
+_scope_provider = None
+
+
+def set_scope_provider(provider):
+    global _scope_provider
+    _scope_provider = provider
+
+
 def create_connection():
-    """Cria uma conexão com o banco de dados SQL Server."""
-    conn_string_val = conn_string()
-    return pyodbc.connect(conn_string_val)
+    """Obtém uma conexão do pool de conexões ao SQL Server."""
+    if _scope_provider is not None:
+        scope = _scope_provider()
+        if scope is not None:
+            conn = scope.lend()
+            if conn is not None:
+                return conn
+
+    pool = get_pool()
+    return PooledConnection(pool, pool.acquire())
+
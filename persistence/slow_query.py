@@ -0,0 +1,210 @@
+# persistence/slow_query.py
+"""
+Registo de instruções SQL lentas.
+
+Qualquer instrução que demore mais do que `slow_query_ms` é escrita num log
+local com rotação, com os parâmetros mascarados e a função de persistência
+que a executou. Em segundo plano é ainda capturado o plano estimado da
+instrução (SET SHOWPLAN_XML), que não executa a instrução de novo.
+
+Configuração (secção opcional [slow_query] do conf.ini):
+    threshold_ms = 500
+    log_file = logs/slow_queries.log
+    max_bytes = 5242880
+    backup_count = 5
+    capture_plan = true
+    plan_interval = 300     ; segundos entre capturas do plano da mesma instrução
+"""
+import datetime
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import pyodbc
+
+
+class SlowQueryConfig(NamedTuple):
+    threshold_ms: float = 500.0
+    log_file: str = "logs/slow_queries.log"
+    max_bytes: int = 5 * 1024 * 1024
+    backup_count: int = 5
+    capture_plan: bool = True
+    plan_interval: float = 300.0
+
+
+@functools.cache
+def slow_query_config() -> SlowQueryConfig:
+    from persistence.session import config_section
+
+    section = config_section("slow_query")
+    defaults = SlowQueryConfig()
+    if section is None:
+        return defaults
+
+    return SlowQueryConfig(
+        threshold_ms=section.getfloat("threshold_ms", defaults.threshold_ms),
+        log_file=section.get("log_file", defaults.log_file),
+        max_bytes=section.getint("max_bytes", defaults.max_bytes),
+        backup_count=section.getint("backup_count", defaults.backup_count),
+        capture_plan=section.getboolean("capture_plan", defaults.capture_plan),
+        plan_interval=section.getfloat("plan_interval", defaults.plan_interval),
+    )
+
+
+@functools.cache
+def threshold_seconds() -> float:
+    return slow_query_config().threshold_ms / 1000.0
+
+
+@functools.cache
+def _logger() -> logging.Logger:
+    config = slow_query_config()
+    path = Path(config.log_file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=config.max_bytes, backupCount=config.backup_count, encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    logger = logging.getLogger("fantasychamp.slow_query")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(handler)
+    return logger
+
+
+# --- PARÂMETROS E ORIGEM ---
+
+def redact(value) -> str:
+    """Mantém apenas o tipo (e o tamanho) de um parâmetro, nunca o valor."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__} len={len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def _flatten_params(params) -> tuple:
+    # pyodbc aceita execute(sql, a, b) e execute(sql, (a, b))
+    if len(params) == 1 and isinstance(params[0], (list, tuple)):
+        return tuple(params[0])
+    return tuple(params)
+
+
+_PACKAGE_DIR = os.path.normcase(os.path.dirname(os.path.abspath(__file__)))
+_INTERNAL_MODULES = frozenset(
+    os.path.join(_PACKAGE_DIR, name) for name in ("session.py", "metrics.py", "slow_query.py")
+)
+
+
+def _module_path(filename: str) -> str:
+    return os.path.normcase(os.path.abspath(filename))
+
+
+def calling_function() -> str:
+    """Primeira função do pacote persistence na stack que não pertence à instrumentação."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = _module_path(frame.f_code.co_filename)
+        if os.path.dirname(filename) == _PACKAGE_DIR and filename not in _INTERNAL_MODULES:
+            return f"{frame.f_globals.get('__name__')}.{frame.f_code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return "?"
+
+
+# --- CAPTURA DO PLANO ---
+
+_plan_lock = threading.Lock()
+_last_plan: dict[str, float] = {}
+
+
+def _should_capture_plan(statement: str) -> bool:
+    config = slow_query_config()
+    if not config.capture_plan:
+        return False
+
+    now = time.monotonic()
+    with _plan_lock:
+        last = _last_plan.get(statement)
+        if last is not None and now - last < config.plan_interval:
+            return False
+        _last_plan[statement] = now
+        return True
+
+
+def _capture_plan(record_id: str, statement: str, sql: str, params: tuple):
+    from persistence.session import conn_string
+
+    plans = []
+    conn = None
+    try:
+        # Conexão própria, fora do pool, para não competir com os pedidos
+        conn = pyodbc.connect(conn_string(), autocommit=True)
+        cursor = conn.cursor()
+        cursor.execute("SET SHOWPLAN_XML ON")
+        try:
+            cursor.execute(sql, *params)
+            while True:
+                if cursor.description:
+                    plans.extend(row[0] for row in cursor.fetchall())
+                if not cursor.nextset():
+                    break
+        finally:
+            cursor.execute("SET SHOWPLAN_XML OFF")
+
+        _logger().info(json.dumps({
+            "type": "plan",
+            "id": record_id,
+            "statement": statement,
+            "plans": plans,
+        }, ensure_ascii=False))
+
+    except pyodbc.Error as e:
+        _logger().info(json.dumps({
+            "type": "plan_error",
+            "id": record_id,
+            "statement": statement,
+            "error": str(e),
+        }, ensure_ascii=False))
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+# --- REGISTO ---
+
+def log_slow_query(statement: str, sql: str, params: tuple, elapsed: float, batch: Optional[int] = None):
+    """`batch`: número de linhas de um executemany (`params` são os da primeira)."""
+    params = _flatten_params(params)
+    now = datetime.datetime.now()
+    record_id = f"{now:%Y%m%d%H%M%S%f}-{threading.get_ident()}"
+
+    record = {
+        "type": "slow_query",
+        "id": record_id,
+        "timestamp": now.isoformat(timespec="milliseconds"),
+        "statement": statement,
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "caller": calling_function(),
+        "params": [redact(p) for p in params],
+        "sql": " ".join(sql.split()),
+    }
+    if batch is not None:
+        record["batch"] = batch
+    _logger().info(json.dumps(record, ensure_ascii=False))
+
+    if _should_capture_plan(statement):
+        threading.Thread(
+            target=_capture_plan,
+            args=(record_id, statement, sql, params),
+            name="slow-query-plan",
+            daemon=True,
+        ).start()
@@ -0,0 +1,84 @@
+# persistence/unit_of_work.py
+from typing import Optional
+
+from flask import g, has_app_context
+
+from persistence.session import ConnectionPool, PooledConnection, get_pool, set_scope_provider
+
+
+class UnitOfWork:
+    """
+    Conexão única partilhada por todas as chamadas de persistência de um pedido.
+
+    A conexão é pedida ao pool na primeira chamada e só volta ao pool no
+    teardown do pedido. Cada `with create_connection()` continua a ser uma
+    transação própria (commit/rollback no fim do bloco).
+    """
+
+    def __init__(self, pool: ConnectionPool):
+        self._pool = pool
+        self._slot = None
+        self._lent = False
+        self.lends = 0
+
+    def lend(self):
+        # Chamada aninhada (a conexão já está emprestada): usa uma conexão própria
+        if self._lent:
+            return None
+
+        if self._slot is None:
+            self._slot = self._pool.acquire()
+
+        self._lent = True
+        self.lends += 1
+        return _LentConnection(self)
+
+    def _return(self):
+        self._lent = False
+
+    def close(self):
+        slot, self._slot = self._slot, None
+        self._lent = False
+        if slot is not None:
+            self._pool.release(slot)
+
+
+class _LentConnection(PooledConnection):
+    """Conexão da unit of work: fechá-la devolve-a à unit of work, não ao pool."""
+
+    def __init__(self, unit: UnitOfWork):
+        super().__init__(unit._pool, unit._slot)
+        self._unit = unit
+
+    def close(self):
+        # Tal como pyodbc.Connection.close(), descarta trabalho sem commit
+        if self._slot is not None:
+            self.raw.rollback()
+        self._give_back()
+
+    def _give_back(self):
+        slot, self._slot = self._slot, None
+        if slot is not None:
+            self._unit._return()
+
+
+def current() -> Optional[UnitOfWork]:
+    """Unit of work do pedido atual, criada na primeira utilização."""
+    if not has_app_context():
+        return None
+
+    unit = g.get("db_uow")
+    if unit is None:
+        unit = g.db_uow = UnitOfWork(get_pool())
+    return unit
+
+
+def _teardown(exc):
+    unit = g.pop("db_uow", None)
+    if unit is not None:
+        unit.close()
+
+
+def init_app(app):
+    set_scope_provider(current)
+    app.teardown_appcontext(_teardown)
@@ -2,9 +2,6 @@ import pyodbc
 from persistence.session import create_connection
 
 def get_users():
-    conn = create_connection()
-    cursor = conn.cursor()
-
     query = """
         SELECT  U.ID,
                 U.PrimeiroNome AS PNome,
@@ -17,8 +14,10 @@ def get_users():
         FROM FantasyChamp.Utilizador U
     """
 
-    cursor.execute(query)
-    rows = cursor.fetchall()
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query)
+        rows = cursor.fetchall()
 
     users = []
     for row in rows:
@@ -35,17 +34,16 @@ def get_users():
     return users
 
 def login_user(email, password):
-    conn = create_connection()
-    cursor = conn.cursor()
-
     query = """
         SELECT ID, PrimeiroNome, Apelido, Email
         FROM FantasyChamp.Utilizador
         WHERE Email = ? AND Senha = ?
     """
 
-    cursor.execute(query, (email, password))
-    row = cursor.fetchone()
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, (email, password))
+        row = cursor.fetchone()
 
     if row:
         return {
@@ -60,17 +58,16 @@ def login_user(email, password):
 
 def get_user_by_id(user_id):
     """Retorna um dicionário com os dados do utilizador ou None se não existir."""
-    conn = create_connection()
-    cursor = conn.cursor()
-
     query = """
         SELECT ID, PrimeiroNome, Apelido, Email, País AS Pais, Nacionalidade, DataDeNascimento
         FROM FantasyChamp.Utilizador
         WHERE ID = ?
     """
 
-    cursor.execute(query, (user_id,))
-    row = cursor.fetchone()
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, (user_id,))
+        row = cursor.fetchone()
 
     if not row:
         return None
@@ -0,0 +1,202 @@
+"""
+Job de fecho de jornada: recalcula Pontuação_Equipa em lotes de equipas.
+
+Cada lote (N equipas, por ordem de ID) é gravado numa transação juntamente com
+o checkpoint em FantasyChamp.Pontuação_Job_Checkpoint
+(ver queries/table_PontuacaoJobCheckpoint.sql). Se o job for interrompido,
+`--resume` continua a partir do último lote gravado.
+
+Uso:
+    python pontuacao_job.py [--batch-size 500] [--resume] [--dry-run] [--job fecho_jornada]
+
+Com --dry-run nada é gravado: mostra as diferenças entre as pontuações
+calculadas e as guardadas.
+
+No fim do job (fecho de jornada) são geradas as classificações de cada liga
+nas jornadas já fechadas (FantasyChamp.Classificação_Jornada) e reconstruída a
+classificação geral das ligas privadas (FantasyChamp.Classificação_Liga, ver
+persistence/classificacoes.py). O checkpoint só fica concluído depois disso: se
+a reconstrução falhar, `--resume` repete apenas este passo final.
+"""
+
+import argparse
+import sys
+import time
+from typing import Optional
+
+from persistence.classificacoes import reconstruir_classificacoes
+from persistence.scoring import (
+    calcular_equipas,
+    carregar_pontuacoes_guardadas,
+    comparar_pontuacoes,
+    gerar_classificacoes,
+    gravar_pontuacoes,
+)
+from persistence.session import create_connection
+
+
+# --- CHECKPOINT ---
+
+def _ler_checkpoint(cursor, job: str):
+    cursor.execute("""
+        SELECT ultima_equipa, lotes, equipas, linhas_alteradas, concluido
+        FROM FantasyChamp.Pontuação_Job_Checkpoint
+        WHERE Job = ?
+    """, job)
+    return cursor.fetchone()
+
+
+def _reiniciar_checkpoint(cursor, job: str):
+    cursor.execute("""
+        MERGE FantasyChamp.Pontuação_Job_Checkpoint AS T
+        USING (SELECT ? AS Job) AS S ON T.Job = S.Job
+        WHEN MATCHED THEN
+            UPDATE SET ultima_equipa = NULL, lotes = 0, equipas = 0, linhas_alteradas = 0,
+                       concluido = 0, iniciado_em = SYSUTCDATETIME(), atualizado_em = SYSUTCDATETIME()
+        WHEN NOT MATCHED THEN
+            INSERT (Job) VALUES (S.Job);
+    """, job)
+
+
+def _avancar_checkpoint(cursor, job: str, ultima_equipa: str, equipas: int, alteradas: int):
+    cursor.execute("""
+        UPDATE FantasyChamp.Pontuação_Job_Checkpoint
+        SET ultima_equipa = CAST(? AS UNIQUEIDENTIFIER),
+            lotes = lotes + 1,
+            equipas = equipas + ?,
+            linhas_alteradas = linhas_alteradas + ?,
+            atualizado_em = SYSUTCDATETIME()
+        WHERE Job = ?
+    """, ultima_equipa, equipas, alteradas, job)
+
+
+def _concluir_checkpoint(cursor, job: str):
+    cursor.execute("""
+        UPDATE FantasyChamp.Pontuação_Job_Checkpoint
+        SET concluido = 1, atualizado_em = SYSUTCDATETIME()
+        WHERE Job = ?
+    """, job)
+
+
+# --- LOTES ---
+
+def _proximo_lote(cursor, depois_de: Optional[str], tamanho: int) -> list[str]:
+    # A comparação é feita no servidor: a ordem de UNIQUEIDENTIFIER no SQL Server
+    # não é a ordem das strings em Python
+    cursor.execute("""
+        SELECT TOP (?) ID
+        FROM FantasyChamp.Equipa
+        WHERE ? IS NULL OR ID > CAST(? AS UNIQUEIDENTIFIER)
+        ORDER BY ID
+    """, tamanho, depois_de, depois_de)
+    return [str(row.ID) for row in cursor.fetchall()]
+
+
+def _contar_restantes(cursor, depois_de: Optional[str]) -> int:
+    cursor.execute("""
+        SELECT COUNT(*)
+        FROM FantasyChamp.Equipa
+        WHERE ? IS NULL OR ID > CAST(? AS UNIQUEIDENTIFIER)
+    """, depois_de, depois_de)
+    return cursor.fetchone()[0]
+
+
+def _mostrar_diferencas(diferencas: list[tuple], limite: int):
+    for linha, guardada in diferencas[:limite]:
+        antes = "(sem linha)" if guardada is None else f"{guardada[0]} / {guardada[1]}"
+        print(f"    {linha.id_equipa} {linha.id_jornada}: {antes} -> "
+              f"{linha.pontuacao_jornada} / {linha.pontuacao_acumulada}")
+    if len(diferencas) > limite:
+        print(f"    ... e mais {len(diferencas) - limite} diferenças")
+
+
+# --- JOB ---
+
+def executar(job: str, tamanho_lote: int, retomar: bool, dry_run: bool, max_diferencas: int) -> int:
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        checkpoint = _ler_checkpoint(cursor, job)
+
+        if retomar and checkpoint is not None and checkpoint.concluido:
+            print(f"O job '{job}' já foi concluído; nada a retomar.")
+            return 0
+
+        depois_de = None
+        if retomar and checkpoint is not None and checkpoint.ultima_equipa is not None:
+            depois_de = str(checkpoint.ultima_equipa)
+            print(f"A retomar '{job}' depois de {checkpoint.lotes} lotes ({checkpoint.equipas} equipas)")
+        elif not dry_run:
+            _reiniciar_checkpoint(cursor, job)
+            conn.commit()
+
+        total_equipas = _contar_restantes(cursor, depois_de)
+
+    inicio = time.perf_counter()
+    equipas = alteradas = lotes = 0
+
+    while True:
+        with create_connection() as conn:
+            cursor = conn.cursor()
+            lote = _proximo_lote(cursor, depois_de, tamanho_lote)
+            if not lote:
+                if not dry_run:
+                    jornadas = gerar_classificacoes(cursor)
+                    conn.commit()
+                    print(f"Classificações geradas para {jornadas} jornadas fechadas")
+                break
+
+            inicio_lote = time.perf_counter()
+            linhas = calcular_equipas(cursor, lote)
+
+            if dry_run:
+                diferencas = comparar_pontuacoes(linhas, carregar_pontuacoes_guardadas(cursor, lote))
+                n_alteradas = len(diferencas)
+                if diferencas:
+                    _mostrar_diferencas(diferencas, max_diferencas)
+            else:
+                # Pontuações e checkpoint na mesma transação
+                n_alteradas = gravar_pontuacoes(cursor, linhas)
+                _avancar_checkpoint(cursor, job, lote[-1], len(lote), n_alteradas)
+                conn.commit()
+
+        depois_de = lote[-1]
+        lotes += 1
+        equipas += len(lote)
+        alteradas += n_alteradas
+
+        agora = time.perf_counter()
+        print(f"Lote {lotes}: {equipas}/{total_equipas} equipas, {n_alteradas} linhas "
+              f"{'diferentes' if dry_run else 'alteradas'} "
+              f"({len(lote) / (agora - inicio_lote):.0f} equipas/s, média {equipas / (agora - inicio):.0f} equipas/s)")
+
+    if not dry_run:
+        reconstruir_classificacoes()
+        with create_connection() as conn:
+            _concluir_checkpoint(conn.cursor(), job)
+            conn.commit()
+
+    duracao = time.perf_counter() - inicio
+    modo = "Dry-run" if dry_run else "Job"
+    print(f"{modo} '{job}' concluído: {equipas} equipas em {lotes} lotes, {alteradas} linhas "
+          f"{'diferentes' if dry_run else 'alteradas'} em {duracao:.2f}s"
+          + (f" ({equipas / duracao:.0f} equipas/s)" if duracao > 0 and equipas else ""))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula as pontuações das equipas em lotes com checkpoint")
+    parser.add_argument("--batch-size", type=int, default=500, help="equipas por lote (uma transação por lote)")
+    parser.add_argument("--resume", action="store_true", help="continuar a partir do último lote gravado")
+    parser.add_argument("--dry-run", action="store_true", help="não gravar; mostrar diferenças para o guardado")
+    parser.add_argument("--max-diffs", type=int, default=20, help="diferenças mostradas por lote em --dry-run")
+    parser.add_argument("--job", default="fecho_jornada", help="nome do job (uma linha de checkpoint por job)")
+    args = parser.parse_args()
+
+    if args.batch_size <= 0:
+        parser.error("--batch-size tem de ser positivo")
+
+    sys.exit(executar(args.job, args.batch_size, args.resume, args.dry_run, args.max_diffs))
+
+
+if __name__ == "__main__":
+    main()
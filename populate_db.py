@@ -28,6 +28,8 @@ from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from typing import List, Dict, Optional
 
+from persistence.scoring_rules import pontuar_jogador
+
 # Carregar variáveis de ambiente do ficheiro .env
 load_dotenv()
 
@@ -39,6 +41,14 @@ API_URL = "https://api.football-data.org/v4"
 CHAMPIONS_LEAGUE_ID = "CL"
 SEASON = 2025
 
+# Posições da API (football-data.org) -> posições internas (tabela Posição)
+POSITION_MAP = {
+    'Goalkeeper': 'Goalkeeper',
+    'Defence': 'Defender',
+    'Midfield': 'Midfielder',
+    'Offence': 'Forward'
+}
+
 # ============================================================================
 # LIMITES DO DATASET
 # ============================================================================
@@ -375,13 +385,7 @@ class DatabaseManager:
         
         # Mapear posição da API para posição interna
         api_position = player_data.get('position', 'Midfield')
-        position_map = {
-            'Goalkeeper': 'Goalkeeper',
-            'Defence': 'Defender',
-            'Midfield': 'Midfielder',
-            'Offence': 'Forward'
-        }
-        position_name = position_map.get(api_position, 'Midfielder')
+        position_name = POSITION_MAP.get(api_position, 'Midfielder')
         position_id = self.get_or_create_position(position_name)
         
         if not position_id:
@@ -558,8 +562,9 @@ class DatabaseManager:
                 elif player_in and str(player_in.get('id')) == player_id:
                     stats['TempoJogo'] = 90 - minute
             
-            # Golos sofridos (apenas para GR e Defesas que jogaram 60+ min)
-            position = player.get('position', '')
+            # Golos sofridos (apenas para GR e Defesas que jogaram 60+ min);
+            # a posição da API ('Defence', ...) é convertida como em insert_player
+            position = POSITION_MAP.get(player.get('position', 'Midfield'), 'Midfielder')
             if position in ['Goalkeeper', 'Defender'] and stats['TempoJogo'] >= 60:
                 cursor.execute("""
                     SELECT golos_clube1, golos_clube2, ID_Clube1, ID_Clube2
@@ -575,7 +580,7 @@ class DatabaseManager:
                     else:
                         stats['GolosSofridos'] = golos_clube1 if golos_clube1 else 0
             
-            self.insert_player_pontuacao(player_id, jornada_id, stats)
+            self.insert_player_pontuacao(player_id, jornada_id, stats, position)
     
     def populate_player_statistics_for_matchdays(self):
         """
@@ -710,23 +715,21 @@ class DatabaseManager:
                 stats['CartoesVermelhos'] = 1
                 stats['TempoJogo'] = min(stats['TempoJogo'], random.randint(30, 70))
             
-            self.insert_player_pontuacao(player_id, jornada_id, stats)
+            self.insert_player_pontuacao(player_id, jornada_id, stats, position)
     
-    def insert_player_pontuacao(self, player_id: str, jornada_id: str, stats: Dict) -> bool:
+    def insert_player_pontuacao(self, player_id: str, jornada_id: str, stats: Dict, position: str = '') -> bool:
         """
         Insere a pontuação de um jogador numa jornada.
         
-        Fórmula de cálculo da pontuação:
-        - +1 ponto por cada 30 minutos jogados
-        - +5 pontos por golo marcado
-        - +3 pontos por assistência
-        - -1 ponto por cartão amarelo
-        - -3 pontos por cartão vermelho
+        A pontuação é calculada com as regras de persistence/scoring_rules.py
+        (as mesmas de fn_CalcularPontuacaoJogador, incluindo clean sheet e
+        golos sofridos para guarda-redes e defesas).
         
         Args:
             player_id: ID do jogador
             jornada_id: ID da jornada
             stats: Dicionário com estatísticas do jogador
+            position: Posição do jogador (Goalkeeper, Defender, ...)
             
         Returns:
             True se inserção bem sucedida
@@ -741,14 +744,7 @@ class DatabaseManager:
         """
         
         # Calcular pontuação total
-        pontuacao = 0
-        if stats['TempoJogo'] >= 30:
-            pontuacao += stats['TempoJogo'] // 30
-        
-        pontuacao += stats['GolosMarcados'] * 5
-        pontuacao += stats['Assistencias'] * 3
-        pontuacao -= stats['CartoesAmarelos'] * 1
-        pontuacao -= stats['CartoesVermelhos'] * 3
+        pontuacao = pontuar_jogador(stats, position)
         
         return self.execute_query(
             query,
@@ -42,4 +42,47 @@ CREATE NONCLUSTERED INDEX IX_Pontuacao_Jogador_Lookup
 
 CREATE NONCLUSTERED INDEX IX_Pontuacao_Equipa_Lookup 
     ON FantasyChamp.Pontuação_Equipa(ID_jornada, ID_Equipa) 
-    INCLUDE (pontuação_jornada, pontuação_acumulada);
\ No newline at end of file
+    INCLUDE (pontuação_jornada, pontuação_acumulada);
+
+-- 6. Participantes de uma liga por nome (paginação por cursor e pesquisa por prefixo)
+ALTER TABLE FantasyChamp.Utilizador
+    ADD NomeCompleto AS (PrimeiroNome + ' ' + Apelido) PERSISTED;
+
+CREATE NONCLUSTERED INDEX IX_Utilizador_NomeCompleto
+    ON FantasyChamp.Utilizador(NomeCompleto, ID);
+
+-- Por liga: índice (ID_Liga, nome, id_utilizador) da vista indexada
+-- queries/view_ParticipantesLigaNome.sql (criada depois desta coluna)
+
+-- 7. Versão do catálogo de jogadores (cache em persistence/players.py):
+--    MAX(Versao) muda com qualquer INSERT/UPDATE em Jogador, COUNT com DELETE
+ALTER TABLE FantasyChamp.Jogador
+    ADD Versao ROWVERSION;
+
+CREATE NONCLUSTERED INDEX IX_Jogador_Versao
+    ON FantasyChamp.Jogador(Versao);
+
+-- 8. Listas de jogadores, clubes e jogos paginadas por cursor (persistence/paginacao.py):
+--    a página seguinte é um seek na chave de ordenação, qualquer que seja a página
+CREATE NONCLUSTERED INDEX IX_Jogador_Nome
+    ON FantasyChamp.Jogador(Nome, ID);
+
+CREATE NONCLUSTERED INDEX IX_Clube_Nome
+    ON FantasyChamp.Clube(Nome, ID)
+    INCLUDE (ID_País, clube_imagem);
+
+-- Jogos por data; jogos à mesma hora desempatam pelo ID (a chave do cursor)
+CREATE NONCLUSTERED INDEX IX_Jogo_Data_ID
+    ON FantasyChamp.Jogo(Data DESC, ID DESC)
+    INCLUDE (ID_jornada, ID_Clube1, ID_Clube2, golos_clube1, golos_clube2);
+
+-- 9. Total acumulado de cada equipa como INT (MAX de Pontuação_Equipa, mantido por
+--    trg_PontuacaoEquipa_AtualizarTotal; PontuaçãoTotal não é alterada): a posição
+--    em /ligas é um COUNT dos participantes com mais pontos, lido só deste índice,
+--    sem TRY_CAST nem ordenar a liga
+ALTER TABLE FantasyChamp.Equipa
+    ADD Pontos INT NOT NULL CONSTRAINT DF_Equipa_Pontos DEFAULT 0;
+
+CREATE NONCLUSTERED INDEX IX_Equipa_Utilizador_Pontos
+    ON FantasyChamp.Equipa(ID_utilizador)
+    INCLUDE (Pontos);
@@ -52,14 +52,16 @@ BEGIN
     FROM FantasyChamp.Jornada 
     WHERE ID = @ID_Jornada;
 
-    -- Somar pontos de todas as jornadas até à atual (inclusive)
-    SELECT @PontuacaoAcumulada = ISNULL(SUM(PE.pontuação_jornada), 0)
+    -- Acumulado da jornada anterior (uma linha, em vez de somar todas as jornadas)
+    SELECT TOP 1 @PontuacaoAcumulada = PE.pontuação_acumulada
     FROM FantasyChamp.Pontuação_Equipa PE
     INNER JOIN FantasyChamp.Jornada J ON PE.ID_jornada = J.ID
     WHERE PE.ID_Equipa = @ID_Equipa 
-      AND J.Numero <= @NumeroJornadaAtual;
+      AND J.Numero < @NumeroJornadaAtual
+    ORDER BY J.Numero DESC;
 
-    -- Adicionar a pontuação da jornada atual (que ainda pode não estar na tabela)
+    -- Adicionar a pontuação da jornada atual (a linha guardada desta jornada não conta,
+    -- para não a somar duas vezes quando a SP é executada de novo)
     SET @PontuacaoAcumulada = ISNULL(@PontuacaoAcumulada, 0) + @PontuacaoJornada;
 
     -- 5. Atualizar tabela Pontuação_Equipa
@@ -1,60 +1,81 @@
 CREATE PROCEDURE FantasyChamp.sp_AtualizarPontuacoesBatch
     @Resultado BIT OUTPUT,
-    @Mensagem NVARCHAR(200) OUTPUT
+    @Mensagem NVARCHAR(200) OUTPUT,
+    @NumeroDesde INT = NULL     -- NULL = todas as jornadas; senão só esta jornada e as seguintes
 AS
 BEGIN
     SET NOCOUNT ON;
 
-    DECLARE @ID_Equipa UNIQUEIDENTIFIER;
-    DECLARE @ID_Jornada VARCHAR(16);
     DECLARE @CountTotal INT = 0;
-    DECLARE @R BIT, @M NVARCHAR(200);
+    DECLARE @JornadaAnterior VARCHAR(16) = NULL;
 
     BEGIN TRY
-        -- Criar cursor para todas as equipas e jornadas
-        DECLARE cursor_equipas_jornadas CURSOR FOR
-            SELECT E.ID, J.ID
-            FROM FantasyChamp.Equipa E
-            CROSS JOIN FantasyChamp.Jornada J
-            ORDER BY E.ID, J.ID;
-
-        OPEN cursor_equipas_jornadas;
-        FETCH NEXT FROM cursor_equipas_jornadas INTO @ID_Equipa, @ID_Jornada;
-
-        WHILE @@FETCH_STATUS = 0
+        -- Sufixo: partir do acumulado já guardado na jornada anterior
+        IF @NumeroDesde IS NOT NULL
         BEGIN
-            -- Atualizar pontuação para esta equipa e jornada
-            EXEC FantasyChamp.AtualizarPontuacaoEquipa
-                @ID_Equipa = @ID_Equipa,
-                @ID_Jornada = @ID_Jornada,
-                @Resultado = @R OUTPUT,
-                @Mensagem = @M OUTPUT;
-
-            SET @CountTotal = @CountTotal + 1;
-
-            -- Print progresso a cada 100 registos
-            IF @CountTotal % 100 = 0
-                PRINT 'Processados ' + CAST(@CountTotal AS NVARCHAR(10)) + ' registos...';
+            SELECT TOP 1 @JornadaAnterior = ID
+            FROM FantasyChamp.Jornada
+            WHERE Numero < @NumeroDesde
+            ORDER BY Numero DESC;
 
-            FETCH NEXT FROM cursor_equipas_jornadas INTO @ID_Equipa, @ID_Jornada;
+            -- Sem jornada anterior, ou equipas sem acumulado nessa jornada: recalcular tudo
+            IF @JornadaAnterior IS NULL
+               OR EXISTS (SELECT 1 FROM FantasyChamp.Equipa E
+                          WHERE NOT EXISTS (SELECT 1 FROM FantasyChamp.Pontuação_Equipa PE
+                                            WHERE PE.ID_Equipa = E.ID AND PE.ID_jornada = @JornadaAnterior))
+            BEGIN
+                SET @NumeroDesde = NULL;
+                SET @JornadaAnterior = NULL;
+            END
         END
 
-        CLOSE cursor_equipas_jornadas;
-        DEALLOCATE cursor_equipas_jornadas;
+        WITH PontosJogadores AS (
+            -- Pontos dos titulares de cada equipa em cada jornada, numa só agregação
+            SELECT PE.ID_Equipa, PJ.ID_jornada, SUM(TRY_CAST(PJ.pontuação_total AS INT)) AS Pontos
+            FROM FantasyChamp.Pertence PE
+            JOIN FantasyChamp.Pontuação_Jogador PJ ON PJ.ID_jogador = PE.ID_Jogador
+            WHERE PE.benched = 0
+            GROUP BY PE.ID_Equipa, PJ.ID_jornada
+        ),
+        PontosJornada AS (
+            SELECT E.ID AS ID_Equipa, J.ID AS ID_jornada, J.Numero,
+                   ISNULL(P.Pontos, 0) AS pontuação_jornada
+            FROM FantasyChamp.Equipa E
+            CROSS JOIN FantasyChamp.Jornada J
+            LEFT JOIN PontosJogadores P ON P.ID_Equipa = E.ID AND P.ID_jornada = J.ID
+            WHERE @NumeroDesde IS NULL OR J.Numero >= @NumeroDesde
+        ),
+        Novas AS (
+            -- Acumulado numa única passagem ordenada por equipa (soma de prefixos)
+            SELECT P.ID_Equipa, P.ID_jornada, P.pontuação_jornada,
+                   ISNULL(B.pontuação_acumulada, 0)
+                   + SUM(P.pontuação_jornada) OVER (PARTITION BY P.ID_Equipa
+                                                    ORDER BY P.Numero
+                                                    ROWS UNBOUNDED PRECEDING) AS pontuação_acumulada
+            FROM PontosJornada P
+            LEFT JOIN FantasyChamp.Pontuação_Equipa B
+                ON B.ID_Equipa = P.ID_Equipa AND B.ID_jornada = @JornadaAnterior
+        )
+        MERGE FantasyChamp.Pontuação_Equipa AS T
+        USING Novas AS S
+            ON T.ID_Equipa = S.ID_Equipa AND T.ID_jornada = S.ID_jornada
+        WHEN MATCHED AND (
+                ISNULL(T.pontuação_jornada, -1) <> S.pontuação_jornada
+             OR ISNULL(T.pontuação_acumulada, -1) <> S.pontuação_acumulada) THEN
+            UPDATE SET pontuação_jornada = S.pontuação_jornada,
+                       pontuação_acumulada = S.pontuação_acumulada
+        WHEN NOT MATCHED BY TARGET THEN
+            INSERT (ID_Equipa, ID_jornada, pontuação_jornada, pontuação_acumulada)
+            VALUES (S.ID_Equipa, S.ID_jornada, S.pontuação_jornada, S.pontuação_acumulada);
+
+        SET @CountTotal = @@ROWCOUNT;
 
         SET @Resultado = 1;
-        SET @Mensagem = 'Atualização concluída. ' + CAST(@CountTotal AS NVARCHAR(10)) + ' registos processados.';
+        SET @Mensagem = 'Atualização concluída. ' + CAST(@CountTotal AS NVARCHAR(10)) + ' registos alterados.';
 
     END TRY
     BEGIN CATCH
         SET @Resultado = 0;
         SET @Mensagem = 'Erro: ' + ERROR_MESSAGE();
-
-        -- Fechar cursor se ainda aberto
-        IF CURSOR_STATUS('global', 'cursor_equipas_jornadas') >= 0
-        BEGIN
-            CLOSE cursor_equipas_jornadas;
-            DEALLOCATE cursor_equipas_jornadas;
-        END
     END CATCH
-END;
\ No newline at end of file
+END;
@@ -0,0 +1,76 @@
+CREATE PROCEDURE FantasyChamp.sp_GerarClassificacaoJornada
+    @NumeroDesde INT = NULL,            -- NULL = todas as jornadas fechadas
+    @ApenasExistentes BIT = 0,          -- 1 = só reescrever jornadas que já têm classificação
+    @Jornadas INT = 0 OUTPUT            -- jornadas (re)escritas
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @ID_Jornada VARCHAR(16), @Numero INT, @JornadaAnterior VARCHAR(16);
+    SET @Jornadas = 0;
+
+    -- Por ordem de jornada: as variações usam a classificação da jornada anterior
+    DECLARE jornadas CURSOR LOCAL FAST_FORWARD FOR
+        SELECT J.ID, J.Numero
+        FROM FantasyChamp.Jornada J
+        WHERE J.Data_Fim < GETDATE()
+          AND (@NumeroDesde IS NULL OR J.Numero >= @NumeroDesde)
+          AND (@ApenasExistentes = 0
+               OR EXISTS (SELECT 1 FROM FantasyChamp.Classificação_Jornada C WHERE C.ID_jornada = J.ID))
+        ORDER BY J.Numero;
+
+    OPEN jornadas;
+    FETCH NEXT FROM jornadas INTO @ID_Jornada, @Numero;
+
+    WHILE @@FETCH_STATUS = 0
+    BEGIN
+        SET @JornadaAnterior = NULL;
+        SELECT TOP 1 @JornadaAnterior = ID
+        FROM FantasyChamp.Jornada
+        WHERE Numero < @Numero
+        ORDER BY Numero DESC;
+
+        DELETE FROM FantasyChamp.Classificação_Jornada WHERE ID_jornada = @ID_Jornada;
+
+        ;WITH Totais AS (
+            SELECT
+                P.ID_Liga,
+                E.ID AS ID_Equipa,
+                ISNULL(PJ.pontuação_jornada, 0) AS pontuação_jornada,
+                ISNULL(PA.pontuação_acumulada, 0) AS pontuação_acumulada
+            FROM FantasyChamp.Participa P
+            INNER JOIN FantasyChamp.Equipa E ON P.ID_Utilizador = E.ID_utilizador
+            LEFT JOIN FantasyChamp.Pontuação_Equipa PJ
+                ON PJ.ID_Equipa = E.ID AND PJ.ID_jornada = @ID_Jornada
+            -- Acumulado no fim da jornada (a última linha até esta jornada)
+            OUTER APPLY (
+                SELECT TOP 1 PE.pontuação_acumulada
+                FROM FantasyChamp.Pontuação_Equipa PE
+                JOIN FantasyChamp.Jornada J ON J.ID = PE.ID_jornada
+                WHERE PE.ID_Equipa = E.ID AND J.Numero <= @Numero
+                ORDER BY J.Numero DESC
+            ) PA
+        ),
+        Ordenadas AS (
+            -- Mesma ordem do ranking geral (sp_ObterRankingLigaComEquipas e leaderboard)
+            SELECT *,
+                   ROW_NUMBER() OVER (PARTITION BY ID_Liga
+                                      ORDER BY pontuação_acumulada DESC, ID_Equipa) AS posicao
+            FROM Totais
+        )
+        INSERT INTO FantasyChamp.Classificação_Jornada
+            (ID_Liga, ID_jornada, posicao, ID_Equipa, pontuação_jornada, pontuação_acumulada,
+             posicao_anterior, variacao)
+        SELECT O.ID_Liga, @ID_Jornada, O.posicao, O.ID_Equipa, O.pontuação_jornada, O.pontuação_acumulada,
+               A.posicao, A.posicao - O.posicao
+        FROM Ordenadas O
+        LEFT JOIN FantasyChamp.Classificação_Jornada A
+            ON A.ID_Liga = O.ID_Liga AND A.ID_jornada = @JornadaAnterior AND A.ID_Equipa = O.ID_Equipa;
+
+        SET @Jornadas = @Jornadas + 1;
+        FETCH NEXT FROM jornadas INTO @ID_Jornada, @Numero;
+    END
+
+    CLOSE jornadas;
+    DEALLOCATE jornadas;
+END;
@@ -26,7 +26,8 @@ BEGIN
                 GROUP BY E.ID, E.Nome, E.ID_utilizador, U.PrimeiroNome, U.Apelido
             )
             SELECT
-                ROW_NUMBER() OVER (ORDER BY pontuacao_total DESC, nome_utilizador) AS posicao,
+                -- Empates desempatados pelo id da equipa (a mesma ordem do leaderboard)
+                ROW_NUMBER() OVER (ORDER BY pontuacao_total DESC, id_equipa) AS posicao,
                 nome_utilizador,
                 nome_equipa,
                 pontuacao_total AS pontuacao_acumulada,
@@ -34,7 +35,7 @@ BEGIN
                 id_utilizador,
                 pontuacao_total AS pontuacao
             FROM EquipaPontuacoes
-            ORDER BY pontuacao_total DESC, nome_utilizador;
+            ORDER BY pontuacao_total DESC, id_equipa;
         END
         ELSE
         BEGIN
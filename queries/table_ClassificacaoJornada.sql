@@ -0,0 +1,21 @@
+-- Classificação de cada liga no fim de cada jornada já fechada (Data_Fim passada).
+-- Escrita por FantasyChamp.sp_GerarClassificacaoJornada no fecho da jornada e
+-- reescrita quando uma correção de estatísticas muda essa jornada ou anteriores.
+-- Ler uma página de uma jornada passada é uma leitura por intervalo da chave
+-- primária, sem voltar a agrupar e ordenar as equipas da liga.
+CREATE TABLE FantasyChamp.Classificação_Jornada (
+    ID_Liga UNIQUEIDENTIFIER NOT NULL,
+    ID_jornada VARCHAR(16) NOT NULL,
+    posicao INT NOT NULL,
+    ID_Equipa UNIQUEIDENTIFIER NOT NULL,
+    pontuação_jornada INT NOT NULL,
+    pontuação_acumulada INT NOT NULL,
+    posicao_anterior INT NULL,      -- posição no fim da jornada anterior (NULL se não estava na liga)
+    variacao INT NULL,              -- posicao_anterior - posicao (positivo = subiu)
+    PRIMARY KEY (ID_Liga, ID_jornada, posicao)
+);
+
+-- Posição de uma equipa (cursores e "a minha posição")
+CREATE UNIQUE INDEX IX_ClassificacaoJornada_Equipa
+    ON FantasyChamp.Classificação_Jornada (ID_Liga, ID_jornada, ID_Equipa)
+    INCLUDE (posicao);
@@ -0,0 +1,16 @@
+-- Classificação geral atual de cada liga, reconstruída para todas as ligas de uma
+-- vez por persistence/classificacoes.py (no fim de pontuacao_job.py). Ler a
+-- posição de uma equipa é uma procura no índice, sem ordenar a liga. Só é válida
+-- enquanto Versao_Liga.versao_classificacao = Versao_Liga.versao (queries/table_VersaoLiga.sql);
+-- lida por obter_resumo_ligas_utilizador (/ligas) e pelo leaderboard (/liga/<id>).
+CREATE TABLE FantasyChamp.Classificação_Liga (
+    ID_Liga UNIQUEIDENTIFIER NOT NULL,
+    posicao INT NOT NULL,
+    ID_Equipa UNIQUEIDENTIFIER NOT NULL,
+    pontuação INT NOT NULL,
+    PRIMARY KEY (ID_Liga, posicao)
+);
+
+CREATE UNIQUE INDEX IX_ClassificacaoLiga_Equipa
+    ON FantasyChamp.Classificação_Liga (ID_Liga, ID_Equipa)
+    INCLUDE (posicao, pontuação);
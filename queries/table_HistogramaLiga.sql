@@ -0,0 +1,11 @@
+-- Número de equipas de cada liga com cada total (Equipa.Pontos), mantido pelos
+-- triggers em queries/triggers.sql sempre que um total muda ou uma equipa entra ou
+-- sai da liga. Tem uma linha por total distinto, não por equipa: o resumo de /ligas
+-- lê daqui a posição aproximada e o "top X%" das ligas públicas cujo leaderboard
+-- não está em memória (persistence/histograma.py), sem contar os participantes.
+CREATE TABLE FantasyChamp.Histograma_Liga (
+    ID_Liga UNIQUEIDENTIFIER NOT NULL,
+    pontos INT NOT NULL,
+    equipas INT NOT NULL,
+    PRIMARY KEY (ID_Liga, pontos)
+);
@@ -0,0 +1,13 @@
+-- Checkpoint do job de pontuações (pontuacao_job.py): última equipa cujo lote
+-- ficou gravado. É atualizado na mesma transação que as pontuações do lote,
+-- por isso --resume nunca salta nem repete trabalho já gravado.
+CREATE TABLE FantasyChamp.Pontuação_Job_Checkpoint (
+    Job VARCHAR(50) NOT NULL PRIMARY KEY,
+    ultima_equipa UNIQUEIDENTIFIER NULL,     -- NULL = ainda nenhum lote gravado
+    lotes INT NOT NULL DEFAULT 0,
+    equipas INT NOT NULL DEFAULT 0,
+    linhas_alteradas INT NOT NULL DEFAULT 0,
+    concluido BIT NOT NULL DEFAULT 0,
+    iniciado_em DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME(),
+    atualizado_em DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+);
@@ -0,0 +1,10 @@
+-- Outbox de estatísticas alteradas: cada linha indica um (jogador, jornada)
+-- cuja pontuação mudou e cujas equipas têm de ser recalculadas.
+-- Preenchida pelo trigger trg_PontuacaoJogador_RegistarAlteracao e
+-- consumida por persistence.scoring.recalcular_alteracoes().
+CREATE TABLE FantasyChamp.Pontuação_Jogador_Alterada (
+    ID BIGINT IDENTITY(1,1) NOT NULL PRIMARY KEY,
+    ID_jogador VARCHAR(16) NOT NULL,
+    ID_jornada VARCHAR(16) NOT NULL,
+    alterado_em DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+);
@@ -0,0 +1,11 @@
+-- Versão das pontuações de cada liga: sobe sempre que o total de uma equipa da
+-- liga muda ou alguém entra/sai da liga (triggers em queries/triggers.sql).
+-- O leaderboard em memória e o stream de classificação comparam só este número
+-- (uma procura pela chave primária) em vez de agregar Pontuação_Equipa da liga.
+-- versao_classificacao é a versão em que Classificação_Liga foi reconstruída
+-- (persistence/classificacoes.py): a classificação gravada só é usada se for igual a versao.
+CREATE TABLE FantasyChamp.Versao_Liga (
+    ID_Liga UNIQUEIDENTIFIER NOT NULL PRIMARY KEY,
+    versao BIGINT NOT NULL,
+    versao_classificacao BIGINT NULL
+);
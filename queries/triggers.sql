@@ -76,3 +76,164 @@ BEGIN
     END CATCH
 END;
 GO
+
+CREATE TRIGGER FantasyChamp.trg_PontuacaoJogador_RegistarAlteracao
+ON FantasyChamp.Pontuação_Jogador
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    -- Registar cada (jogador, jornada) inserido, corrigido ou removido
+    INSERT INTO FantasyChamp.Pontuação_Jogador_Alterada (ID_jogador, ID_jornada)
+    SELECT ID_jogador, ID_jornada FROM inserted
+    UNION
+    SELECT ID_jogador, ID_jornada FROM deleted;
+END;
+GO
+
+CREATE TRIGGER FantasyChamp.trg_PontuacaoEquipa_AtualizarTotal
+ON FantasyChamp.Pontuação_Equipa
+AFTER INSERT, UPDATE, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @Alteradas TABLE (ID_utilizador UNIQUEIDENTIFIER NOT NULL, antigo INT NOT NULL, novo INT NOT NULL);
+
+    -- Equipa.Pontos = acumulado da equipa (o mesmo MAX do ranking geral), mantido
+    -- aqui para o resumo de ligas não ter de agregar Pontuação_Equipa.
+    -- PontuaçãoTotal continua a ser só o valor gravado pela aplicação
+    UPDATE E
+    SET Pontos = ISNULL(T.Total, 0)
+    OUTPUT inserted.ID_utilizador, deleted.Pontos, inserted.Pontos INTO @Alteradas
+    FROM FantasyChamp.Equipa E
+    JOIN (SELECT ID_Equipa FROM inserted UNION SELECT ID_Equipa FROM deleted) A ON A.ID_Equipa = E.ID
+    OUTER APPLY (
+        SELECT MAX(PE.pontuação_acumulada) AS Total
+        FROM FantasyChamp.Pontuação_Equipa PE
+        WHERE PE.ID_Equipa = E.ID
+    ) T
+    WHERE E.Pontos <> ISNULL(T.Total, 0);
+
+    -- Nova versão das ligas dessas equipas (queries/table_VersaoLiga.sql)
+    MERGE FantasyChamp.Versao_Liga AS T
+    USING (
+        SELECT DISTINCT P.ID_Liga
+        FROM @Alteradas A
+        JOIN FantasyChamp.Participa P ON P.ID_Utilizador = A.ID_utilizador
+    ) AS S
+        ON T.ID_Liga = S.ID_Liga
+    WHEN MATCHED THEN UPDATE SET versao = T.versao + 1
+    WHEN NOT MATCHED THEN INSERT (ID_Liga, versao) VALUES (S.ID_Liga, 1);
+
+    -- Cada equipa sai do total antigo e entra no novo nessas ligas (queries/table_HistogramaLiga.sql)
+    MERGE FantasyChamp.Histograma_Liga AS T
+    USING (
+        SELECT P.ID_Liga, X.pontos, SUM(X.equipas) AS equipas
+        FROM (
+            SELECT ID_utilizador, antigo AS pontos, -1 AS equipas FROM @Alteradas
+            UNION ALL
+            SELECT ID_utilizador, novo, 1 FROM @Alteradas
+        ) X
+        JOIN FantasyChamp.Participa P ON P.ID_Utilizador = X.ID_utilizador
+        GROUP BY P.ID_Liga, X.pontos
+        HAVING SUM(X.equipas) <> 0
+    ) AS S
+        ON T.ID_Liga = S.ID_Liga AND T.pontos = S.pontos
+    WHEN MATCHED AND T.equipas + S.equipas = 0 THEN DELETE
+    WHEN MATCHED THEN UPDATE SET equipas = T.equipas + S.equipas
+    WHEN NOT MATCHED THEN INSERT (ID_Liga, pontos, equipas) VALUES (S.ID_Liga, S.pontos, S.equipas);
+END;
+GO
+
+CREATE TRIGGER FantasyChamp.trg_Equipa_VersaoLiga
+ON FantasyChamp.Equipa
+AFTER INSERT, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    -- Uma equipa nova (ou removida) entra (sai) das classificações das ligas do utilizador
+    MERGE FantasyChamp.Versao_Liga AS T
+    USING (
+        SELECT DISTINCT P.ID_Liga
+        FROM (SELECT ID_utilizador FROM inserted UNION SELECT ID_utilizador FROM deleted) A
+        JOIN FantasyChamp.Participa P ON P.ID_Utilizador = A.ID_utilizador
+    ) AS S
+        ON T.ID_Liga = S.ID_Liga
+    WHEN MATCHED THEN UPDATE SET versao = T.versao + 1
+    WHEN NOT MATCHED THEN INSERT (ID_Liga, versao) VALUES (S.ID_Liga, 1);
+
+    -- ... e do histograma de pontos dessas ligas, com o total que tinha
+    MERGE FantasyChamp.Histograma_Liga AS T
+    USING (
+        SELECT P.ID_Liga, X.Pontos AS pontos, SUM(X.equipas) AS equipas
+        FROM (
+            SELECT ID_utilizador, Pontos, 1 AS equipas FROM inserted
+            UNION ALL
+            SELECT ID_utilizador, Pontos, -1 FROM deleted
+        ) X
+        JOIN FantasyChamp.Participa P ON P.ID_Utilizador = X.ID_utilizador
+        GROUP BY P.ID_Liga, X.Pontos
+        HAVING SUM(X.equipas) <> 0
+    ) AS S
+        ON T.ID_Liga = S.ID_Liga AND T.pontos = S.pontos
+    WHEN MATCHED AND T.equipas + S.equipas = 0 THEN DELETE
+    WHEN MATCHED THEN UPDATE SET equipas = T.equipas + S.equipas
+    WHEN NOT MATCHED THEN INSERT (ID_Liga, pontos, equipas) VALUES (S.ID_Liga, S.pontos, S.equipas);
+END;
+GO
+
+CREATE TRIGGER FantasyChamp.trg_Participa_VersaoLiga
+ON FantasyChamp.Participa
+AFTER INSERT, DELETE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    -- Alguém entrou ou saiu: a classificação da liga muda
+    MERGE FantasyChamp.Versao_Liga AS T
+    USING (SELECT ID_Liga FROM inserted UNION SELECT ID_Liga FROM deleted) AS S
+        ON T.ID_Liga = S.ID_Liga
+    WHEN MATCHED THEN UPDATE SET versao = T.versao + 1
+    WHEN NOT MATCHED THEN INSERT (ID_Liga, versao) VALUES (S.ID_Liga, 1);
+
+    -- A equipa de quem entrou (saiu) conta (deixa de contar) no histograma da liga
+    MERGE FantasyChamp.Histograma_Liga AS T
+    USING (
+        SELECT X.ID_Liga, E.Pontos AS pontos, SUM(X.equipas) AS equipas
+        FROM (
+            SELECT ID_Liga, ID_Utilizador, 1 AS equipas FROM inserted
+            UNION ALL
+            SELECT ID_Liga, ID_Utilizador, -1 FROM deleted
+        ) X
+        JOIN FantasyChamp.Equipa E ON E.ID_utilizador = X.ID_Utilizador
+        GROUP BY X.ID_Liga, E.Pontos
+        HAVING SUM(X.equipas) <> 0
+    ) AS S
+        ON T.ID_Liga = S.ID_Liga AND T.pontos = S.pontos
+    WHEN MATCHED AND T.equipas + S.equipas = 0 THEN DELETE
+    WHEN MATCHED THEN UPDATE SET equipas = T.equipas + S.equipas
+    WHEN NOT MATCHED THEN INSERT (ID_Liga, pontos, equipas) VALUES (S.ID_Liga, S.pontos, S.equipas);
+END;
+GO
+
+-- Acertar uma vez os totais das equipas que já tinham pontuações antes do trigger
+UPDATE E
+SET Pontos = ISNULL(T.Total, 0)
+FROM FantasyChamp.Equipa E
+OUTER APPLY (
+    SELECT MAX(PE.pontuação_acumulada) AS Total
+    FROM FantasyChamp.Pontuação_Equipa PE
+    WHERE PE.ID_Equipa = E.ID
+) T;
+GO
+
+-- Histograma inicial de cada liga, depois de acertar os totais
+INSERT INTO FantasyChamp.Histograma_Liga (ID_Liga, pontos, equipas)
+SELECT P.ID_Liga, E.Pontos, COUNT(*)
+FROM FantasyChamp.Participa P
+JOIN FantasyChamp.Equipa E ON E.ID_utilizador = P.ID_Utilizador
+GROUP BY P.ID_Liga, E.Pontos;
+GO
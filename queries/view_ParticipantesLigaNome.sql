@@ -0,0 +1,21 @@
+-- Participantes de cada liga pela chave do cursor de /liga/<id> (nome, id do
+-- utilizador). Participa só tem IDs, por isso o nome vem de Utilizador numa vista
+-- indexada: o índice clustered, mantido pelo SQL Server a cada INSERT/DELETE em
+-- Participa ou mudança de nome, é um índice em (ID_Liga, nome, id_utilizador).
+-- Uma página é um seek na liga e no cursor que lê só as linhas da página, mesmo nas
+-- ligas públicas com dezenas de milhares de participantes
+-- (obter_pagina_participantes_liga, com WITH (NOEXPAND)).
+CREATE VIEW FantasyChamp.ParticipantesLigaNome
+WITH SCHEMABINDING
+AS
+    SELECT
+        P.ID_Liga,
+        U.NomeCompleto AS nome,     -- coluna calculada persistida (ver indexes.sql)
+        P.ID_Utilizador AS id_utilizador
+    FROM FantasyChamp.Participa P
+    JOIN FantasyChamp.Utilizador U ON P.ID_Utilizador = U.ID;
+GO
+
+CREATE UNIQUE CLUSTERED INDEX IX_ParticipantesLigaNome
+    ON FantasyChamp.ParticipantesLigaNome (ID_Liga, nome, id_utilizador);
+GO
@@ -0,0 +1,167 @@
+import importlib
+from collections import namedtuple
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("pyodbc")
+
+from persistence import live, metrics, roundtrips, session, slow_query  # noqa: E402
+
+CONF = """
+[live]
+enabled = true
+token = segredo
+flush_interval = 3600
+
+[roundtrips]
+enabled = true
+strict = true
+"""
+
+_CONFIGS = (
+    session._config,
+    live.live_config,
+    metrics.metrics_config,
+    roundtrips.roundtrip_config,
+    slow_query.slow_query_config,
+    slow_query.threshold_seconds,
+)
+
+
+@pytest.fixture
+def aplicacao(tmp_path, monkeypatch):
+    (tmp_path / "conf.ini").write_text(CONF, encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    for config in _CONFIGS:
+        config.cache_clear()
+
+    modulo = importlib.import_module("app")
+    modulo.app.testing = True
+    yield modulo
+
+    for config in _CONFIGS:
+        config.cache_clear()
+
+
+def test_evento_ao_vivo_com_minuto_que_nao_e_numero(aplicacao, monkeypatch):
+    monkeypatch.setattr(aplicacao.live_scoring, "registar_evento", lambda *args: pytest.fail("não validado"))
+    client = aplicacao.app.test_client()
+
+    for minuto in ([12], {"m": 12}, True, "doze"):
+        resposta = client.post(
+            "/live/jogos/G1/eventos",
+            json={"tipo": "golo", "jogador": "av1", "minuto": minuto},
+            headers={"X-Live-Token": "segredo"},
+        )
+        assert resposta.status_code == 400, minuto
+
+
+def _cliente_com_sessao(aplicacao, user_id="U1"):
+    client = aplicacao.app.test_client()
+    with client.session_transaction() as sessao:
+        sessao["user_id"] = user_id
+    return client
+
+
+LIGA = "6F9619FF-8B86-D011-B42D-00C04FC964FF"
+
+
+def test_stream_de_liga_inexistente(aplicacao, monkeypatch):
+    monkeypatch.setattr(aplicacao, "obter_liga_por_id", lambda id_liga: None)
+    client = _cliente_com_sessao(aplicacao)
+
+    assert client.get(f"/liga/{LIGA}/stream").status_code == 404
+    assert client.get("/liga/inventada/stream").status_code == 404
+    assert aplicacao.ranking_stream.broadcaster.produtores() == 0
+
+
+def test_stream_de_liga_sem_participar(aplicacao, monkeypatch):
+    monkeypatch.setattr(aplicacao, "obter_liga_por_id", lambda id_liga: object())
+    monkeypatch.setattr(aplicacao, "verificar_participacao_liga", lambda id_utilizador, id_liga: False)
+    client = _cliente_com_sessao(aplicacao)
+
+    assert client.get(f"/liga/{LIGA}/stream").status_code == 403
+    assert aplicacao.ranking_stream.broadcaster.produtores() == 0
+
+
+# --- ORÇAMENTO DE ROUND TRIPS DAS ROTAS ---
+
+def _linhas(nome, **colunas):
+    tipo = namedtuple(nome, colunas)
+    return lambda n=1: [tipo(**{c: (v(i) if callable(v) else v) for c, v in colunas.items()}) for i in range(n)]
+
+
+_EQUIPA = _linhas("EquipaCompleta", ID="E1", Nome="Equipa", Orçamento=100.0, PontuaçãoTotal=0,
+                  ID_Utilizador="U1", Num_Jogadores=15, Valor_Total_Plantel=90.0)
+_PLANTEL = _linhas("JogadoresEquipa", ID=lambda i: f"P{i}", Nome=lambda i: f"Jogador {i}",
+                   Posicao=lambda i: ("Goalkeeper", "Defender", "Midfielder", "Forward")[i % 4],
+                   Preço=6.0, jogador_imagem=None, Estado="Disponível", benched=lambda i: int(i >= 11),
+                   ClubeNome="Clube", clube_imagem=None)
+_CATALOGO = _linhas("JogadorCompleto", ID=lambda i: f"P{i}", Nome=lambda i: f"Jogador {i}",
+                    Posicao=lambda i: ("Goalkeeper", "Defender", "Midfielder", "Forward")[i % 4],
+                    Preço=lambda i: 4.0 + i % 9, jogador_imagem=None, Estado="Disponível", Clube_Nome="Clube")
+
+
+class _CursorBD:
+    """Cursor de uma BD falsa: responde a cada consulta conforme a vista lida."""
+
+    description = None
+    rowcount = -1
+
+    def execute(self, sql, *params):
+        if "EquipaCompleta" in sql:
+            self.rows = _EQUIPA()
+        elif "JogadoresEquipa" in sql:
+            self.rows = _PLANTEL(15)
+        elif "COUNT_BIG" in sql:
+            self.rows = [(400, b"\x01")]
+        elif "JogadorCompleto" in sql:
+            self.rows = _CATALOGO(400)
+        else:
+            pytest.fail(f"Consulta inesperada: {sql}")
+        return self
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class _ConnBD:
+    autocommit = False
+
+    def cursor(self):
+        return _CursorBD()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_equipa_dentro_do_orcamento_de_round_trips(aplicacao, monkeypatch):
+    from persistence import players, unit_of_work
+    from persistence.session import ConnectionPool
+
+    pool = ConnectionPool(_ConnBD)
+    monkeypatch.setattr(session, "get_pool", lambda: pool)
+    monkeypatch.setattr(unit_of_work, "get_pool", lambda: pool)
+    # Catálogo ainda por carregar: o pior caso da rota
+    monkeypatch.setattr(players, "_catalog", None)
+    monkeypatch.setattr(players, "_checked_at", None)
+
+    client = _cliente_com_sessao(aplicacao)
+    # Com app.testing, exceder @roundtrip_budget(6) faz o pedido falhar
+    resposta = client.get("/equipa?ordem=name&procurar_medios=jog")
+
+    assert resposta.status_code == 200
+    assert int(resposta.headers["X-DB-Roundtrips"]) <= 6
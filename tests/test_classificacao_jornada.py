@@ -0,0 +1,99 @@
+import types
+
+import pytest
+
+pytest.importorskip("pyodbc")
+
+from persistence import leagues  # noqa: E402
+from persistence.leagues import obter_pagina_classificacao_jornada  # noqa: E402
+
+# Classificação_Jornada de uma liga numa jornada fechada: (posicao, id_equipa, id_utilizador, variacao)
+CLASSIFICACAO = [(p, f"00000000-0000-0000-0000-{p:012d}", f"U{p}", 3 - p) for p in range(1, 12)]
+
+
+class _Cursor:
+    def __init__(self, linhas):
+        self.linhas = linhas
+
+    def execute(self, sql, *params):
+        if "MAX(posicao)" in sql:
+            id_ancora, em_volta_de = params[4], params[7]
+            posicoes = {e: p for p, e, _, _ in self.linhas}
+            minhas = [p for p, _, u, _ in self.linhas if u == em_volta_de]
+            self.rows = [types.SimpleNamespace(
+                total=max((p for p, *_ in self.linhas), default=None),
+                ancora=posicoes.get(id_ancora),
+                minha=min(minhas, default=None),
+            )]
+        else:
+            inicio, fim = params[2], params[3]
+            self.rows = [
+                types.SimpleNamespace(posicao=p, nome_utilizador=f"Nome {p}", nome_equipa=f"Equipa {p}",
+                                      pontuacao=1, pontuacao_acumulada=100 - p, id_equipa=e,
+                                      id_utilizador=u, variacao=v)
+                for p, e, u, v in self.linhas if inicio <= p <= fim
+            ]
+        return self
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class _Conn:
+    def __init__(self, linhas):
+        self.linhas = linhas
+
+    def cursor(self):
+        return _Cursor(self.linhas)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def classificacao(monkeypatch):
+    linhas = list(CLASSIFICACAO)
+    monkeypatch.setattr(leagues, "create_connection", lambda: _Conn(linhas))
+    return linhas
+
+
+def _posicoes(pagina):
+    return [e.posicao for e in pagina.linhas]
+
+
+def test_percorrer_as_paginas_pelos_cursores(classificacao):
+    pagina = obter_pagina_classificacao_jornada("L", "J1", 4)
+    vistas = [_posicoes(pagina)]
+    while pagina.seguinte:
+        pagina = obter_pagina_classificacao_jornada("L", "J1", 4, depois=pagina.seguinte)
+        vistas.append(_posicoes(pagina))
+
+    assert vistas == [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11]]
+    assert pagina.total == 11
+
+    anterior = obter_pagina_classificacao_jornada("L", "J1", 4, antes=pagina.anterior)
+    assert _posicoes(anterior) == [5, 6, 7, 8]
+
+
+def test_pagina_a_volta_da_equipa_do_utilizador(classificacao):
+    pagina = obter_pagina_classificacao_jornada("L", "J1", 4, em_volta_de="U7")
+    assert _posicoes(pagina) == [5, 6, 7, 8]
+
+    # No fim da liga a página não fica mais curta
+    assert _posicoes(obter_pagina_classificacao_jornada("L", "J1", 4, em_volta_de="U11")) == [8, 9, 10, 11]
+
+
+def test_variacao_de_cada_equipa(classificacao):
+    pagina = obter_pagina_classificacao_jornada("L", "J1", 3)
+    assert pagina.variacoes == {e: v for _, e, _, v in CLASSIFICACAO[:3]}
+
+
+def test_jornada_sem_classificacao(classificacao):
+    classificacao.clear()
+    assert obter_pagina_classificacao_jornada("L", "J1", 4) is None
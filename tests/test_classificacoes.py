@@ -0,0 +1,170 @@
+import random
+import threading
+import uuid
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("pyodbc")
+
+from persistence import classificacoes  # noqa: E402
+from persistence.classificacoes import PosicaoLiga, ordenar_ligas  # noqa: E402
+from persistence.leagues import chave_guid  # noqa: E402
+from persistence.scoring import ScoringConfig  # noqa: E402
+
+A = "00000000-0000-0000-0000-00000000000a"
+B = "00000000-0000-0000-0000-00000000000b"
+C = "00000000-0000-0000-0000-00000000000c"
+
+
+def test_cada_liga_ordenada_por_pontos_e_id_da_equipa():
+    ligas = {
+        "L1": [(C, 5), (B, 9), (A, 5)],
+        "L2": [(B, 0)],
+    }
+
+    assert ordenar_ligas(ligas) == [
+        PosicaoLiga("L1", 1, B, 9),
+        PosicaoLiga("L1", 2, A, 5),
+        PosicaoLiga("L1", 3, C, 5),
+        PosicaoLiga("L2", 1, B, 0),
+    ]
+
+
+# --- Reconstrução por partições, contra uma BD falsa ---
+
+Linha = namedtuple("Linha", "ID ID_Liga ID_Equipa pontos versao", defaults=(None,) * 5)
+
+
+class _BD:
+    def __init__(self, semente: int):
+        aleatorio = random.Random(semente)
+        guid = lambda: str(uuid.UUID(int=aleatorio.getrandbits(128)))  # noqa: E731
+        self.ligas = {guid(): "LT02" for _ in range(40)}
+        self.ligas.update({guid(): "LT01" for _ in range(2)})
+        self.equipas = {guid(): (guid(), aleatorio.randrange(0, 60)) for _ in range(300)}
+        utilizadores = list(self.equipas)
+        ids_ligas = list(self.ligas)
+        # Uma liga fica vazia, mas tem posições antigas que têm de desaparecer
+        vazia = ids_ligas.pop()
+        self.participa = [(liga, u) for liga in ids_ligas for u in aleatorio.sample(utilizadores, aleatorio.randrange(1, 30))]
+        self.versoes = {liga: aleatorio.randrange(1, 9) for liga in self.ligas}
+        self.versoes_classificacao = {}
+        self.classificacao = {(vazia, 1): (guid(), 3), (ids_ligas[0], 99): (guid(), 0)}
+        self.intervalos = []
+        self.lock = threading.Lock()
+
+    def connect(self):
+        return _ConnBD(self)
+
+
+def _no_intervalo(id_liga, primeira, ultima):
+    return chave_guid(primeira) <= chave_guid(id_liga) <= chave_guid(ultima)
+
+
+class _CursorBD:
+    def __init__(self, bd: _BD):
+        self.bd = bd
+        self.fast_executemany = False
+        self.rowcount = -1
+        self._linhas = []
+        self._temp = {"#ClassificacaoNova": [], "#LigasReconstruidas": []}
+
+    def execute(self, sql, *params):
+        bd = self.bd
+        if "ORDER BY ID" in sql:
+            tipo = params[0]
+            ids = [i for i, t in bd.ligas.items() if tipo is None or t == tipo]
+            self._linhas = [Linha(ID=i) for i in sorted(ids, key=chave_guid)]
+        elif "ISNULL(V.versao" in sql:
+            tipo, _, primeira, ultima = params
+            bd.intervalos.append((primeira, ultima))
+            self._linhas = [
+                Linha(ID=i, versao=bd.versoes[i]) for i, t in bd.ligas.items()
+                if (tipo is None or t == tipo) and _no_intervalo(i, primeira, ultima)
+            ]
+        elif "FROM FantasyChamp.Participa P" in sql:
+            tipo, _, primeira, ultima = params
+            self._linhas = [
+                Linha(ID_Liga=liga, ID_Equipa=bd.equipas[u][0], pontos=bd.equipas[u][1])
+                for liga, u in bd.participa
+                if (tipo is None or bd.ligas[liga] == tipo) and _no_intervalo(liga, primeira, ultima)
+            ]
+        elif "MERGE FantasyChamp.Classificação_Liga" in sql:
+            novas = {(r[0], r[1]): (r[2], r[3]) for r in self._temp["#ClassificacaoNova"]}
+            ligas = {r[0] for r in self._temp["#LigasReconstruidas"]}
+            with bd.lock:
+                antigas = {k: v for k, v in bd.classificacao.items() if k[0] in ligas}
+                self.rowcount = sum(antigas.get(k) != v for k, v in novas.items()) + len(antigas.keys() - novas.keys())
+                for k in antigas.keys() - novas.keys():
+                    del bd.classificacao[k]
+                bd.classificacao.update(novas)
+        elif "MERGE FantasyChamp.Versao_Liga" in sql:
+            with bd.lock:
+                bd.versoes_classificacao.update(dict(self._temp["#LigasReconstruidas"]))
+
+    def executemany(self, sql, linhas):
+        tabela = "#ClassificacaoNova" if "#ClassificacaoNova" in sql else "#LigasReconstruidas"
+        self._temp[tabela].extend(tuple(linha) for linha in linhas)
+
+    def fetchall(self):
+        return list(self._linhas)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+
+class _ConnBD:
+    def __init__(self, bd):
+        self.bd = bd
+
+    def cursor(self):
+        return _CursorBD(self.bd)
+
+    def commit(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Executor(ThreadPoolExecutor):
+    # Os processos "spawn" não veriam a BD falsa: as partições correm em threads
+    def __init__(self, max_workers=None, mp_context=None):
+        super().__init__(max_workers=max_workers)
+
+
+def _reconstruir(monkeypatch, bd: _BD, workers: int):
+    monkeypatch.setattr(classificacoes, "create_connection", bd.connect)
+    monkeypatch.setattr(classificacoes, "ProcessPoolExecutor", _Executor)
+    monkeypatch.setattr(classificacoes, "scoring_config", lambda: ScoringConfig(partitions_per_worker=4))
+    return classificacoes.reconstruir_classificacoes(workers=workers, progresso=lambda _: None)
+
+
+def test_particoes_gravam_o_mesmo_que_um_so_processo(monkeypatch):
+    um, varios = _BD(3), _BD(3)
+
+    r1 = _reconstruir(monkeypatch, um, workers=1)
+    r3 = _reconstruir(monkeypatch, varios, workers=3)
+
+    assert len(um.intervalos) == 1 and len(varios.intervalos) == 12
+    assert varios.classificacao == um.classificacao
+    assert varios.versoes_classificacao == um.versoes_classificacao == um.versoes
+    assert (r3.ligas, r3.equipas, r3.alteradas) == (r1.ligas, r1.equipas, r1.alteradas) == \
+        (len(um.ligas), len(um.participa), len(um.participa) + 2)
+
+    # Ligas públicas incluídas, e a mesma ordem de ordenar_ligas sobre todas as ligas juntas
+    esperado = defaultdict(list)
+    for liga, u in um.participa:
+        esperado[liga].append(um.equipas[u])
+    assert sorted(um.classificacao.items()) == sorted(
+        ((p.id_liga, p.posicao), (p.id_equipa, p.pontuacao)) for p in ordenar_ligas(esperado)
+    )
+
+    # Partições disjuntas e contíguas na ordem do SQL Server
+    limites = sorted(varios.intervalos, key=lambda i: chave_guid(i[0]))
+    assert all(chave_guid(a[1]) < chave_guid(b[0]) for a, b in zip(limites, limites[1:]))
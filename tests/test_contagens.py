@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip("pyodbc")
+
+from persistence import contagens  # noqa: E402
+from persistence.contagens import CacheContagens, CountsConfig, contar_listagem  # noqa: E402
+
+
+class _Cursor:
+    def __init__(self, total):
+        self.total = total
+        self.contagens = 0
+
+    def execute(self, sql, *params):
+        assert sql == "SELECT COUNT(*) FROM FantasyChamp.ClubDetails"
+        self.contagens += 1
+
+    def fetchone(self):
+        return (self.total,)
+
+
+def test_contagem_exata_quando_os_metadados_nao_podem_ser_lidos(monkeypatch):
+    monkeypatch.setattr(contagens, "counts_config", lambda: CountsConfig(approximate=True))
+    monkeypatch.setattr(contagens, "contagem_aproximada", lambda cursor, tabela: None)
+    cursor = _Cursor(42)
+    cache = CacheContagens()
+
+    assert contar_listagem(cache, cursor, "FantasyChamp.ClubDetails", "FantasyChamp.Clube") == (42, False)
+    # O valor em cache guarda também se foi exato
+    assert contar_listagem(cache, cursor, "FantasyChamp.ClubDetails", "FantasyChamp.Clube") == (42, False)
+    assert cursor.contagens == 1
+
+
+def test_contagem_aproximada_pelos_metadados(monkeypatch):
+    monkeypatch.setattr(contagens, "counts_config", lambda: CountsConfig(approximate=True))
+    monkeypatch.setattr(contagens, "contagem_aproximada", lambda cursor, tabela: 40)
+    cursor = _Cursor(42)
+
+    assert contar_listagem(CacheContagens(), cursor, "FantasyChamp.ClubDetails", "FantasyChamp.Clube") == (40, True)
+    # Sem tabela base não há aproximação
+    assert contar_listagem(CacheContagens(), cursor, "FantasyChamp.ClubDetails") == (42, False)
+    assert cursor.contagens == 1
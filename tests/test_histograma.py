@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from persistence.histograma import Histograma, Intervalo
+
+
+def percentil_exato(pontos: list[int], p: float) -> int:
+    ordenados = sorted(pontos)
+    return ordenados[max(1, -(-len(ordenados) * p // 100)) - 1]
+
+
+def test_exato_enquanto_cabe_nos_baldes():
+    pontos = [10, 20, 20, 30, 40]
+    histograma = Histograma.de_pontos(pontos)
+
+    assert histograma.exato
+    assert len(histograma) == 5
+    assert histograma.acima(20) == 2
+    assert histograma.percentagem_topo(40) == 20.0
+    assert [histograma.percentil(p) for p in (20, 40, 60, 100)] == [10, 20, 20, 40]
+    assert histograma.intervalos(2) == [Intervalo(10, 25, 3), Intervalo(26, 40, 2)]
+
+
+def test_remover_depois_de_alargar_volta_ao_mesmo_balde():
+    histograma = Histograma.de_pontos(range(-50, 50), max_baldes=8)
+    assert not histograma.exato
+
+    for p in range(-50, 50):
+        histograma.remover(p)
+    assert len(histograma) == 0
+    assert histograma.contagens() == {}
+    with pytest.raises(ValueError):
+        histograma.remover(0)
+
+
+@pytest.mark.parametrize("max_baldes", [16, 64, 256])
+def test_erro_dos_percentis_limitado_pela_largura(max_baldes):
+    aleatorio = random.Random(max_baldes)
+    pontos = [int(aleatorio.gauss(600, 250)) for _ in range(5000)]
+    histograma = Histograma.de_pontos(pontos, max_baldes=max_baldes)
+
+    assert len(histograma.contagens()) <= max_baldes
+    assert len(histograma) == len(pontos)
+    for p in (1, 10, 25, 50, 75, 90, 99, 100):
+        erro = percentil_exato(pontos, p) - histograma.percentil(p)
+        assert 0 <= erro <= histograma.largura - 1
+
+    # "Acima" só pode esquecer as equipas do mesmo balde
+    for meus in (0, 300, 600, 1200):
+        exato = sum(p > meus for p in pontos)
+        mesmo_balde = sum(p > meus and p // histograma.largura == meus // histograma.largura for p in pontos)
+        assert exato - mesmo_balde == histograma.acima(meus)
+
+
+def test_fundir_particoes_igual_a_um_so_sketch():
+    aleatorio = random.Random(7)
+    pontos = [aleatorio.randrange(-20, 3000) for _ in range(4000)]
+    particoes = [pontos[i::3] for i in range(3)]
+    # Partições com larguras diferentes: a fusão iguala-as antes de somar
+    sketches = [Histograma.de_pontos(p, max_baldes=m) for p, m in zip(particoes, (32, 128, 4096))]
+
+    fundido = sketches[0] + sketches[1] + sketches[2]
+    direto = Histograma.de_pontos(pontos, max_baldes=32)
+
+    assert fundido.largura == direto.largura
+    assert fundido.contagens() == direto.contagens()
+    # A soma não altera as parcelas
+    assert len(sketches[2]) == len(particoes[2]) and sketches[2].exato
+
+
+def test_fundir_exatos_soma_as_contagens():
+    a = Histograma({10: 2, 20: 1})
+    b = Histograma({20: 3, 40: 1})
+
+    assert a.fundir(b).contagens() == {10: 2, 20: 4, 40: 1}
+    assert a.percentil(50) == 20
@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("pyodbc")
+
+from persistence import leaderboard  # noqa: E402
+from persistence.leaderboard import Leaderboard, LeaderboardConfig  # noqa: E402
+from persistence.leagues import EquipaRanking, chave_guid  # noqa: E402
+
+
+def equipa(id_equipa: str, pontos: int, nome: str = "") -> EquipaRanking:
+    return EquipaRanking(0, nome, f"equipa {id_equipa}", pontos, pontos, id_equipa, f"u-{id_equipa}")
+
+
+def test_chave_guid_segue_a_ordem_do_sql_server():
+    # O SQL Server compara primeiro os últimos 6 bytes, depois o 4.º grupo e por fim
+    # os grupos 3, 2 e 1, cada um do último byte para o primeiro
+    ordem_sql_server = [
+        "ffffffff-ffff-ffff-0000-000000000000",
+        "00000000-0000-0000-0001-000000000000",
+        "00000000-0000-0100-0000-000000000001",
+        "00000000-0000-0001-0000-000000000001",
+        "01000000-0000-0000-0000-000000000002",
+        "00000001-0000-0000-0000-000000000002",
+    ]
+    assert sorted(reversed(ordem_sql_server), key=chave_guid) == ordem_sql_server
+    assert chave_guid("A0000000-0000-0000-0000-000000000000") == chave_guid("a0000000-0000-0000-0000-000000000000")
+
+
+def test_empates_ordenados_pelo_id_e_nao_pelo_nome():
+    primeiro = "00000000-0000-0000-0000-000000000001"
+    segundo = "00000000-0000-0000-0000-000000000002"
+    board = Leaderboard("L")
+    board.carregar([equipa(segundo, 10, "Ana"), equipa(primeiro, 10, "Zé"), equipa("x", 20)])
+
+    assert [e.id_equipa for e in board.todas()] == ["x", primeiro, segundo]
+
+    pagina = board.pagina_cursor(1)
+    seguinte = board.pagina_cursor(1, depois=pagina.seguinte)
+    ultima = board.pagina_cursor(1, depois=seguinte.seguinte)
+    assert [e.id_equipa for e in seguinte.linhas] == [primeiro]
+    assert [e.id_equipa for e in ultima.linhas] == [segundo]
+    assert [e.id_equipa for e in board.pagina_cursor(1, antes=ultima.anterior).linhas] == [primeiro]
+
+
+def test_cache_mantem_so_as_ligas_mais_recentes(monkeypatch):
+    monkeypatch.setattr(leaderboard, "leaderboard_config", lambda: LeaderboardConfig(max_leagues=2))
+    monkeypatch.setattr(Leaderboard, "refrescar", lambda self, forcar=False: False)
+    monkeypatch.setattr(leaderboard, "_leaderboards", leaderboard.OrderedDict())
+
+    a = leaderboard.obter_leaderboard("A")
+    leaderboard.obter_leaderboard("B")
+    assert leaderboard.obter_leaderboard("A") is a
+    leaderboard.obter_leaderboard("C")
+
+    assert list(leaderboard._leaderboards) == ["A", "C"]
+
+
+def test_mudar_de_fonte_nao_reposiciona_as_equipas():
+    board = Leaderboard("L")
+    board.carregar([equipa("a", 10), equipa("b", 5)])
+
+    # Classificação_Liga traz a posição; os totais trazem 0
+    assert board.carregar([equipa("a", 10)._replace(posicao=1), equipa("b", 5)._replace(posicao=2)]) == 0
+    assert board.carregar([equipa("a", 10, "Ana"), equipa("b", 7)]) == 1
+
+    assert [(e.id_equipa, e.posicao, e.nome_utilizador) for e in board.todas()] == [("a", 1, "Ana"), ("b", 2, "")]
+    assert board.equipa_de("u-b").pontuacao_acumulada == 7
+
+
+def test_refrescar_le_a_liga_uma_so_vez_em_simultaneo(monkeypatch):
+    leituras = []
+
+    def obter_totais(id_liga):
+        leituras.append(id_liga)
+        time.sleep(0.05)
+        return [equipa("a", len(leituras))]
+
+    monkeypatch.setattr(leaderboard, "leaderboard_config", lambda: LeaderboardConfig(refresh_interval=60))
+    monkeypatch.setattr(leaderboard, "obter_versao_pontuacoes_liga", lambda id_liga: 1)
+    monkeypatch.setattr(leaderboard, "obter_classificacao_liga", lambda id_liga: [])
+    monkeypatch.setattr(leaderboard, "obter_totais_liga", obter_totais)
+
+    board = Leaderboard("L")
+    threads = [threading.Thread(target=board.refrescar) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert leituras == ["L"]
+    assert board.refrescar(forcar=True) is False    # mesma versão: não volta a ler
+    assert leituras == ["L"]
+
+
+def test_resumo_de_ligas_publicas_vem_do_leaderboard_em_memoria(monkeypatch):
+    from persistence.leagues import ResumoLiga
+
+    board = Leaderboard("P")
+    board.carregar([equipa("a", 30), equipa("b", 20), equipa("c", 10)])
+    monkeypatch.setattr(Leaderboard, "refrescar", lambda self, forcar=False: False)
+    monkeypatch.setattr(leaderboard, "_leaderboards", leaderboard.OrderedDict(P=board))
+    monkeypatch.setattr(leaderboard, "obter_histograma_liga", lambda id_liga: pytest.fail(id_liga))
+    privada = ResumoLiga("L", "Amigos", None, None, "LT02", "u", "X", 2, 4, 20)
+    publica = ResumoLiga("P", "Mundo", None, None, "LT01", "u", None, None, None, 20)
+
+    completas = leaderboard.completar_resumo_ligas([privada, publica], "u-b")
+    assert completas[0] == privada
+    assert (completas[1].posicao, completas[1].equipas, completas[1].pontuacao) == (2, 3, 20)
+    assert not completas[1].aproximada
+    # Sem equipa no leaderboard: sem posição, mas com o tamanho da liga
+    assert leaderboard.completar_resumo_ligas([publica._replace(pontuacao=None)], "u-z")[0][7:9] == (None, 3)
+
+
+def test_resumo_de_ligas_publicas_sem_leaderboard_usa_o_histograma(monkeypatch):
+    from persistence.leagues import ResumoLiga
+
+    monkeypatch.setattr(leaderboard, "_leaderboards", leaderboard.OrderedDict())
+    monkeypatch.setattr(leaderboard, "obter_histograma_liga", lambda id_liga: {50: 2, 30: 5, 10: 3})
+    publica = ResumoLiga("P", "Mundo", None, None, "LT01", "u", None, None, None, 30)
+
+    resumo = leaderboard.completar_resumo_ligas([publica], "u")[0]
+    assert (resumo.posicao, resumo.equipas, resumo.aproximada) == (3, 10, True)
+    # O leaderboard não é carregado só para o resumo
+    assert not leaderboard._leaderboards
+    sem_equipa = leaderboard.completar_resumo_ligas([publica._replace(pontuacao=None)], "u")[0]
+    assert (sem_equipa.posicao, sem_equipa.equipas) == (None, 10)
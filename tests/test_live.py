@@ -0,0 +1,181 @@
+import types
+
+import pytest
+
+pytest.importorskip("pyodbc")
+
+from persistence import live, ranking_stream  # noqa: E402
+from persistence.live import LiveConfig, LiveScoring, aplicar_pendente  # noqa: E402
+from persistence.scoring_rules import COLUNAS  # noqa: E402
+
+JOGADORES = [
+    # (ID, clube, posição)
+    ("av1", "C1", "Forward"),
+    ("med1", "C1", "Midfielder"),
+    ("gr2", "C2", "Goalkeeper"),
+]
+
+# Titulares (benched = 0) de cada equipa
+PERTENCE = [("av1", "E1"), ("av1", "E2"), ("med1", "E1"), ("gr2", "E3")]
+
+
+class _Cursor:
+    def __init__(self):
+        self.rows = []
+
+    def execute(self, sql, *params):
+        if "FROM FantasyChamp.Jogo" in sql:
+            self.rows = [types.SimpleNamespace(ID_jornada="J1", ID_Clube1="C1", ID_Clube2="C2")]
+        elif "FROM FantasyChamp.Jogador" in sql:
+            self.rows = [
+                types.SimpleNamespace(ID=i, ID_clube=c, **{"Posição": p, "pontuação_total": None},
+                                      **{coluna: None for coluna in COLUNAS})
+                for i, c, p in JOGADORES
+            ]
+        elif "FROM FantasyChamp.Pertence" in sql:
+            self.rows = [types.SimpleNamespace(ID_Jogador=j, ID_Equipa=e) for j, e in PERTENCE]
+        return self
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class _Conn:
+    def __init__(self):
+        self.commits = 0
+
+    def cursor(self):
+        return _Cursor()
+
+    def commit(self):
+        self.commits += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def motor(monkeypatch):
+    monkeypatch.setattr(live, "live_config", lambda: LiveConfig(enabled=True, token="t"))
+    monkeypatch.setattr(live, "create_connection", _Conn)
+    monkeypatch.setattr(ranking_stream, "notificar", lambda: None)
+    return LiveScoring()
+
+
+def test_golo_chega_a_todas_as_equipas_do_jogador(motor):
+    motor.registar_evento("G1", "entrada", "av1", 0)
+    resultado = motor.registar_evento("G1", "golo", "av1", 10)
+
+    assert resultado == {"jogador": "av1", "pontos": 5, "minuto": 10}
+    assert motor.pendente_equipa("E1") == {"J1": 5}
+    assert motor.pendente_equipa("E2") == {"J1": 5}
+    # O guarda-redes sofreu o golo mas não estava em campo
+    assert motor.pendente_equipa("E3") == {}
+
+
+def test_pontos_acumulam_por_equipa(motor):
+    for jogador in ("av1", "med1", "gr2"):
+        motor.registar_evento("G1", "entrada", jogador, 0)
+    motor.registar_evento("G1", "golo", "av1", 20)
+    motor.registar_evento("G1", "assistencia", "med1", 20)
+    motor.registar_evento("G1", "fim", minuto=90)
+
+    # 3 pontos por 90 minutos, +5 golo / +3 assistência; o GR sofreu um golo (-1)
+    assert motor.pendente_equipa("E1") == {"J1": 8 + 6}
+    assert motor.pendente_equipa("E2") == {"J1": 8}
+    assert motor.pendente_equipa("E3") == {"J1": 2}
+
+
+def test_gravacao_retira_do_pendente_so_o_que_foi_gravado(motor, monkeypatch):
+    gravadas = []
+
+    def gravar_estatisticas(linhas):
+        # Evento recebido enquanto a primeira gravação decorre: fica para a próxima
+        if not gravadas:
+            motor.registar_evento("G1", "golo", "av1", 30)
+        gravadas.extend(linhas)
+
+    antes_do_commit = []
+
+    def recalcular(confirmar):
+        antes_do_commit.append(motor.pendente_equipa("E1"))
+        confirmar(_Conn())
+        return 2, 2
+
+    monkeypatch.setattr(live, "_gravar_estatisticas", gravar_estatisticas)
+    monkeypatch.setattr(live, "recalcular_alteracoes", recalcular)
+
+    motor.registar_evento("G1", "entrada", "av1", 0)
+    motor.registar_evento("G1", "golo", "av1", 10)
+
+    assert motor.gravar() == 1
+    # Antes do commit os leitores continuam a ver os dois golos (e o minuto 30) como pendentes
+    assert antes_do_commit == [{"J1": 11}]
+    assert [(j, p) for _, j, _, p in gravadas] == [("av1", 5)]
+    assert motor.pendente_equipa("E2") == {"J1": 6}
+    assert motor.pendente_equipa("E1") == {"J1": 6}
+    # O segundo golo (e o minuto 30) continua por gravar
+    assert motor.gravar() == 1
+    assert motor.pendente_equipa("E1") == {}
+
+
+def test_falha_na_gravacao_mantem_o_pendente(motor, monkeypatch):
+    def recalcular(confirmar):
+        raise RuntimeError("deadlock")
+
+    monkeypatch.setattr(live, "_gravar_estatisticas", lambda linhas: None)
+    monkeypatch.setattr(live, "recalcular_alteracoes", recalcular)
+
+    motor.registar_evento("G1", "entrada", "av1", 0)
+    motor.registar_evento("G1", "golo", "av1", 10)
+
+    with pytest.raises(RuntimeError):
+        motor.gravar()
+    assert motor.pendente_equipa("E1") == {"J1": 5}
+
+    # O jogador continua marcado para gravar na próxima passagem
+    monkeypatch.setattr(live, "recalcular_alteracoes", lambda confirmar: confirmar(_Conn()))
+    assert motor.gravar() == 1
+    assert motor.pendente_equipa("E1") == {}
+
+
+def test_leitura_nao_conta_duas_vezes_uma_gravacao_a_meio(motor, monkeypatch):
+    monkeypatch.setattr(live, "_gravar_estatisticas", lambda linhas: None)
+    monkeypatch.setattr(live, "recalcular_alteracoes", lambda confirmar: confirmar(_Conn()))
+
+    motor.registar_evento("G1", "entrada", "av1", 0)
+    motor.registar_evento("G1", "golo", "av1", 10)
+
+    bd = {"E1": 0}
+    leituras = []
+
+    def ler():
+        leituras.append(bd["E1"])
+        if len(leituras) == 1:
+            # A gravação é confirmada depois de a BD ter sido lida
+            bd["E1"] = 5
+            motor.gravar()
+        return bd["E1"]
+
+    total, pendente = motor.ler_com_pendente("E1", ler)
+
+    assert leituras == [0, 5]
+    assert total + sum(pendente.values()) == 5
+
+
+def test_aplicar_pendente_soma_aos_acumulados_seguintes():
+    linhas = [
+        {"jornada_id": "J2", "jornada_numero": 2, "pontuacao": None, "pontuacao_acumulada": None},
+        {"jornada_id": "J1", "jornada_numero": 1, "pontuacao": 10, "pontuacao_acumulada": 10},
+    ]
+
+    resultado = aplicar_pendente(linhas, {"J1": 4})
+
+    assert [(l["pontuacao"], l["pontuacao_acumulada"]) for l in resultado] == [(14, 14), (None, 4)]
+    assert resultado[0]["ao_vivo"] and "ao_vivo" not in resultado[1]
@@ -0,0 +1,38 @@
+from persistence.metrics import MetricsConfig, QueryMetrics, metrics_allowed, normalize_statement
+
+
+def test_normalizacao_agrupa_por_procedimento_e_tabela():
+    assert normalize_statement("EXEC sp_ObterRankingLigaComEquipas ?, ?") == "EXEC sp_ObterRankingLigaComEquipas"
+    assert normalize_statement(
+        "SELECT * FROM FantasyChamp.JogadoresEquipa WHERE ID = ?"
+    ) == normalize_statement("select Nome\n  from FantasyChamp.JogadoresEquipa -- comentário")
+
+
+def test_registo_por_bucket_linhas_e_erros():
+    metrics = QueryMetrics()
+    metrics.record("EXEC sp_X", 0.003)
+    metrics.record("EXEC sp_X", 20.0, error=True)
+    metrics.record_rows("EXEC sp_X", 7)
+
+    stats = metrics.snapshot()["EXEC sp_X"]
+    assert (stats["count"], stats["rows"], stats["errors"]) == (2, 7, 1)
+    assert stats["buckets"][2] == 1      # <= 0.005
+    assert stats["buckets"][-1] == 1     # +Inf
+
+
+def test_metrics_so_para_enderecos_internos_sem_token():
+    config = MetricsConfig()
+
+    assert metrics_allowed("127.0.0.1", config=config)
+    assert not metrics_allowed("203.0.113.7", config=config)
+    # Sem token configurado, um cabeçalho qualquer não dá acesso
+    assert not metrics_allowed("203.0.113.7", "Bearer ", config=config)
+
+
+def test_metrics_com_token():
+    config = MetricsConfig(token="segredo", allowed_addresses=())
+
+    assert metrics_allowed("203.0.113.7", "Bearer segredo", config=config)
+    assert not metrics_allowed("203.0.113.7", "Bearer outro", config=config)
+    assert not metrics_allowed("203.0.113.7", "Basic segredo", config=config)
+    assert not metrics_allowed("127.0.0.1", None, config=config)
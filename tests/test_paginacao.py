@@ -0,0 +1,79 @@
+import itertools
+import sqlite3
+
+import pytest
+
+from persistence.paginacao import codificar_cursor, condicao_keyset, descodificar_cursor, parametros_keyset
+
+
+def test_limite_redundante_na_primeira_coluna():
+    assert condicao_keyset(("nome", "id"), ">") == "(nome >= ? AND ((nome > ?) OR (nome = ? AND id > ?)))"
+    assert parametros_keyset(("Ana", 7)) == ["Ana", "Ana", "Ana", 7]
+    # Uma só coluna já é um intervalo
+    assert condicao_keyset(("id",), "<") == "((id < ?))"
+    assert parametros_keyset((7,)) == [7]
+
+
+@pytest.mark.parametrize("operador", [">", "<"])
+def test_condicao_equivale_a_comparar_tuplos(operador):
+    linhas = list(itertools.product(range(3), range(3), range(3)))
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (a INT, b INT, c INT)")
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?)", linhas)
+
+    for chave in linhas:
+        obtidas = conn.execute(
+            f"SELECT a, b, c FROM t WHERE {condicao_keyset(('a', 'b', 'c'), operador)} ORDER BY a, b, c",
+            parametros_keyset(chave),
+        ).fetchall()
+        esperadas = [l for l in linhas if (l > chave if operador == ">" else l < chave)]
+        assert obtidas == esperadas
+
+
+def test_cursor_ida_e_volta():
+    token = codificar_cursor("Müller", 12)
+    assert descodificar_cursor(token, 2) == ("Müller", 12)
+    assert descodificar_cursor(token, 3) is None
+    assert descodificar_cursor("lixo!", 2) is None
+
+
+def test_jogos_paginados_pela_chave_do_indice(monkeypatch):
+    pytest.importorskip("pyodbc")
+    import datetime
+    import types
+
+    from persistence import match
+
+    pedidos = []
+    jogo = types.SimpleNamespace(ID=9, Data=datetime.datetime(2025, 5, 1, 20, 0), Jornada=30, Clube1="A",
+                                 Clube1_Imagem=None, Clube2="B", Clube2_Imagem=None, golos_clube1=1, golos_clube2=0)
+
+    class Cursor:
+        def execute(self, sql, *params):
+            pedidos.append((" ".join(sql.split()), params))
+
+        def fetchall(self):
+            return [jogo, jogo]
+
+    class Conn:
+        def cursor(self):
+            return Cursor()
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(match, "create_connection", Conn)
+    monkeypatch.setattr(match, "contar_listagem", lambda *args: (2, False))
+
+    pagina = match.list_paginated_matches(1)
+    assert pedidos[-1][0].endswith("ORDER BY Data DESC, ID DESC")
+    # (Data, ID) é a chave de IX_Jogo_Data_ID: a jornada não entra no cursor
+    assert descodificar_cursor(pagina.seguinte, 2) == ("2025-05-01T20:00:00.000", 9)
+
+    match.list_paginated_matches(1, depois=pagina.seguinte)
+    sql, params = pedidos[-1]
+    assert "WHERE (Data <= ? AND ((Data < ?) OR (Data = ? AND ID < ?)))" in sql
+    assert params == (2, "2025-05-01T20:00:00.000", "2025-05-01T20:00:00.000", "2025-05-01T20:00:00.000", 9)
@@ -0,0 +1,68 @@
+import types
+
+import pytest
+
+pytest.importorskip("pyodbc")
+
+from persistence import leagues  # noqa: E402
+from persistence.paginacao import codificar_cursor  # noqa: E402
+
+
+class _Cursor:
+    def __init__(self, pedidos, linhas):
+        self.pedidos = pedidos
+        self.linhas = linhas
+
+    def execute(self, sql, *params):
+        self.pedidos.append((" ".join(sql.split()), params))
+        return self
+
+    def fetchall(self):
+        return [types.SimpleNamespace(nome=n, equipa=None, id_equipa=None, id_utilizador=u) for n, u in self.linhas]
+
+
+class _Conn:
+    def __init__(self, pedidos, linhas):
+        self.pedidos = pedidos
+        self.linhas = linhas
+
+    def cursor(self):
+        return _Cursor(self.pedidos, self.linhas)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def pedidos(monkeypatch):
+    pedidos = []
+    linhas = [("Ana Silva", "U1"), ("Ana Sousa", "U2"), ("Bruno Costa", "U3")]
+    monkeypatch.setattr(leagues, "create_connection", lambda: _Conn(pedidos, linhas))
+    monkeypatch.setattr(leagues, "contar_participantes_liga", lambda id_liga: 40)
+    return pedidos
+
+
+def test_pagina_de_participantes_e_um_seek_na_vista_indexada(pedidos):
+    pagina = leagues.obter_pagina_participantes_liga("L", 2)
+
+    sql, params = pedidos[0]
+    assert "FROM FantasyChamp.ParticipantesLigaNome N WITH (NOEXPAND)" in sql
+    assert "WHERE N.ID_Liga = ? ORDER BY N.nome ASC, N.id_utilizador ASC" in sql
+    assert params == (3, "L")
+    assert [p.nome for p in pagina.linhas] == ["Ana Silva", "Ana Sousa"]
+    assert pagina.total == 40
+    assert pagina.seguinte == codificar_cursor("Ana Sousa", "U2") and pagina.anterior is None
+
+
+def test_prefixo_e_cursor_usam_as_colunas_da_chave_do_indice(pedidos):
+    pagina = leagues.obter_pagina_participantes_liga(
+        "L", 5, depois=codificar_cursor("Ana Silva", "U1"), prefixo=" 50%_ana ")
+
+    sql, params = pedidos[0]
+    assert "N.ID_Liga = ? AND N.nome LIKE ? ESCAPE '\\' AND (N.nome >= ? AND" in sql
+    assert params == (6, "L", "50\\%\\_ana%", "Ana Silva", "Ana Silva", "Ana Silva", "U1")
+    # Com filtro não há total (não é contado)
+    assert pagina.total is None and pagina.anterior is not None
@@ -0,0 +1,100 @@
+from typing import NamedTuple
+
+import pytest
+
+from persistence import player_search
+from persistence.player_search import (
+    SEMELHANCA_MINIMA,
+    PlayerSearchIndex,
+    normalizar,
+    trigramas,
+)
+
+
+class Jogador(NamedTuple):
+    id: int
+    nome: str
+
+
+CATALOGO = [
+    (Jogador(1, "Thomas Müller"), "Bayern München"),
+    (Jogador(2, "Alexander Sørloth"), "Atlético Madrid"),
+    (Jogador(3, "Kylian Mbappé"), "Real Madrid"),
+    (Jogador(4, "Cristiano Ronaldo"), "Al Nassr"),
+    (Jogador(5, "Ronaldo Nazário"), None),
+    (Jogador(6, "Rodri"), "Manchester City"),
+    (Jogador(7, "Martin Ødegaard"), "Arsenal"),
+    (Jogador(8, "Madridista Fã"), "Benfica"),
+]
+
+
+@pytest.fixture(scope="module")
+def indice():
+    return PlayerSearchIndex(CATALOGO)
+
+
+def ids(resultados):
+    return [r.jogador.id for r in resultados]
+
+
+def test_normalizar_sem_acentos_maiusculas_nem_pontuacao():
+    assert normalizar("Thomas MÜLLER") == "thomas muller"
+    assert normalizar("Sørloth") == "sorloth"
+    assert normalizar("  Ødegaard,  Martin ") == "odegaard martin"
+    assert normalizar("Weißenberger-Łukasz") == "weissenberger lukasz"
+
+
+def test_prefixo_de_palavras_do_nome_e_do_clube(indice):
+    assert ids(indice.search("mull")) == [1]
+    assert ids(indice.search("SØR")) == [2]
+    assert ids(indice.search("bayern")) == [1]
+    # Todos os termos têm de corresponder
+    assert ids(indice.search("thomas bayern")) == [1]
+    assert indice.search("thomas arsenal") == []
+    assert indice.search("") == [] and indice.search("mull", limit=0) == []
+
+
+def test_trigramas_so_acima_da_semelhanca_minima(indice):
+    def semelhanca(a, b):
+        ta, tb = trigramas(a), trigramas(b)
+        return len(ta & tb) / len(ta | tb)
+
+    assert semelhanca("mbape", "mbappe") >= SEMELHANCA_MINIMA
+    assert ids(indice.search("mbape")) == [3]
+    # "odegard" fica acima do limiar; "ronnie" não chega ao de "ronaldo"
+    assert ids(indice.search("odegard")) == [7]
+    assert semelhanca("ronnie", "ronaldo") < SEMELHANCA_MINIMA
+    assert indice.search("ronnie") == []
+
+
+def test_ranking_combinado(indice):
+    # Nome antes do clube: "madrid" é palavra do clube de 2 e 3, prefixo do nome de 8
+    resultados = indice.search("madrid")
+    assert ids(resultados) == [8, 2, 3]
+    assert resultados[0].pontuacao > resultados[1].pontuacao == resultados[2].pontuacao
+    # Nome completo a começar pela pesquisa fica à frente da palavra exata noutra posição
+    assert ids(indice.search("ronaldo")) == [5, 4]
+    assert ids(indice.search("cristiano ro")) == [4]
+
+
+def test_prefixos_curtos_com_candidatos_limitados(monkeypatch):
+    monkeypatch.setattr(player_search, "MAX_CANDIDATOS_CURTOS", 5)
+    catalogo = [(Jogador(i, f"Jogador {i:04d}"), "Clube A") for i in range(1000)]
+    catalogo.append((Jogador(5000, "Ab Zé"), None))
+    indice = PlayerSearchIndex(catalogo)
+
+    curtos = []
+    original = PlayerSearchIndex._curto
+    monkeypatch.setattr(PlayerSearchIndex, "_curto",
+                        lambda self, termo, candidatos: curtos.append(len(list(candidatos))) or
+                        original(self, termo, candidatos))
+
+    # Só termos curtos: no máximo MAX_CANDIDATOS_CURTOS, com os nomes completos à frente
+    assert ids(indice.search("a", limit=3)) == [5000, 0, 1]
+    assert curtos == [5]
+    assert ids(indice.search("jo", limit=2)) == [0, 1]
+
+    # Com um termo longo, o termo curto só filtra os candidatos desse termo
+    curtos.clear()
+    assert ids(indice.search("0999 cl", limit=1)) == [999]
+    assert curtos == [1]
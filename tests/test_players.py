@@ -0,0 +1,194 @@
+import random
+import threading
+import time
+import types
+
+import pytest
+
+pytest.importorskip("pyodbc")
+
+from persistence import players  # noqa: E402
+from persistence.players import CatalogConfig, PlayerDescriptor, PositionIndex  # noqa: E402
+
+NOMES = ["Ana", "Bruno", "bia", "Carlos", "Álvaro", "Beto", "Zé"]
+PRECOS = [4.0, 4.5, 5.0, 6.0, 7.5, 9.0, 12.0]
+
+
+@pytest.fixture(scope="module")
+def jogadores():
+    aleatorio = random.Random(7)
+    return [
+        PlayerDescriptor(str(i), f"{aleatorio.choice(NOMES)}{aleatorio.randint(0, 50)}", "Defender",
+                         aleatorio.choice(PRECOS), "", "Disponível")
+        for i in range(500)
+    ]
+
+
+def esperado(jogadores, budget, exclude, page, per_page, order, prefix):
+    filtrados = [
+        p for p in jogadores
+        if (budget is None or p.preco <= budget) and p.id not in exclude
+        and p.nome.casefold().startswith(prefix.casefold())
+    ]
+    if order == "name":
+        filtrados.sort(key=lambda p: (p.nome.casefold(), p.id))
+    else:
+        filtrados.sort(key=lambda p: (p.preco, p.nome.casefold(), p.id), reverse=True)
+    total = len(filtrados)
+    pages = max(1, -(-total // per_page))
+    page = min(max(page, 1), pages)
+    return filtrados[(page - 1) * per_page:page * per_page], total, page, pages
+
+
+@pytest.mark.parametrize("order", ["name", "price"])
+@pytest.mark.parametrize("prefix", ["", "b", "zé", "carlos1", "x"])
+@pytest.mark.parametrize("budget", [None, 4.0, 6.5, 100.0])
+def test_pagina_igual_a_filtrar_e_ordenar_tudo(jogadores, order, prefix, budget):
+    indice = PositionIndex(jogadores)
+    exclude = {str(i) for i in range(0, 500, 37)}
+
+    for page in (1, 2, 7, 1000):
+        for per_page in (1, 20):
+            resultado = indice.pick(budget, exclude, page, per_page, order, prefix)
+            assert tuple(resultado) == esperado(jogadores, budget, exclude, page, per_page, order, prefix)
+
+
+def test_prefixo_mantem_a_ordem_por_preco(jogadores):
+    pagina = PositionIndex(jogadores).pick(prefix="b", per_page=50)
+    precos = [p.preco for p in pagina.players]
+    assert precos == sorted(precos, reverse=True)
+
+
+def test_prefixo_por_preco_so_le_os_jogadores_da_pagina(jogadores):
+    indice = PositionIndex(jogadores)
+    lidos = []
+    indice.by_price = _Contador(indice.by_price, lidos)
+
+    pagina = indice.pick(prefix="b", per_page=5, page=3)
+
+    assert tuple(pagina) == esperado(jogadores, None, set(), 3, 5, "price", "b")
+    assert len(lidos) == 5
+
+
+class _Contador(tuple):
+    """Tuplo que regista os índices lidos."""
+
+    def __new__(cls, valores, lidos):
+        contador = super().__new__(cls, valores)
+        contador.lidos = lidos
+        return contador
+
+    def __getitem__(self, i):
+        self.lidos.append(i)
+        return super().__getitem__(i)
+
+
+# --- CATÁLOGO EM CACHE ---
+
+class _BD:
+    """Jogador numa BD falsa: a versão é (COUNT_BIG(*), MAX(Versao))."""
+
+    def __init__(self):
+        self.versao = 1
+        self.jogadores = [("1", "Ana", "Defender", 5.0)]
+        self.consultas = []
+
+    def connect(self):
+        bd = self
+
+        class Conn:
+            def cursor(self):
+                return Cursor()
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+        class Cursor:
+            def execute(self, sql, *params):
+                bd.consultas.append("versao" if "COUNT_BIG" in sql else "catalogo")
+                self.rows = (
+                    [(len(bd.jogadores), bytes([bd.versao]))] if "COUNT_BIG" in sql else [
+                        types.SimpleNamespace(ID=i, Nome=n, Posicao=pos, Preço=preco, jogador_imagem=None,
+                                              Estado="Disponível", Clube_Nome="Clube")
+                        for i, n, pos, preco in bd.jogadores
+                    ]
+                )
+                return self
+
+            def fetchone(self):
+                return self.rows[0]
+
+            def __iter__(self):
+                return iter(self.rows)
+
+        return Conn()
+
+
+@pytest.fixture
+def bd(monkeypatch):
+    bd = _BD()
+    monkeypatch.setattr(players, "create_connection", bd.connect)
+    monkeypatch.setattr(players, "_catalog", None)
+    monkeypatch.setattr(players, "_checked_at", None)
+    return bd
+
+
+def test_catalogo_nao_consulta_a_bd_dentro_do_intervalo(bd, monkeypatch):
+    monkeypatch.setattr(players, "catalog_config", lambda: CatalogConfig(check_interval=60))
+
+    primeiro = players.get_catalog()
+    bd.versao = 2
+    assert players.get_catalog() is primeiro
+    assert bd.consultas == ["versao", "catalogo"]
+
+
+def test_catalogo_so_e_relido_quando_a_versao_muda(bd, monkeypatch):
+    monkeypatch.setattr(players, "catalog_config", lambda: CatalogConfig(check_interval=0))
+
+    primeiro = players.get_catalog()
+    assert players.get_catalog() is primeiro
+
+    bd.versao = 2
+    bd.jogadores.append(("2", "Bruno", "Defender", 7.0))
+    segundo = players.get_catalog()
+
+    assert segundo is not primeiro
+    assert [p.nome for p in segundo.index["Defender"].pick().players] == ["Bruno", "Ana"]
+    assert bd.consultas == ["versao", "catalogo", "versao", "versao", "catalogo"]
+
+
+def test_invalidar_catalogo(bd, monkeypatch):
+    monkeypatch.setattr(players, "catalog_config", lambda: CatalogConfig(check_interval=60))
+    contagens = []
+    monkeypatch.setattr(players._player_counts, "invalidar", lambda chave=None: contagens.append(chave))
+
+    primeiro = players.get_catalog()
+    players.invalidate_catalog()
+
+    assert players.get_catalog() is not primeiro
+    assert contagens == [None]
+    assert bd.consultas == ["versao", "catalogo", "versao", "catalogo"]
+
+
+def test_catalogo_carregado_uma_so_vez_por_pedidos_simultaneos(bd, monkeypatch):
+    monkeypatch.setattr(players, "catalog_config", lambda: CatalogConfig(check_interval=60))
+    carregar = players._load_catalog
+
+    def carregar_devagar(cursor, version):
+        time.sleep(0.05)
+        return carregar(cursor, version)
+
+    monkeypatch.setattr(players, "_load_catalog", carregar_devagar)
+
+    resultados = []
+    threads = [threading.Thread(target=lambda: resultados.append(players.get_catalog())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(c) for c in resultados}) == 1
+    assert bd.consultas == ["versao", "catalogo"]
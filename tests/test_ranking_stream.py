@@ -0,0 +1,91 @@
+import pytest
+
+pytest.importorskip("pyodbc")
+
+from persistence import ranking_stream  # noqa: E402
+from persistence.ranking_stream import ProdutoresEsgotados, RankingBroadcaster, RankingStreamConfig  # noqa: E402
+
+
+class _Board:
+    def refrescar(self, forcar=False):
+        return False
+
+    def top(self, n):
+        return []
+
+    def intervalo(self, inicio, fim):
+        return []
+
+    def equipa_de(self, id_utilizador):
+        return None
+
+
+@pytest.fixture
+def broadcaster(monkeypatch):
+    monkeypatch.setattr(ranking_stream, "obter_leaderboard", lambda id_liga: _Board())
+    monkeypatch.setattr(
+        ranking_stream, "ranking_stream_config",
+        lambda: RankingStreamConfig(poll_interval=0.01, max_producers=2),
+    )
+    broadcaster = RankingBroadcaster()
+    yield broadcaster
+
+    for produtor in list(broadcaster._produtores.values()):
+        produtor.parar.set()
+        produtor.acordar.set()
+        produtor.thread.join(timeout=2)
+
+
+def _thread(broadcaster, id_liga):
+    return broadcaster._produtores[id_liga].thread
+
+
+def test_produtor_termina_com_o_ultimo_subscritor(broadcaster):
+    a = broadcaster.subscrever("L1", "U1")
+    b = broadcaster.subscrever("L1", "U2")
+    thread = _thread(broadcaster, "L1")
+    assert broadcaster.produtores() == 1
+
+    broadcaster.cancelar("L1", a)
+    assert thread.is_alive()
+
+    broadcaster.cancelar("L1", b)
+    thread.join(timeout=2)
+    assert not thread.is_alive()
+    assert broadcaster.produtores() == 0
+
+
+def test_produtor_sem_subscritores_termina_sozinho(broadcaster):
+    broadcaster.subscrever("L1", "U1")
+    produtor = broadcaster._produtores["L1"]
+
+    # Subscritor que desapareceu sem chamar cancelar()
+    with produtor.lock:
+        produtor.subscritores.clear()
+
+    produtor.thread.join(timeout=2)
+    assert not produtor.thread.is_alive()
+    assert broadcaster.produtores() == 0
+
+
+def test_limite_de_produtores(broadcaster):
+    broadcaster.subscrever("L1", "U1")
+    fila = broadcaster.subscrever("L2", "U1")
+
+    with pytest.raises(ProdutoresEsgotados):
+        broadcaster.subscrever("L3", "U1")
+    # Ligas que já têm produtor continuam a aceitar subscritores
+    broadcaster.subscrever("L1", "U2")
+
+    broadcaster.cancelar("L2", fila)
+    broadcaster.subscrever("L3", "U1")
+    assert broadcaster.produtores() == 2
+
+
+def test_primeira_mensagem_e_a_classificacao(broadcaster):
+    fila = broadcaster.subscrever("L1", "U1")
+
+    mensagem = fila.get(timeout=2)
+
+    assert mensagem.evento == "ranking"
+    assert mensagem.dados == {"ranking": []}
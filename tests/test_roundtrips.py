@@ -0,0 +1,107 @@
+import logging
+
+import pytest
+
+from persistence import roundtrips
+from persistence.roundtrips import RoundTripBudgetExceeded, RoundTripConfig, RoundTripTracker
+
+
+@pytest.fixture
+def config(monkeypatch):
+    def usar(**valores):
+        monkeypatch.setattr(roundtrips, "roundtrip_config", lambda: RoundTripConfig(**valores))
+    return usar
+
+
+def test_repeticao_acima_do_limite_e_assinalada(caplog):
+    tracker = RoundTripTracker("equipa", repeat_threshold=2)
+
+    with caplog.at_level(logging.WARNING, logger="fantasychamp.roundtrips"):
+        for _ in range(2):
+            tracker.record("SELECT * FROM Pertence WHERE ID_Equipa = ?")
+        assert not tracker.flagged
+
+        tracker.record("SELECT * FROM Pertence WHERE ID_Equipa = ?")
+
+    assert list(tracker.flagged) == ["SELECT * FROM Pertence WHERE ID_Equipa = ?"]
+    assert "Possível N+1" in caplog.text
+
+
+def test_job_acima_do_orcamento_em_modo_estrito(config):
+    config(enabled=True, repeat_threshold=5)
+
+    with pytest.raises(RoundTripBudgetExceeded, match="Orçamento de 3"):
+        with roundtrips.track("job", budget=3, strict=True) as tracker:
+            for i in range(4):
+                roundtrips.record(f"SELECT {i}")
+
+    assert tracker.total == 4
+
+
+def test_job_acima_do_orcamento_sem_modo_estrito_so_avisa(config, caplog):
+    config(enabled=True)
+
+    with caplog.at_level(logging.WARNING, logger="fantasychamp.roundtrips"):
+        with roundtrips.track("job", budget=1):
+            roundtrips.record("SELECT 1")
+            roundtrips.record("SELECT 2")
+
+    assert "Orçamento de 1 round trips ultrapassado" in caplog.text
+
+
+def test_dentro_do_orcamento(config):
+    config(enabled=True)
+
+    with roundtrips.track("job", budget=2) as tracker:
+        roundtrips.record("SELECT 1")
+        roundtrips.record("SELECT 2")
+
+    assert not tracker.over_budget
+    assert roundtrips.current() is None
+
+
+def test_rota_acima_do_orcamento(config):
+    flask = pytest.importorskip("flask")
+    config()
+
+    app = flask.Flask(__name__)
+    app.testing = True
+    roundtrips.init_app(app)
+
+    @app.route("/lista")
+    @roundtrips.roundtrip_budget(2)
+    def lista():
+        for _ in range(3):
+            roundtrips.record("SELECT * FROM Liga WHERE ID = ?")
+        return "ok"
+
+    @app.route("/detalhe")
+    @roundtrips.roundtrip_budget(2)
+    def detalhe():
+        roundtrips.record("SELECT * FROM Liga WHERE ID = ?")
+        return "ok"
+
+    client = app.test_client()
+    assert client.get("/detalhe").headers["X-DB-Roundtrips"] == "1"
+    with pytest.raises(RoundTripBudgetExceeded):
+        client.get("/lista")
+
+
+def _funcao_em(filename: str):
+    codigo = compile("def consulta(origem):\n    return origem()\n", filename, "exec")
+    namespace = {"__name__": "modulo_de_teste"}
+    exec(codigo, namespace)
+    return namespace["consulta"]
+
+
+def test_origem_da_instrucao_e_uma_funcao_do_pacote(tmp_path):
+    pytest.importorskip("pyodbc")
+    import os
+    from persistence import slow_query
+
+    do_pacote = _funcao_em(os.path.join(os.path.dirname(slow_query.__file__), "leagues.py"))
+    assert do_pacote(slow_query.calling_function).startswith("modulo_de_teste.consulta:")
+
+    # Um caminho que só contém "persistence" no nome não conta
+    fora = _funcao_em(str(tmp_path / "persistence_backup" / "leagues.py"))
+    assert fora(slow_query.calling_function) == "?"
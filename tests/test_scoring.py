@@ -0,0 +1,186 @@
+import sqlite3
+from collections import namedtuple
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pyodbc")
+
+from persistence.scoring import (  # noqa: E402
+    Jornada,
+    PontuacaoEquipa,
+    _pontos,
+    calcular_pontuacoes,
+    carregar_jornadas,
+    carregar_pontos_jogadores,
+    carregar_titulares,
+    calcular_vetor_equipa,
+    comparar_pontuacoes,
+    particionar,
+)
+
+JORNADAS = [Jornada("J1", 1), Jornada("J2", 2), Jornada("J3", 3)]
+
+# Pontos por jornada de cada jogador (como carregar_pontos_jogadores os devolve)
+PONTOS = {
+    "gr": [6, 2, 0],
+    "def": [1, -2, 4],
+    "med": [3, 3, 3],
+    "av": [10, 0, 5],
+}
+
+
+def test_pontos_guardados_como_texto():
+    assert _pontos("12") == 12
+    assert _pontos(" -3 ") == -3
+    assert _pontos(None) is None
+    assert _pontos("n/a") is None
+
+
+# Resultado de TRY_CAST(<texto> AS INT) no SQL Server
+@pytest.mark.parametrize("texto, esperado", [
+    ("+4", 4),
+    ("", 0),
+    ("   ", 0),
+    ("-", 0),
+    ("007", 7),
+    ("2147483647", 2147483647),
+    ("2147483648", None),
+    ("1.5", None),
+    ("1e3", None),
+    ("$5", None),
+    ("1_000", None),
+    ("\u0661\u0662", None),   # dígitos não ASCII, que int() aceitaria
+    ("- 3", None),
+])
+def test_pontos_como_try_cast_do_sql_server(texto, esperado):
+    assert _pontos(texto) == esperado
+
+
+def test_vetor_da_equipa_soma_os_titulares():
+    assert calcular_vetor_equipa(["gr", "def", "av"], PONTOS, 3) == [17, 0, 9]
+    # Jogador sem pontuações em nenhuma jornada não conta
+    assert calcular_vetor_equipa(["med", "sem_jogos"], PONTOS, 3) == [3, 3, 3]
+
+
+def test_pontuacao_por_jornada_e_acumulada():
+    linhas = calcular_pontuacoes({"A": ["gr", "av"], "B": ["def", "med"]}, PONTOS, JORNADAS)
+
+    assert linhas == [
+        PontuacaoEquipa("A", "J1", 16, 16),
+        PontuacaoEquipa("A", "J2", 2, 18),
+        PontuacaoEquipa("A", "J3", 5, 23),
+        PontuacaoEquipa("B", "J1", 4, 4),
+        PontuacaoEquipa("B", "J2", 1, 5),
+        PontuacaoEquipa("B", "J3", 7, 12),
+    ]
+
+
+def test_equipa_sem_titulares_tem_zero_em_todas_as_jornadas():
+    linhas = calcular_pontuacoes({"C": []}, PONTOS, JORNADAS)
+    assert [(l.pontuacao_jornada, l.pontuacao_acumulada) for l in linhas] == [(0, 0)] * 3
+
+
+def test_sufixo_parte_do_acumulado_anterior():
+    # Recalcular só a partir da jornada 2: o acumulado continua o da jornada 1
+    sufixo = {jogador: vetor[1:] for jogador, vetor in PONTOS.items()}
+    linhas = calcular_pontuacoes({"A": ["gr", "av"]}, sufixo, JORNADAS[1:], bases={"A": 16})
+
+    assert linhas == [
+        PontuacaoEquipa("A", "J2", 2, 18),
+        PontuacaoEquipa("A", "J3", 5, 23),
+    ]
+
+
+def test_comparar_com_pontuacoes_guardadas():
+    linhas = calcular_pontuacoes({"A": ["gr", "av"]}, PONTOS, JORNADAS)
+    guardadas = {("A", "J1"): (16, 16), ("A", "J2"): (2, 17)}
+
+    diferencas = comparar_pontuacoes(linhas, guardadas)
+
+    assert diferencas == [
+        (PontuacaoEquipa("A", "J2", 2, 18), (2, 17)),
+        (PontuacaoEquipa("A", "J3", 5, 23), None),
+    ]
+
+
+def test_particionar_reparte_todas_as_equipas():
+    ids = [f"E{i}" for i in range(10)]
+    partes = particionar(ids, 3)
+
+    assert len(partes) == 3
+    assert sorted(i for parte in partes for i in parte) == sorted(ids)
+
+
+# --- PARIDADE COM sp_AtualizarPontuacoesBatch ---
+
+SP_BATCH = Path(__file__).parents[1] / "queries" / "sp_AtualizarPontuacoesBatch.sql"
+
+
+def _consulta_do_sp() -> str:
+    """As CTEs do SP (até ao MERGE), adaptadas ao SQLite, a devolver as linhas que o MERGE gravaria."""
+    texto = SP_BATCH.read_text(encoding="utf-8")
+    ctes = texto[texto.index("WITH PontosJogadores"):texto.index("MERGE FantasyChamp.Pontuação_Equipa")]
+    ctes = (ctes.replace("TRY_CAST(PJ.pontuação_total AS INT)", "try_cast_int(PJ.pontuação_total)")
+                .replace("ISNULL(", "IFNULL(")
+                .replace("@NumeroDesde", ":desde")
+                .replace("@JornadaAnterior", ":anterior"))
+    return ctes + " SELECT ID_Equipa, ID_jornada, pontuação_jornada, pontuação_acumulada FROM Novas"
+
+
+@pytest.fixture
+def bd():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("ATTACH DATABASE ':memory:' AS FantasyChamp")
+    conn.create_function("try_cast_int", 1, _pontos)
+    conn.row_factory = lambda cursor, row: namedtuple("Row", [c[0] for c in cursor.description])(*row)
+
+    conn.executescript("""
+        CREATE TABLE FantasyChamp.Equipa (ID TEXT PRIMARY KEY);
+        CREATE TABLE FantasyChamp.Jornada (ID TEXT PRIMARY KEY, Numero INT);
+        CREATE TABLE FantasyChamp.Pertence (ID_Equipa TEXT, ID_Jogador TEXT, benched INT);
+        CREATE TABLE FantasyChamp.Pontuação_Jogador (ID_jogador TEXT, ID_jornada TEXT, pontuação_total TEXT);
+        CREATE TABLE FantasyChamp.Pontuação_Equipa (
+            ID_Equipa TEXT, ID_jornada TEXT, pontuação_jornada INT, pontuação_acumulada INT);
+
+        INSERT INTO FantasyChamp.Equipa VALUES ('A'), ('B'), ('C');
+        INSERT INTO FantasyChamp.Jornada VALUES ('J2', 2), ('J1', 1), ('J3', 3);
+        INSERT INTO FantasyChamp.Pertence VALUES
+            ('A', 'gr', 0), ('A', 'av', 0), ('A', 'med', 1),
+            ('B', 'av', 0), ('B', 'def', 0);
+        INSERT INTO FantasyChamp.Pontuação_Jogador VALUES
+            ('gr', 'J1', '6'), ('gr', 'J2', ' -2 '), ('gr', 'J3', '1.5'),
+            ('av', 'J1', '10'), ('av', 'J2', 'n/a'), ('av', 'J3', '+5'),
+            ('med', 'J1', '30'), ('med', 'J2', '30'),
+            ('def', 'J1', NULL), ('def', 'J2', ''), ('def', 'J3', '4'),
+            ('fora', 'J1', '99');
+    """)
+    return conn
+
+
+def _motor(cursor, jornadas=None, bases=None):
+    todas = carregar_jornadas(cursor)
+    jornadas = jornadas or todas
+    titulares = carregar_titulares(cursor)
+    pontos = carregar_pontos_jogadores(cursor, jornadas)
+    return sorted(tuple(l) for l in calcular_pontuacoes(titulares, pontos, jornadas, bases))
+
+
+def test_paridade_com_o_sp_em_lote(bd):
+    esperado = sorted(tuple(r) for r in bd.execute(_consulta_do_sp(), {"desde": None, "anterior": None}))
+
+    assert _motor(bd.cursor()) == esperado
+    assert ("A", "J3", 5, 19) in esperado
+    assert ("C", "J2", 0, 0) in esperado
+
+
+def test_paridade_com_o_sp_em_lote_a_partir_de_uma_jornada(bd):
+    bd.executemany(
+        "INSERT INTO FantasyChamp.Pontuação_Equipa VALUES (?, 'J1', ?, ?)",
+        [("A", 16, 16), ("B", 10, 10), ("C", 0, 0)],
+    )
+    esperado = sorted(tuple(r) for r in bd.execute(_consulta_do_sp(), {"desde": 2, "anterior": "J1"}))
+
+    cursor = bd.cursor()
+    sufixo = [j for j in carregar_jornadas(cursor) if j.numero >= 2]
+    assert _motor(cursor, sufixo, bases={"A": 16, "B": 10, "C": 0}) == esperado
@@ -0,0 +1,106 @@
+import itertools
+
+import pytest
+
+from persistence.scoring_rules import COLUNAS, pontuar, pontuar_jogador, pontuar_linhas
+
+
+def fn_calcular_pontuacao_jogador(estatisticas: dict, posicao: str) -> int:
+    """Transcrição de dbo.fn_CalcularPontuacaoJogador (queries/udf_calcularPontuacaoJogador.sql)."""
+    golos = estatisticas.get("GolosMarcados") or 0
+    assistencias = estatisticas.get("Assistencias") or 0
+    amarelos = estatisticas.get("CartoesAmarelos") or 0
+    vermelhos = estatisticas.get("CartoesVermelhos") or 0
+    tempo = estatisticas.get("TempoJogo") or 0
+    sofridos = estatisticas.get("GolosSofridos") or 0
+
+    pontuacao = 0
+    if tempo >= 30:
+        pontuacao += tempo // 30
+    pontuacao += golos * 5
+    pontuacao += assistencias * 3
+    pontuacao -= amarelos * 1
+    pontuacao -= vermelhos * 3
+    if posicao in ("Goalkeeper", "Defender"):
+        if sofridos == 0 and tempo >= 60:
+            pontuacao += 4
+        if sofridos > 0:
+            pontuacao -= sofridos * 1
+    return pontuacao
+
+
+def stats(**valores) -> dict:
+    linha = dict.fromkeys(COLUNAS, 0)
+    linha.update(valores)
+    return linha
+
+
+@pytest.mark.parametrize("tempo, pontos", [
+    (0, 0), (29, 0), (30, 1), (59, 1), (60, 2), (89, 2), (90, 3), (120, 4),
+])
+def test_um_ponto_por_cada_30_minutos(tempo, pontos):
+    assert pontuar_jogador(stats(TempoJogo=tempo, GolosSofridos=1), "Forward") == pontos
+
+
+@pytest.mark.parametrize("tempo, bonus", [(59, 0), (60, 4), (90, 4)])
+def test_clean_sheet_so_a_partir_de_60_minutos(tempo, bonus):
+    sem_bonus = tempo // 30
+    assert pontuar_jogador(stats(TempoJogo=tempo), "Defender") == sem_bonus + bonus
+    assert pontuar_jogador(stats(TempoJogo=tempo), "Goalkeeper") == sem_bonus + bonus
+
+
+@pytest.mark.parametrize("posicao", ["Midfielder", "Forward"])
+def test_regras_de_defesa_nao_se_aplicam_a_outras_posicoes(posicao):
+    assert pontuar_jogador(stats(TempoJogo=90), posicao) == 3
+    assert pontuar_jogador(stats(TempoJogo=90, GolosSofridos=3), posicao) == 3
+
+
+def test_golos_sofridos_penalizam_defesas():
+    assert pontuar_jogador(stats(TempoJogo=90, GolosSofridos=3), "Defender") == 0
+    assert pontuar_jogador(stats(TempoJogo=20, GolosSofridos=2), "Goalkeeper") == -2
+
+
+def test_golos_assistencias_e_cartoes():
+    linha = stats(TempoJogo=90, GolosMarcados=2, Assistencias=1, CartoesAmarelos=1, CartoesVermelhos=1)
+    assert pontuar_jogador(linha, "Forward") == 3 + 10 + 3 - 1 - 3
+
+
+def test_null_conta_como_zero():
+    linha = dict.fromkeys(COLUNAS, None)
+    assert pontuar_jogador(linha, "Defender") == 0
+    assert pontuar_jogador({"TempoJogo": 90, "GolosSofridos": None}, "Goalkeeper") == 3 + 4
+    assert pontuar_jogador({"TempoJogo": None, "GolosMarcados": 1}, "Forward") == 5
+
+
+def test_limitar_a_zero():
+    linha = stats(TempoJogo=10, CartoesVermelhos=1, GolosSofridos=4)
+    assert pontuar_jogador(linha, "Defender") == -7
+    assert pontuar_jogador(linha, "Defender", limitar_a_zero=True) == 0
+    assert pontuar_jogador(stats(TempoJogo=90), "Forward", limitar_a_zero=True) == 3
+
+
+def test_paridade_com_a_udf():
+    posicoes = ["Goalkeeper", "Defender", "Midfielder", "Forward"]
+    valores = {
+        "TempoJogo": [None, 0, 29, 30, 59, 60, 61, 89, 90],
+        "GolosMarcados": [None, 0, 2],
+        "Assistencias": [0, 1],
+        "CartoesAmarelos": [0, 1],
+        "CartoesVermelhos": [None, 1],
+        "GolosSofridos": [None, 0, 1, 3],
+    }
+
+    linhas, posicoes_linhas = [], []
+    for combinacao in itertools.product(*valores.values()):
+        for posicao in posicoes:
+            linhas.append(dict(zip(valores, combinacao)))
+            posicoes_linhas.append(posicao)
+
+    esperado = [fn_calcular_pontuacao_jogador(l, p) for l, p in zip(linhas, posicoes_linhas)]
+    assert pontuar_linhas(linhas, posicoes_linhas) == esperado
+    assert pontuar_linhas(linhas, posicoes_linhas, limitar_a_zero=True) == [max(0, e) for e in esperado]
+
+
+def test_pontuar_por_colunas_sem_colunas_em_falta():
+    # Colunas ausentes contam como 0
+    assert pontuar({"TempoJogo": [90, 45]}, ["Defender", "Forward"]) == [3 + 4, 1]
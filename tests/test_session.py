@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+pyodbc = pytest.importorskip("pyodbc")
+
+from persistence.session import ConnectionPool, PoolConfig, PoolTimeout
+
+
+class _Cursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, *params):
+        if self.conn.morta:
+            raise pyodbc.Error("ligação perdida")
+        return self
+
+    def fetchone(self):
+        return (1,)
+
+
+class _Conn:
+    def __init__(self):
+        self.morta = False
+        self.closed = False
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def _pool(**config):
+    abertas = []
+
+    def connect():
+        abertas.append(_Conn())
+        return abertas[-1]
+
+    return ConnectionPool(connect, PoolConfig(**config)), abertas
+
+
+def test_pool_esgotado_lanca_timeout():
+    pool, _ = _pool(max_size=1, timeout=0.05)
+    pool.acquire()
+
+    inicio = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    assert time.monotonic() - inicio < 1
+    stats = pool.stats()
+    assert (stats.waits, stats.timeouts, stats.in_use) == (1, 1, 1)
+
+
+def test_conexao_morta_e_descartada_e_substituida():
+    pool, abertas = _pool(max_size=1, ping_after=0)
+    slot = pool.acquire()
+    pool.release(slot)
+    abertas[0].morta = True
+
+    novo = pool.acquire()
+
+    assert novo.raw is abertas[1]
+    assert abertas[0].closed
+    stats = pool.stats()
+    assert (stats.ping_failures, stats.created, stats.closed, stats.size) == (1, 2, 1, 1)
+
+
+def test_devolucao_depois_de_close_all_fecha_a_conexao():
+    pool, abertas = _pool(max_size=2)
+    emprestada = pool.acquire()
+    pool.release(pool.acquire())
+
+    pool.close_all()
+    assert abertas[1].closed and not abertas[0].closed
+
+    pool.release(emprestada)
+
+    assert abertas[0].closed
+    stats = pool.stats()
+    assert (stats.size, stats.idle) == (0, 0)
@@ -0,0 +1,84 @@
+import json
+import logging
+
+import pytest
+
+pytest.importorskip("pyodbc")
+
+from persistence import session, slow_query  # noqa: E402
+from persistence.session import InstrumentedCursor  # noqa: E402
+from persistence.slow_query import SlowQueryConfig, redact  # noqa: E402
+
+
+class _Registos(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.linhas = []
+
+    def emit(self, record):
+        self.linhas.append(json.loads(record.getMessage()))
+
+
+class _Cursor:
+    def execute(self, sql, *params):
+        return self
+
+    def executemany(self, sql, params):
+        pass
+
+
+@pytest.fixture
+def registos(monkeypatch):
+    handler = _Registos()
+    logger = logging.getLogger("test.slow_query")
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    monkeypatch.setattr(slow_query, "_logger", lambda: logger)
+    monkeypatch.setattr(slow_query, "slow_query_config", lambda: SlowQueryConfig(capture_plan=False))
+    yield handler.linhas
+    logger.removeHandler(handler)
+
+
+def test_parametros_nunca_sao_registados():
+    assert redact("password123") == "<str len=11>"
+    assert redact(b"\x00\x01") == "<bytes len=2>"
+    assert redact(42) == "<int>"
+    assert redact(None) == "NULL"
+
+
+def test_instrucao_lenta_e_registada_com_parametros_mascarados(registos, monkeypatch):
+    monkeypatch.setattr(session, "threshold_seconds", lambda: 0.0)
+
+    InstrumentedCursor(_Cursor()).execute("SELECT * FROM FantasyChamp.Utilizador WHERE Email = ?", "a@b.pt")
+
+    [registo] = registos
+    assert registo["type"] == "slow_query"
+    assert registo["statement"] == "SELECT ... FantasyChamp.Utilizador"
+    assert registo["params"] == ["<str len=6>"]
+    assert "a@b.pt" not in json.dumps(registo)
+
+
+def test_lote_lento_regista_o_numero_de_linhas(registos, monkeypatch):
+    monkeypatch.setattr(session, "threshold_seconds", lambda: 0.0)
+
+    InstrumentedCursor(_Cursor()).executemany("INSERT INTO #T (ID) VALUES (?)", [(1,), (2,), (3,)])
+
+    [registo] = registos
+    assert (registo["batch"], registo["params"]) == (3, ["<int>"])
+
+
+def test_instrucao_rapida_nao_e_registada(registos, monkeypatch):
+    monkeypatch.setattr(session, "threshold_seconds", lambda: 60.0)
+
+    InstrumentedCursor(_Cursor()).execute("SELECT 1")
+
+    assert registos == []
+
+
+def test_plano_capturado_no_maximo_uma_vez_por_intervalo(monkeypatch):
+    monkeypatch.setattr(slow_query, "slow_query_config", lambda: SlowQueryConfig(plan_interval=300))
+    monkeypatch.setattr(slow_query, "_last_plan", {})
+
+    assert slow_query._should_capture_plan("EXEC sp_X")
+    assert not slow_query._should_capture_plan("EXEC sp_X")
+    assert slow_query._should_capture_plan("EXEC sp_Y")
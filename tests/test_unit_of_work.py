@@ -0,0 +1,101 @@
+import pytest
+
+pyodbc = pytest.importorskip("pyodbc")
+pytest.importorskip("flask")
+
+from persistence import session
+from persistence.session import ConnectionPool, PoolConfig
+from persistence.unit_of_work import UnitOfWork
+
+
+class _Conn:
+    autocommit = False
+
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool():
+    abertas = []
+
+    def connect():
+        abertas.append(_Conn())
+        return abertas[-1]
+
+    pool = ConnectionPool(connect, PoolConfig(max_size=2))
+    pool.abertas = abertas
+    return pool
+
+
+@pytest.fixture
+def unidade(pool, monkeypatch):
+    unit = UnitOfWork(pool)
+    monkeypatch.setattr(session, "_scope_provider", lambda: unit)
+    monkeypatch.setattr(session, "get_pool", lambda: pool)
+    return unit
+
+
+def test_blocos_seguidos_partilham_a_mesma_conexao(pool, unidade):
+    for _ in range(3):
+        with session.create_connection() as conn:
+            assert conn.raw is pool.abertas[0]
+
+    assert unidade.lends == 3
+    assert len(pool.abertas) == 1
+    assert pool.abertas[0].commits == 3
+    # Continua emprestada pelo pool até ao teardown do pedido
+    assert pool.stats().in_use == 1
+
+    unidade.close()
+
+    stats = pool.stats()
+    assert (stats.in_use, stats.idle, stats.borrowed) == (0, 1, 1)
+
+
+def test_bloco_aninhado_usa_conexao_propria(pool, unidade):
+    with session.create_connection() as exterior:
+        with session.create_connection() as interior:
+            assert interior.raw is not exterior.raw
+            assert pool.stats().in_use == 2
+        # A conexão aninhada volta logo ao pool
+        assert pool.stats().in_use == 1
+
+    unidade.close()
+    assert pool.stats().in_use == 0
+
+
+def test_close_descarta_trabalho_sem_commit(pool, unidade):
+    conn = session.create_connection()
+    conn.close()
+
+    assert pool.abertas[0].rollbacks >= 1
+    assert pool.abertas[0].commits == 0
+    with pytest.raises(pyodbc.ProgrammingError):
+        conn.cursor()
+
+    # Depois de fechada, a unit of work volta a emprestar a mesma conexão
+    with session.create_connection() as conn:
+        assert conn.raw is pool.abertas[0]
+    unidade.close()
+
+
+def test_excecao_no_bloco_faz_rollback(pool, unidade):
+    with pytest.raises(RuntimeError):
+        with session.create_connection():
+            raise RuntimeError
+
+    assert pool.abertas[0].commits == 0
+    assert pool.abertas[0].rollbacks == 1
+    unidade.close()